@@ -156,4 +156,46 @@ PASSWORD_RESET_TIMEOUT = 86400  # 24 hours in seconds (default)
 # Site information for emails
 SITE_NAME = "TasteLocal Singapore"
 
+# Cache for search results, listing snapshots, page fragments and the version
+# counters of the in-process search structures. Every worker must share it,
+# or edits made through one worker only reach the others when entries time
+# out: in production point CACHE_BACKEND at a shared backend, e.g.
+# django.core.cache.backends.redis.RedisCache with CACHE_LOCATION=redis://...
+# (`manage.py check --deploy` warns otherwise). The process-local default
+# suits the single-process development server.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Listing pages (restaurants, food stalls, events, tours, stories)
+LISTING_PAGE_SIZE = int(os.getenv('LISTING_PAGE_SIZE', 24))
+LISTING_MAX_PAGE_SIZE = int(os.getenv('LISTING_MAX_PAGE_SIZE', 100))
+# Most rows counted for a listing's "Found N" (larger listings show "N+")
+LISTING_COUNT_LIMIT = int(os.getenv('LISTING_COUNT_LIMIT', 1000))
+# Seconds the filter sidebar snapshot stays cached; vendor edits rebuild it sooner
+LISTING_FILTERS_CACHE_TIMEOUT = int(os.getenv('LISTING_FILTERS_CACHE_TIMEOUT', 3600))
+# Days ahead that recurring events are expanded into occurrences (rolled forward daily)
+EVENT_OCCURRENCE_HORIZON_DAYS = int(os.getenv('EVENT_OCCURRENCE_HORIZON_DAYS', 180))
+# Seconds a built event feed stays cached (keyed by its ETag, so never stale)
+EVENT_FEED_CACHE_TIMEOUT = int(os.getenv('EVENT_FEED_CACHE_TIMEOUT', 3600))
+# Seconds a vendor detail page's rendered fragments stay cached; edits drop them sooner
+VENDOR_DETAIL_CACHE_TIMEOUT = int(os.getenv('VENDOR_DETAIL_CACHE_TIMEOUT', 3600))
+# Seconds a tour's walking route stays cached (keyed by the itinerary's version, so never stale)
+TOUR_ROUTE_CACHE_TIMEOUT = int(os.getenv('TOUR_ROUTE_CACHE_TIMEOUT', 86400))
+
+# Search result paging (cards per category per request)
+SEARCH_PAGE_SIZE = int(os.getenv('SEARCH_PAGE_SIZE', 12))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv('SEARCH_MAX_PAGE_SIZE', 50))
+# Search engine: 'auto' (MySQL FULLTEXT on MySQL, inverted index otherwise),
+# 'mysql', 'index' or 'icontains' - see webapp/search/backends.py
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'auto')
+# Seconds a query's hits stay cached; edits invalidate them sooner
+SEARCH_RESULT_CACHE_TIMEOUT = int(os.getenv('SEARCH_RESULT_CACHE_TIMEOUT', 300))
+# Search timing samples kept per process, and how many are written at once
+SEARCH_METRICS_BUFFER_SIZE = int(os.getenv('SEARCH_METRICS_BUFFER_SIZE', 1000))
+SEARCH_METRICS_FLUSH_SIZE = int(os.getenv('SEARCH_METRICS_FLUSH_SIZE', 100))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
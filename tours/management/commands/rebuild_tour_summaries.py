@@ -0,0 +1,12 @@
+# tours/management/commands/rebuild_tour_summaries.py
+from django.core.management.base import BaseCommand
+
+from tours import summaries
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TourSummary read model for every tour"
+
+    def handle(self, *args, **options):
+        count = summaries.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} tour summar{'y' if count == 1 else 'ies'}."))
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0008_tour_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tour',
+            index=models.Index(fields=['is_active', '-is_featured', 'name', 'id'], name='tours_tour_is_acti_4f8a84_idx'),
+        ),
+    ]
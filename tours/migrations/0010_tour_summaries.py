@@ -0,0 +1,42 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from tours import summaries
+
+
+def backfill_tour_summaries(apps, schema_editor):
+    summaries.rebuild(
+        tour_model=apps.get_model('tours', 'Tour'),
+        summary_model=apps.get_model('tours', 'TourSummary'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0009_listing_keyset_indexes'),
+        ('vendors', '0010_vendor_accept_tour_partnership_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TourSummary',
+            fields=[
+                ('tour', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='tours.tour')),
+                ('stop_count', models.PositiveIntegerField(default=0)),
+                ('stop_minutes', models.PositiveIntegerField(default=0, help_text='Summed duration of the stops that have one')),
+                ('cuisine_ids', models.JSONField(default=list, help_text="Cuisine ids of the stops' vendors, ascending")),
+                ('cuisine_names', models.CharField(blank=True, help_text='Cuisine names, comma separated', max_length=500)),
+                ('featured_vendor_ids', models.JSONField(default=list, help_text='Up to 3 featured vendors, in stop order')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tour Summary',
+                'verbose_name_plural': 'Tour Summaries',
+                'db_table': 'tour_summaries',
+            },
+        ),
+        migrations.RunPython(backfill_tour_summaries, migrations.RunPython.noop),
+    ]
@@ -212,15 +212,32 @@ class Tour(models.Model):
         """Get display name for tour type"""
         return dict(self.TOUR_TYPES).get(self.tour_type, self.tour_type)
     
+    @property
+    def stop_summary(self):
+        """The tour's TourSummary (every tour has one; see tours.summaries)"""
+        try:
+            return self.summary
+        except TourSummary.DoesNotExist:
+            # Lost to a write that skipped signals: store it so this happens once
+            from .summaries import refresh
+            refresh([self.pk])
+            self.summary = TourSummary.objects.get(tour_id=self.pk)
+            return self.summary
+    
     @property
     def itinerary_count(self):
         """Count of itinerary items"""
-        return self.itinerary.count()
+        return self.stop_summary.stop_count
     
     @property
     def has_itinerary(self):
         """Check if tour has itinerary items"""
-        return self.itinerary.exists()
+        return self.stop_summary.stop_count > 0
+    
+    @property
+    def stop_minutes(self):
+        """Total time spent at the stops that give a duration"""
+        return self.stop_summary.stop_minutes
     
     def get_itinerary_with_vendors(self):
         """Get itinerary items with vendor information"""
@@ -228,35 +245,32 @@ class Tour(models.Model):
     
     @property
     def featured_vendors(self):
-        """Get featured vendors from itinerary"""
-        vendors = set()
-        for item in self.itinerary.select_related('vendor').filter(vendor__is_featured=True):
-            if item.vendor:
-                vendors.add(item.vendor)
-        return list(vendors)[:3]  # Return up to 3 featured vendors
+        """Get featured vendors from itinerary (up to 3, in stop order)"""
+        vendor_ids = self.stop_summary.featured_vendor_ids
+        if not vendor_ids:
+            return []
+        vendors = Vendor.objects.in_bulk(vendor_ids)
+        return [vendors[vendor_id] for vendor_id in vendor_ids if vendor_id in vendors]
     
     @property
     def cuisine_types(self):
         """Get all cuisine types from vendors in itinerary"""
         from vendors.models import CuisineType
-        cuisine_ids = set()
-        for item in self.itinerary.select_related('vendor').filter(vendor__isnull=False):
-            if item.vendor:
-                cuisine_ids.update(item.vendor.cuisine_types.values_list('id', flat=True))
-        return CuisineType.objects.filter(id__in=cuisine_ids)
+        return CuisineType.objects.filter(id__in=self.stop_summary.cuisine_ids)
     
     @property
     def cuisine_display(self):
         """Display cuisine types as string"""
-        cuisines = self.cuisine_types
-        if cuisines:
-            return ", ".join([c.name for c in cuisines])
-        return "Various"
+        return self.stop_summary.cuisine_names or "Various"
     
     class Meta:
         verbose_name = "Tour"
         verbose_name_plural = "Tours"
         ordering = ['-is_featured', 'name']
+        indexes = [
+            # Keyset pagination of the guided tours listing
+            models.Index(fields=['is_active', '-is_featured', 'name', 'id']),
+        ]
 
 
 class TourItinerary(models.Model):
@@ -327,4 +341,28 @@ class TourItinerary(models.Model):
             tour=self.tour, 
             stop_order=self.stop_order
         ).exclude(pk=self.pk).exists():
-            raise ValidationError(f"Stop order {self.stop_order} already exists for this tour.")
\ No newline at end of file
+            raise ValidationError(f"Stop order {self.stop_order} already exists for this tour.")
+
+
+class TourSummary(models.Model):
+    """
+    Itinerary summary of one tour (read model).
+    
+    Rebuilt by tours.summaries whenever the tour's stops, their vendors or
+    those vendors' cuisines change; never edit rows directly.
+    """
+    tour = models.OneToOneField(Tour, on_delete=models.CASCADE, primary_key=True, related_name='summary')
+    stop_count = models.PositiveIntegerField(default=0)
+    stop_minutes = models.PositiveIntegerField(default=0, help_text="Summed duration of the stops that have one")
+    cuisine_ids = models.JSONField(default=list, help_text="Cuisine ids of the stops' vendors, ascending")
+    cuisine_names = models.CharField(max_length=500, blank=True, help_text="Cuisine names, comma separated")
+    featured_vendor_ids = models.JSONField(default=list, help_text="Up to 3 featured vendors, in stop order")
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Summary of {self.tour_id}"
+    
+    class Meta:
+        db_table = 'tour_summaries'
+        verbose_name = "Tour Summary"
+        verbose_name_plural = "Tour Summaries"
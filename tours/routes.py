@@ -0,0 +1,98 @@
+# tours/routes.py
+"""
+Walking legs between the stops of a tour.
+
+The tour detail page shows, under each stop, how far it is from the
+previous stop and roughly how long the walk takes. The distances come from
+the stop vendors' coordinates: the haversine distance (vendors.geo)
+stretched by ROUTE_FACTOR for streets that do not run straight, walked
+at WALKING_KMH. Stops without a located vendor are skipped, so the next
+located stop measures from the last located one.
+
+Routes are cached under the itinerary's version: a digest of every stop's
+id, order and vendor coordinates, which the page has already loaded. Any
+change to the stops or to a vendor's position gives a new key, so a route
+is never stale and no signal has to expire it.
+"""
+
+import hashlib
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+
+from vendors import geo
+
+WALKING_KMH = 4.5
+ROUTE_FACTOR = 1.3  # street distance over straight-line distance, roughly
+
+
+def distance_display(distance_km):
+    if distance_km < 1:
+        return f"{round(distance_km * 1000, -1):.0f} m"
+    return f"{distance_km:.1f} km"
+
+
+class Leg:
+    """The walk into one stop from the previous located stop"""
+
+    def __init__(self, from_stop_order, distance_km):
+        self.from_stop_order = from_stop_order
+        self.distance_km = distance_km
+        self.walking_minutes = max(1, math.ceil(distance_km / WALKING_KMH * 60))
+
+    @property
+    def distance_display(self):
+        return distance_display(self.distance_km)
+
+
+class Route:
+    """Legs of a tour keyed by the id of the stop they lead to"""
+
+    def __init__(self, legs):
+        self.legs = legs
+        self.distance_km = sum(leg.distance_km for leg in legs.values())
+        self.walking_minutes = sum(leg.walking_minutes for leg in legs.values())
+
+    @property
+    def distance_display(self):
+        return distance_display(self.distance_km)
+
+
+def _position(stop):
+    vendor = stop.vendor
+    if vendor is None or vendor.latitude is None or vendor.longitude is None:
+        return None
+    return (vendor.latitude, vendor.longitude)
+
+
+def version(stops):
+    """Digest of everything a route depends on"""
+    raw = repr([(stop.id, stop.stop_order, _position(stop)) for stop in stops])
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def build(stops):
+    """Route over stops given in stop order (no queries)"""
+    legs = {}
+    previous = None
+    for stop in stops:
+        position = _position(stop)
+        if position is None:
+            continue
+        if previous is not None:
+            previous_order, previous_position = previous
+            distance = geo.haversine_km(*previous_position, *position) * ROUTE_FACTOR
+            legs[stop.id] = Leg(previous_order, distance)
+        previous = (stop.stop_order, position)
+    return Route(legs)
+
+
+def route(tour_id, stops):
+    """The tour's Route, from the cache when its itinerary is unchanged"""
+    key = f'tour:route:{tour_id}:{version(stops)}'
+    cached = cache.get(key)
+    if cached is None:
+        cached = build(stops)
+        cache.set(key, cached, settings.TOUR_ROUTE_CACHE_TIMEOUT)
+    return cached
@@ -0,0 +1,103 @@
+# tours/summaries.py
+"""
+Maintenance of the TourSummary read model.
+
+Tour cards and the tour detail page show the number of stops, the time
+spent at them, the cuisines of the stops' vendors and a few featured
+vendors. Working that out walks the itinerary and each vendor's cuisines,
+so TourSummary keeps it as one row per tour and a listing reads it with
+the tour (select_related('summary')).
+
+webapp.signals calls refresh() with the affected tour ids whenever a
+tour is created, a stop is saved or deleted, or a vendor on a tour (its
+featured flag, its cuisines, a cuisine's name) changes.
+`manage.py rebuild_tour_summaries` rebuilds every summary, e.g. after
+writes that skip signals; migration 0010 ran the same rebuild on the
+historical models, so every tour has a summary from the start.
+"""
+
+from django.db import connection, transaction
+
+from .models import Tour, TourItinerary, TourSummary
+
+FEATURED_VENDORS = 3
+BATCH_SIZE = 500
+
+
+def _summary_fields(summary_model):
+    # Every column an upsert rewrites (all but the key)
+    return [field.name for field in summary_model._meta.concrete_fields if not field.primary_key]
+
+
+def _with_stops(tours):
+    return tours.prefetch_related('itinerary__vendor__cuisine_types')
+
+
+def build(tour, summary_model=TourSummary):
+    """Summary of a tour loaded through _with_stops() (no queries)"""
+    cuisines = {}
+    featured = []
+    stop_minutes = 0
+    stops = sorted(tour.itinerary.all(), key=lambda stop: stop.stop_order)
+    for stop in stops:
+        stop_minutes += stop.duration_minutes or 0
+        vendor = stop.vendor
+        if vendor is None:
+            continue
+        for cuisine in vendor.cuisine_types.all():
+            cuisines[cuisine.id] = cuisine.name
+        if vendor.is_featured and vendor.id not in featured:
+            featured.append(vendor.id)
+    cuisine_ids = sorted(cuisines)
+    return summary_model(
+        tour=tour,
+        stop_count=len(stops),
+        stop_minutes=stop_minutes,
+        cuisine_ids=cuisine_ids,
+        cuisine_names=', '.join(cuisines[cuisine_id] for cuisine_id in cuisine_ids)[:500],
+        featured_vendor_ids=featured[:FEATURED_VENDORS],
+    )
+
+
+def tours_for_vendors(vendor_ids):
+    """Ids of the tours that stop at any of these vendors"""
+    return set(
+        TourItinerary.objects.filter(vendor_id__in=list(vendor_ids))
+        .values_list('tour_id', flat=True)
+    )
+
+
+def _upsert(summaries, summary_model=TourSummary):
+    # MySQL's ON DUPLICATE KEY UPDATE picks the unique key itself
+    unique_fields = ['tour'] if connection.features.supports_update_conflicts_with_target else None
+    summary_model.objects.bulk_create(
+        summaries,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=_summary_fields(summary_model),
+        batch_size=BATCH_SIZE,
+    )
+
+
+def refresh(tour_ids):
+    """Rebuild the summaries of these tours"""
+    tour_ids = list(tour_ids)
+    if not tour_ids:
+        return
+    summaries = [build(tour) for tour in _with_stops(Tour.objects.filter(pk__in=tour_ids))]
+    if summaries:
+        _upsert(summaries)
+
+
+def rebuild(tour_model=Tour, summary_model=TourSummary):
+    """
+    Rebuild every summary; returns the number of tours.
+
+    A data migration passes its historical Tour and TourSummary models.
+    """
+    with transaction.atomic():
+        tours = _with_stops(tour_model.objects.all())
+        summaries = [build(tour, summary_model) for tour in tours.iterator(chunk_size=BATCH_SIZE)]
+        if summaries:
+            _upsert(summaries, summary_model)
+    return len(summaries)
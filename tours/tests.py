@@ -6,7 +6,7 @@ from django.contrib.messages.storage.fallback import FallbackStorage
 from django.contrib.sessions.middleware import SessionMiddleware
 import datetime
 
-from tours.models import TourOperator, Tour, TourItinerary
+from tours.models import TourOperator, Tour, TourItinerary, TourSummary
 from tours.views import tour_operator_required, tour_dashboard
 from vendors.models import Vendor, CuisineType
 
@@ -342,6 +342,29 @@ class ToursIntegrationTests(TestCase):
         
         print("IT002T PASSED: Tour management and itinerary workflow verified")
     
+    def test_vendor_search_keeps_backend_relevance_order(self):
+        """Matching cards come back in the search backend's ranking, not by name"""
+        from unittest import mock
+        from django.db.models import F
+        from vendors.models import VendorCard
+        from webapp.search.backends import IndexBackend, MySQLFulltextBackend
+
+        class RankedBackend(IndexBackend):
+            def vendor_ranking(self, query, vendor_field=None):
+                # Stands in for FULLTEXT relevance
+                return [F(f'{vendor_field}__business_name').desc()]
+
+        self.client.login(username='tourop@example.com', password='tourpass123')
+        for url in (reverse('tours:vendor_search'), reverse('tours:vendor_list')):
+            with self.subTest(url=url), mock.patch('tours.views.get_search_backend', RankedBackend):
+                response = self.client.get(url, {'q': 'o'})
+                names = [card.business_name for card in response.context['vendors']]
+                self.assertEqual(names, ['Restaurant One', 'Food Stall Two'])
+
+        ranking = MySQLFulltextBackend().vendor_ranking('laksa', 'vendor')
+        sql = str(VendorCard.objects.order_by(*ranking).query)
+        self.assertIn('ORDER BY MATCH ("vendors"."business_name", "vendors"."description")', sql)
+
     def test_IT003T_vendor_search_and_filtering_workflow(self):
         """IT003T: Test vendor search and filtering for partnerships"""
         # Login as tour operator
@@ -404,4 +427,168 @@ class ToursIntegrationTests(TestCase):
         )
         self.assertEqual(combined_filter.count(), 1)
         
-        print("IT003T PASSED: Vendor search and filtering workflow verified")
\ No newline at end of file
+        print("IT003T PASSED: Vendor search and filtering workflow verified")
+
+
+class TourSummaryTests(TestCase):
+    """The TourSummary read model follows stops, vendors and cuisines"""
+
+    def setUp(self):
+        operator_user = User.objects.create_user(
+            username='summaryop@example.com',
+            email='summaryop@example.com',
+            password='tourpass123',
+            user_type='tour_operator'
+        )
+        operator = TourOperator.objects.create(user=operator_user, company_name='Summary Tours')
+        self.tour = Tour.objects.create(
+            tour_operator=operator,
+            name='Chinatown Crawl',
+            description='Hawker favourites',
+            tour_type='walking',
+            duration_minutes=180,
+            price=60
+        )
+        self.vendors = []
+        for i, featured in enumerate([True, False]):
+            user = User.objects.create_user(
+                username=f'summaryvendor{i}@example.com',
+                email=f'summaryvendor{i}@example.com',
+                password='vendorpass123',
+                user_type='vendor'
+            )
+            self.vendors.append(Vendor.objects.create(
+                user=user, business_name=f'Stall {i}', vendor_type='stall', is_featured=featured
+            ))
+        self.cantonese = CuisineType.objects.create(name='Cantonese')
+        self.teochew = CuisineType.objects.create(name='Teochew')
+        self.vendors[0].cuisine_types.add(self.cantonese)
+        self.vendors[1].cuisine_types.add(self.teochew)
+
+    def summary(self):
+        return TourSummary.objects.get(tour=self.tour)
+
+    def test_summary_follows_stops(self):
+        self.assertEqual(self.summary().stop_count, 0)
+        TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[1], stop_order=1, duration_minutes=40)
+        stop = TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[0], stop_order=2, duration_minutes=30)
+        TourItinerary.objects.create(tour=self.tour, vendor=None, stop_order=3)
+
+        summary = self.summary()
+        self.assertEqual((summary.stop_count, summary.stop_minutes), (3, 70))
+        self.assertEqual(summary.cuisine_ids, [self.cantonese.id, self.teochew.id])
+        self.assertEqual(summary.cuisine_names, 'Cantonese, Teochew')
+        self.assertEqual(summary.featured_vendor_ids, [self.vendors[0].id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            stop.delete()
+        summary = self.summary()
+        self.assertEqual((summary.stop_count, summary.stop_minutes, summary.cuisine_names), (2, 40, 'Teochew'))
+        self.assertEqual(summary.featured_vendor_ids, [])
+
+    def test_summary_follows_vendors_and_cuisines(self):
+        TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[1], stop_order=1)
+
+        self.vendors[1].is_featured = True
+        self.vendors[1].save()
+        self.assertEqual(self.summary().featured_vendor_ids, [self.vendors[1].id])
+
+        self.vendors[1].cuisine_types.add(self.cantonese)
+        self.assertEqual(self.summary().cuisine_names, 'Cantonese, Teochew')
+        self.teochew.name = 'Teochew Porridge'
+        self.teochew.save()
+        self.assertEqual(self.summary().cuisine_names, 'Cantonese, Teochew Porridge')
+        self.cantonese.vendors.clear()
+        self.assertEqual(self.summary().cuisine_names, 'Teochew Porridge')
+        self.teochew.delete()
+        self.assertEqual(self.summary().cuisine_ids, [])
+
+    def test_listing_reads_summaries(self):
+        """Tour properties and the listing need no per-tour itinerary queries"""
+        TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[0], stop_order=1, duration_minutes=30)
+        tour = Tour.objects.select_related('summary').get(pk=self.tour.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual((tour.itinerary_count, tour.stop_minutes, tour.cuisine_display), (1, 30, 'Cantonese'))
+        self.assertEqual(tour.featured_vendors, [self.vendors[0]])
+
+        response = self.client.get(reverse('webapp:guided_tours'))
+        self.assertContains(response, '<strong>Stops:</strong> 1 (Cantonese)', html=False)
+
+    def test_rebuild(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[0], stop_order=1)
+        TourSummary.objects.all().delete()
+        self.assertEqual(Tour.objects.get(pk=self.tour.pk).itinerary_count, 1)
+        self.assertEqual(self.summary().stop_count, 1)  # stored on first use
+        TourSummary.objects.all().delete()
+        out = StringIO()
+        call_command('rebuild_tour_summaries', stdout=out)
+        self.assertIn('Rebuilt 1 tour summary.', out.getvalue())
+        self.assertEqual(self.summary().stop_count, 1)
+
+
+class TourRouteTests(TestCase):
+    """Walking legs between tour stops, cached per itinerary version"""
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        operator_user = User.objects.create_user(
+            username='routeop@example.com',
+            email='routeop@example.com',
+            password='tourpass123',
+            user_type='tour_operator'
+        )
+        operator = TourOperator.objects.create(user=operator_user, company_name='Route Tours')
+        self.tour = Tour.objects.create(
+            tour_operator=operator,
+            name='Maxwell to Amoy',
+            description='Two hawker centres',
+            tour_type='walking',
+            duration_minutes=120,
+            price=40
+        )
+        self.vendors = []
+        for i, (latitude, longitude) in enumerate([(1.28033, 103.84475), (1.27930, 103.84650)]):
+            user = User.objects.create_user(
+                username=f'routevendor{i}@example.com',
+                email=f'routevendor{i}@example.com',
+                password='vendorpass123',
+                user_type='vendor'
+            )
+            self.vendors.append(Vendor.objects.create(
+                user=user, business_name=f'Hawker {i}', vendor_type='stall',
+                latitude=latitude, longitude=longitude
+            ))
+        TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[0], stop_order=1)
+        TourItinerary.objects.create(tour=self.tour, vendor=None, stop_order=2, description='Kopi break')
+        self.last_stop = TourItinerary.objects.create(tour=self.tour, vendor=self.vendors[1], stop_order=3)
+        self.url = reverse('webapp:tour_detail', args=[self.tour.id])
+
+    def test_legs_skip_unlocated_stops(self):
+        from tours import routes
+
+        stops = list(self.tour.itinerary.select_related('vendor'))
+        route = routes.build(stops)
+        self.assertEqual(list(route.legs), [self.last_stop.id])
+        leg = route.legs[self.last_stop.id]
+        self.assertEqual(leg.from_stop_order, 1)
+        self.assertAlmostEqual(leg.distance_km, 0.2254 * routes.ROUTE_FACTOR, places=2)
+        self.assertEqual((leg.distance_display, leg.walking_minutes), ('290 m', 4))
+
+    def test_detail_page_uses_cached_route(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, '290 m from Stop 1, about 4 min walk')
+
+        # Tour with operator and summary, then the stops with their vendors
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        # Moving a vendor changes the itinerary version
+        self.vendors[1].latitude = 1.28230
+        self.vendors[1].save()
+        response = self.client.get(self.url)
+        self.assertNotContains(response, '290 m from Stop 1')
@@ -6,7 +6,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.db import models
-from vendors.models import Vendor, CuisineType
+from vendors.models import Vendor, VendorCard, CuisineType
+from webapp.search.backends import get_backend as get_search_backend
 from .models import TourOperator, Tour, TourItinerary  # ADD TourItinerary here
 from .forms import TourOperatorForm, TourForm
 
@@ -249,19 +250,23 @@ def delete_itinerary(request, itinerary_id):
     
     return redirect('tours:tour_management')
 
+def _search_cards(cards, query):
+    """Cards of active vendors matching a search query, most relevant first"""
+    backend = get_search_backend()
+    vendors = Vendor.objects.filter(is_active=True)
+    matching = backend.filter_vendors(vendors, query).order_by().values('pk')
+    return cards.filter(vendor__in=matching).order_by(*backend.vendor_ranking(query, 'vendor'), 'sort_name')
+
 @tour_operator_required
 def vendor_search(request):
     """Search for F&B vendor partners"""
     tour_operator = get_object_or_404(TourOperator, user=request.user)
-    vendors = Vendor.objects.filter(is_active=True, is_verified=True)
+    # Flat vendor cards (one row per active vendor)
+    vendors = VendorCard.objects.filter(is_verified=True).order_by('sort_name')
     
     query = request.GET.get('q')
     if query:
-        vendors = vendors.filter(
-            models.Q(business_name__icontains=query) |
-            models.Q(description__icontains=query) |
-            models.Q(cuisine_types__name__icontains=query)
-        ).distinct()
+        vendors = _search_cards(vendors, query)
     
     context = {
         'tour_operator': tour_operator,
@@ -273,7 +278,7 @@ def vendor_search(request):
 @tour_operator_required
 def vendor_list(request):
     """Vendor listing page for tour operators with simple filters"""
-    vendors = Vendor.objects.filter(is_active=True).order_by('business_name')  # Alphabetical order
+    vendors = VendorCard.objects.order_by('sort_name')  # Alphabetical order, active vendors only
     
     # Get filter parameters
     query = request.GET.get('q', '')
@@ -286,17 +291,13 @@ def vendor_list(request):
     
     # Apply filters
     if query:
-        vendors = vendors.filter(
-            Q(business_name__icontains=query) |
-            Q(description__icontains=query) |
-            Q(cuisine_types__name__icontains=query)
-        ).distinct()
+        vendors = _search_cards(vendors, query)
     
     if selected_vendor_types:
         vendors = vendors.filter(vendor_type__in=selected_vendor_types)
     
     if selected_cuisine_types:
-        vendors = vendors.filter(cuisine_types__id__in=selected_cuisine_types)
+        vendors = vendors.filter(vendor__cuisine_types__id__in=selected_cuisine_types).distinct()
     
     if partnership_only:
         vendors = vendors.filter(accept_tour_partnership=True)
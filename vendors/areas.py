@@ -0,0 +1,93 @@
+# vendors/areas.py
+"""
+Singapore postal districts derived from 6-digit postal codes.
+
+The first two digits of a postal code (the sector) map to one of the 28
+postal districts. Vendor.area stores the district number so listings can
+filter and facet on an indexed column instead of parsing addresses.
+"""
+
+import re
+
+# (district, general location)
+POSTAL_DISTRICTS = [
+    ('01', 'Raffles Place, Marina, Cecil'),
+    ('02', 'Tanjong Pagar, Chinatown'),
+    ('03', 'Tiong Bahru, Queenstown'),
+    ('04', 'Telok Blangah, HarbourFront'),
+    ('05', 'Pasir Panjang, Clementi'),
+    ('06', 'City Hall, High Street'),
+    ('07', 'Bugis, Beach Road'),
+    ('08', 'Little India, Farrer Park'),
+    ('09', 'Orchard, River Valley'),
+    ('10', 'Bukit Timah, Holland, Tanglin'),
+    ('11', 'Newton, Novena, Thomson'),
+    ('12', 'Balestier, Toa Payoh'),
+    ('13', 'MacPherson, Potong Pasir'),
+    ('14', 'Geylang, Eunos, Paya Lebar'),
+    ('15', 'Katong, Joo Chiat, Marine Parade'),
+    ('16', 'Bedok, Upper East Coast'),
+    ('17', 'Changi, Loyang'),
+    ('18', 'Tampines, Pasir Ris'),
+    ('19', 'Serangoon, Hougang, Punggol'),
+    ('20', 'Bishan, Ang Mo Kio'),
+    ('21', 'Upper Bukit Timah, Clementi Park'),
+    ('22', 'Jurong, Boon Lay'),
+    ('23', 'Bukit Batok, Bukit Panjang, Choa Chu Kang'),
+    ('24', 'Lim Chu Kang, Tengah'),
+    ('25', 'Kranji, Woodlands'),
+    ('26', 'Upper Thomson, Springleaf'),
+    ('27', 'Yishun, Sembawang'),
+    ('28', 'Seletar, Yio Chu Kang'),
+]
+
+# Postal sector (first two digits) -> district
+SECTOR_DISTRICTS = {}
+for district, sectors in [
+    ('01', '01 02 03 04 05 06'),
+    ('02', '07 08'),
+    ('03', '14 15 16'),
+    ('04', '09 10'),
+    ('05', '11 12 13'),
+    ('06', '17'),
+    ('07', '18 19'),
+    ('08', '20 21'),
+    ('09', '22 23'),
+    ('10', '24 25 26 27'),
+    ('11', '28 29 30'),
+    ('12', '31 32 33'),
+    ('13', '34 35 36 37'),
+    ('14', '38 39 40 41'),
+    ('15', '42 43 44 45'),
+    ('16', '46 47 48'),
+    ('17', '49 50 81'),
+    ('18', '51 52'),
+    ('19', '53 54 55 82'),
+    ('20', '56 57'),
+    ('21', '58 59'),
+    ('22', '60 61 62 63 64'),
+    ('23', '65 66 67 68'),
+    ('24', '69 70 71'),
+    ('25', '72 73'),
+    ('26', '77 78'),
+    ('27', '75 76'),
+    ('28', '79 80'),
+]:
+    for sector in sectors.split():
+        SECTOR_DISTRICTS[sector] = district
+
+AREA_LABELS = dict(POSTAL_DISTRICTS)
+
+# A standalone 6-digit number; addresses end with "Singapore 238867"
+_POSTAL_CODE_RE = re.compile(r'(?<!\d)(\d{6})(?!\d)')
+
+
+def postal_code(address):
+    """Return the last 6-digit postal code in an address, or ''"""
+    codes = _POSTAL_CODE_RE.findall(address or '')
+    return codes[-1] if codes else ''
+
+
+def area_for_address(address):
+    """Return the postal district for an address, or '' if it has no valid postal code"""
+    return SECTOR_DISTRICTS.get(postal_code(address)[:2], '')
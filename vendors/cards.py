@@ -0,0 +1,95 @@
+# vendors/cards.py
+"""
+Maintenance of the VendorCard read model.
+
+Restaurants, food stalls, search results and the tour-operator vendor
+pages all show the same card: name, cuisines, excerpt, address, image,
+badges, area and rating. VendorCard keeps that as one flat row per active
+vendor, so a listing reads its cards with a single query instead of
+joining cuisines and ratings per vendor.
+
+webapp.signals calls refresh() with the affected vendor ids whenever a
+vendor, its cuisines, a cuisine's name or its ratings change. A vendor
+that is inactive (or gone) loses its card. `manage.py rebuild_vendor_cards`
+rebuilds every card, e.g. after writes that skip signals.
+"""
+
+from django.db import connection, transaction
+from django.utils.text import Truncator
+
+from .models import Vendor, VendorCard
+
+EXCERPT_LENGTH = 100
+SUMMARY_WORDS = 30
+BATCH_SIZE = 500
+
+# Every column an upsert rewrites (all but the key)
+CARD_FIELDS = [field.name for field in VendorCard._meta.concrete_fields if not field.primary_key]
+
+
+def build(vendor):
+    """Card for a vendor loaded with its cuisine_types prefetched (no queries)"""
+    cuisines = [cuisine.name for cuisine in vendor.cuisine_types.all()]
+    return VendorCard(
+        vendor=vendor,
+        vendor_type=vendor.vendor_type,
+        business_name=vendor.business_name,
+        sort_name=vendor.business_name.lower(),
+        cuisines=', '.join(cuisines)[:500],
+        excerpt=vendor.description[:EXCERPT_LENGTH],
+        summary=Truncator(vendor.description).words(SUMMARY_WORDS),
+        address=vendor.address or '',
+        area=vendor.area,
+        opening_hours=vendor.opening_hours,
+        phone=vendor.phone,
+        email=vendor.email,
+        website=vendor.website,
+        image_url=vendor.business_pix.url if vendor.business_pix else '',
+        is_featured=vendor.is_featured,
+        is_verified=vendor.is_verified,
+        halal=vendor.halal,
+        kosher=vendor.kosher,
+        vegetarian=vendor.vegetarian,
+        catering_service=vendor.catering_service,
+        accept_tour_partnership=vendor.accept_tour_partnership,
+        rating_count=vendor.rating_count,
+        average_rating=vendor.average_rating,
+    )
+
+
+def _upsert(cards):
+    # MySQL's ON DUPLICATE KEY UPDATE picks the unique key itself
+    unique_fields = ['vendor'] if connection.features.supports_update_conflicts_with_target else None
+    VendorCard.objects.bulk_create(
+        cards,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=CARD_FIELDS,
+        batch_size=BATCH_SIZE,
+    )
+
+
+def refresh(vendor_ids):
+    """Rebuild the cards of these vendors and drop those no longer active"""
+    vendor_ids = list(vendor_ids)
+    if not vendor_ids:
+        return
+    vendors = Vendor.objects.filter(pk__in=vendor_ids, is_active=True).prefetch_related('cuisine_types')
+    cards = [build(vendor) for vendor in vendors]
+    with transaction.atomic():
+        VendorCard.objects.filter(vendor_id__in=vendor_ids).exclude(
+            vendor_id__in=[card.vendor_id for card in cards]
+        ).delete()
+        if cards:
+            _upsert(cards)
+
+
+def rebuild():
+    """Rebuild every card; returns the number of active vendors"""
+    with transaction.atomic():
+        VendorCard.objects.exclude(vendor__is_active=True).delete()
+        vendors = Vendor.objects.filter(is_active=True).prefetch_related('cuisine_types')
+        cards = [build(vendor) for vendor in vendors.iterator(chunk_size=BATCH_SIZE)]
+        if cards:
+            _upsert(cards)
+    return len(cards)
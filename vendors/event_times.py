@@ -0,0 +1,31 @@
+# vendors/event_times.py
+"""
+Stored start and end datetimes for events.
+
+Event keeps its dates and optional times in four columns. Event.save()
+combines them into starts_at and ends_at (aware, site time zone), which
+are indexed, so "happening now", "upcoming" and "ended in the last N
+days" are range filters in SQL (see EventQuerySet) instead of Python
+checks on every row.
+
+An event without a start time starts at midnight; one without an end
+time runs to the end of its end date.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def start_datetime(start_date, start_time=None):
+    return timezone.make_aware(datetime.combine(start_date, start_time or time.min))
+
+
+def end_datetime(end_date, end_time=None):
+    return timezone.make_aware(datetime.combine(end_date, end_time or time.max))
+
+
+def day_window(first_day, days=1):
+    """(start, end) datetimes covering `days` whole days from `first_day`"""
+    start = start_datetime(first_day)
+    return start, start_datetime(first_day + timedelta(days=days))
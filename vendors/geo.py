@@ -0,0 +1,172 @@
+# vendors/geo.py
+"""
+"Near me" search over vendor and event coordinates without PostGIS.
+
+Every Vendor and Event with coordinates stores their geohash (set on
+save, indexed). A geohash names a grid cell, and every longer hash that
+starts with it is a cell inside it, so "points in this cell" is an index
+range scan: `geohash >= 'w21z7' AND geohash < 'w21z8'`.
+
+A radius or bounding-box query:
+  1. picks the finest geohash precision whose cells cover the box in at
+     most MAX_CELLS cells and ORs one prefix filter per cell,
+  2. narrows the candidates to the exact box on latitude/longitude, and
+  3. computes the haversine distance in Python for those candidates only,
+     dropping points outside the radius and sorting by distance.
+
+Around Singapore a precision-6 cell is about 1.2 km x 0.6 km, so a 1 km
+radius reads a few cells' worth of rows, however many points there are.
+"""
+
+import math
+
+from django.db.models import Q
+
+EARTH_RADIUS_KM = 6371.0088
+GEOHASH_PRECISION = 9  # stored hashes; cells of about 5 m
+MAX_CELLS = 16
+MAX_RADIUS_KM = 50
+
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Geohash of a point, or '' if either coordinate is missing"""
+    if latitude is None or longitude is None:
+        return ''
+    latitude, longitude = float(latitude), float(longitude)
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude (even) and latitude (odd)
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_size(precision):
+    """(latitude, longitude) size in degrees of a geohash cell"""
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (float(lat1), float(lon1), float(lat2), float(lon2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _successor(prefix):
+    """The first geohash after every hash starting with `prefix`, or '' if none"""
+    while prefix and prefix[-1] == _BASE32[-1]:
+        prefix = prefix[:-1]
+    if not prefix:
+        return ''
+    return prefix[:-1] + _BASE32[_BASE32.index(prefix[-1]) + 1]
+
+
+def _prefix_q(hash_field, prefix):
+    # A range rather than LIKE 'prefix%', which SQLite will not run off an index
+    q = Q(**{f'{hash_field}__gte': prefix})
+    successor = _successor(prefix)
+    if successor:
+        q &= Q(**{f'{hash_field}__lt': successor})
+    return q
+
+
+def is_valid_point(latitude, longitude):
+    """True if both coordinates are on the globe (False for inf and NaN too)"""
+    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+
+
+class BoundingBox:
+    """Latitude/longitude rectangle (does not cross the antimeridian)"""
+
+    def __init__(self, min_lat, min_lon, max_lat, max_lon):
+        min_lat, min_lon, max_lat, max_lon = map(float, (min_lat, min_lon, max_lat, max_lon))
+        # Past the poles every cell encodes alike, so cells() would never reach MAX_CELLS
+        if not (is_valid_point(min_lat, min_lon) and is_valid_point(max_lat, max_lon)):
+            raise ValueError("Bounding box corners must be within latitude -90..90 and longitude -180..180")
+        self.min_lat, self.max_lat = sorted((min_lat, max_lat))
+        self.min_lon, self.max_lon = sorted((min_lon, max_lon))
+
+    @classmethod
+    def around(cls, latitude, longitude, radius_km):
+        """Smallest box containing the circle of `radius_km` around a point"""
+        latitude, longitude = float(latitude), float(longitude)
+        lat_delta = math.degrees(radius_km / EARTH_RADIUS_KM)
+        lon_delta = lat_delta / max(math.cos(math.radians(latitude)), 1e-6)
+        return cls(
+            max(latitude - lat_delta, -90.0), max(longitude - lon_delta, -180.0),
+            min(latitude + lat_delta, 90.0), min(longitude + lon_delta, 180.0),
+        )
+
+    @property
+    def center(self):
+        return (self.min_lat + self.max_lat) / 2, (self.min_lon + self.max_lon) / 2
+
+    def cells(self, precision):
+        """Geohashes of every cell of this precision overlapping the box"""
+        lat_step, lon_step = cell_size(precision)
+        cells = set()
+        latitude = math.floor(self.min_lat / lat_step) * lat_step
+        while latitude <= self.max_lat:
+            longitude = math.floor(self.min_lon / lon_step) * lon_step
+            while longitude <= self.max_lon:
+                # Encode the cell's centre so rounding cannot pick a neighbour
+                cells.add(encode(latitude + lat_step / 2, longitude + lon_step / 2, precision))
+                if len(cells) > MAX_CELLS:
+                    return None
+                longitude += lon_step
+            latitude += lat_step
+        return cells
+
+    def covering_cells(self):
+        """The finest set of at most MAX_CELLS geohash cells covering the box"""
+        for precision in range(GEOHASH_PRECISION, 0, -1):
+            cells = self.cells(precision)
+            if cells is not None:
+                return cells
+        return {''}
+
+    def q(self, lat_field, lon_field, hash_field):
+        """Filter for points inside the box: geohash prefixes, then exact bounds"""
+        prefixes = Q()
+        for cell in sorted(self.covering_cells()):
+            prefixes |= _prefix_q(hash_field, cell)
+        return prefixes & Q(**{
+            f'{lat_field}__gte': self.min_lat, f'{lat_field}__lte': self.max_lat,
+            f'{lon_field}__gte': self.min_lon, f'{lon_field}__lte': self.max_lon,
+        })
+
+
+def nearest(queryset, box, origin, lat_field, lon_field, hash_field, radius_km=None):
+    """
+    Points of `queryset` inside `box`, nearest to `origin` first.
+
+    Returns [(obj, distance_km)]. With `radius_km`, points in the box's
+    corners beyond the radius are dropped.
+    """
+    results = []
+    for obj in queryset.filter(box.q(lat_field, lon_field, hash_field)):
+        distance = haversine_km(origin[0], origin[1], getattr(obj, lat_field), getattr(obj, lon_field))
+        if radius_km is None or distance <= radius_km:
+            results.append((obj, distance))
+    results.sort(key=lambda result: (result[1], result[0].pk))
+    return results
@@ -0,0 +1,353 @@
+# vendors/hours.py
+"""
+Structured opening hours for the "open now" / "open at" filters.
+
+Vendor.opening_hours is free text ("9am – 8pm (Mon – Sat), Closed Sun",
+"Sun to Thu: 11am – 10.30pm\\nFri & Sat: 11am – 4am", "24 Hrs", ...).
+parse() turns it into weekly intervals measured in minutes from Monday
+00:00 (0 .. 10080), and store() keeps one OpeningInterval row per
+interval. webapp.signals calls store() whenever a vendor is saved;
+migration 0018 and `manage.py backfill_opening_hours` parse every
+existing vendor.
+
+Overnight spans (7pm - 3am) stay one interval running past midnight; only
+a Sunday night span is split at the end of the week. Rows are also cut
+into pieces of at most MAX_SPAN minutes, so "open at minute m" is one
+bounded range scan on the (start_minute, end_minute) index:
+
+    start_minute > m - MAX_SPAN AND start_minute <= m AND end_minute > m
+
+Text the parser cannot read yields no intervals: the vendor is never
+shown as open rather than shown as open at the wrong time.
+"""
+
+import re
+from datetime import time
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_time
+
+from .models import OpeningInterval
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+MAX_SPAN = MINUTES_PER_DAY  # longest stored row; longer spans are cut
+
+DAYS = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+ALL_DAYS = frozenset(range(7))
+DAY_KEYWORDS = {
+    'daily': ALL_DAYS,
+    'everyday': ALL_DAYS,
+    'every day': ALL_DAYS,
+    'weekday': frozenset(range(5)),
+    'weekend': frozenset({5, 6}),
+}
+
+_DAY = r'(mon|tue|wed|thu|fri|sat|sun)(?:day|nesday|sday|rsday|urday|s|rs|r)?s?\b\.?'
+_TIME = r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?'
+_TOKEN_RE = re.compile(
+    r'(?P<closed>\bclosed\b)'
+    r'|(?P<except>\bexcept(?:\s+on)?\b)'
+    r'|(?P<full>\b24\s*(?:hrs|hours|h)\b|\b24/7\b|\bopen 24\b)'
+    rf'|(?P<range>(?<![\d:.]){_TIME}\s*(?:-|to|till|until)\s*{_TIME}(?![\d:.]))'
+    rf'|(?P<days>\b{_DAY}(?:\s*(?:-|to|till|until)\s*{_DAY})?)'
+    r'|(?P<keyword>\b(?:daily|everyday|every day|weekdays?|weekends?)\b)'
+)
+_SEGMENT_BREAK_RE = re.compile(r'[;,]')
+_NOTE_RE = re.compile(r'\(?\blast orders?\b[^)\n]*\)?')
+_DAY_RE = re.compile(_DAY)
+
+
+def _normalize(text):
+    text = text.lower().replace('–', '-').replace('—', '-').replace('−', '-')
+    text = re.sub(r'\ba\.m\.?', 'am', text)
+    text = re.sub(r'\bp\.m\.?', 'pm', text)
+    text = re.sub(r'\b12\s*noon\b|\bnoon\b', '12pm', text)
+    text = re.sub(r'\b12\s*midnight\b|\bmidnight\b', '12am', text)
+    return _NOTE_RE.sub(' ', text)
+
+
+def _days(match_text):
+    """Weekdays (0 = Monday) named by a day or day range like 'sun to thu'"""
+    days = [DAYS.index(day) for day in _DAY_RE.findall(match_text)]
+    if len(days) == 1:
+        return {days[0]}
+    first, last = days
+    return {(first + offset) % 7 for offset in range((last - first) % 7 + 1)}
+
+
+def _minutes(hour, minute, meridiem):
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == 'pm' else 0)
+    elif hour > 24:
+        return None
+    if minute >= 60:
+        return None
+    return hour * 60 + minute
+
+
+def _flip(meridiem):
+    return 'am' if meridiem == 'pm' else 'pm'
+
+
+def _time_range(groups):
+    """(start, end) minutes from a day's midnight; end runs past 1440 overnight"""
+    start_hour, start_minute, start_meridiem, end_hour, end_minute, end_meridiem = groups
+    start_hour, end_hour = int(start_hour), int(end_hour)
+    start_minute, end_minute = int(start_minute or 0), int(end_minute or 0)
+
+    # "6-10 pm" shares the meridiem, unless that reads backwards ("11-2pm")
+    if start_meridiem is None and end_meridiem:
+        start_meridiem = end_meridiem
+        end = _minutes(end_hour, end_minute, end_meridiem)
+        start = _minutes(start_hour, start_minute, start_meridiem)
+        if start is not None and end is not None and start > end:
+            start_meridiem = _flip(end_meridiem)
+    elif end_meridiem is None and start_meridiem:
+        end_meridiem = start_meridiem
+        start = _minutes(start_hour, start_minute, start_meridiem)
+        end = _minutes(end_hour, end_minute, end_meridiem)
+        if start is not None and end is not None and end <= start:
+            end_meridiem = _flip(start_meridiem)
+
+    start = _minutes(start_hour, start_minute, start_meridiem)
+    end = _minutes(end_hour, end_minute, end_meridiem)
+    if start is None or end is None or start == MINUTES_PER_DAY:
+        return None
+    if end <= start:
+        end += MINUTES_PER_DAY  # past midnight (12am closing, overnight bars)
+    return start, end
+
+
+def _tokens(line):
+    """
+    A line as [('days', set) | ('times', [(start, end)]) | ('closed', placement)].
+
+    A 'closed' placement records what separates it from its neighbours:
+    whether a colon comes just before it ("Mon: closed") and whether a
+    ';' or ',' ends the segment before or after it. "except" is a
+    'closed' that only closes the days after it ("Daily 9am-9pm except Wed").
+    """
+    items = []
+    end = 0
+    for match in _TOKEN_RE.finditer(line):
+        gap = line[end:match.start()]
+        end = match.end()
+        if items and items[-1][0] == 'closed':
+            items[-1][1]['break_after'] = bool(_SEGMENT_BREAK_RE.search(gap))
+        kind = match.lastgroup
+        if kind in ('closed', 'except'):
+            items.append(('closed', {
+                'after_colon': ':' in gap,
+                'break_before': bool(_SEGMENT_BREAK_RE.search(gap)),
+                'break_after': True,
+                'forward_only': kind == 'except',
+            }))
+            continue
+        if kind == 'full':
+            kind, value = 'times', [(0, MINUTES_PER_DAY)]
+        elif kind == 'range':
+            span = _time_range(match.groups()[4:10])
+            if span is None:
+                continue
+            kind, value = 'times', [span]
+        elif kind == 'days':
+            value = _days(match.group())
+        else:
+            kind, value = 'days', set(DAY_KEYWORDS[match.group().rstrip('s')])
+        # Adjacent day names form one set ("Sat & Sun", "Mon - Tue, Thu - Sun")
+        if items and items[-1][0] == kind == 'times':
+            items[-1][1].extend(value)
+        elif items and items[-1][0] == kind == 'days':
+            items[-1][1].update(value)
+        else:
+            items.append((kind, value))
+    return items
+
+
+def _assign(items, context):
+    """
+    Pair time runs with day sets within one line.
+
+    Returns ([(days, spans)], closed days, days named without times).
+    """
+    closed, pairs, bare_days = set(), [], None
+    # "Closed Sun & Mon" and "except Sun" close the days after them;
+    # "Monday: Closed" and "Mon closed; Tue - Sun ..." the days before,
+    # in the same segment
+    remaining = []
+    for index, (kind, value) in enumerate(items):
+        if kind == 'closed':
+            following = index + 1 < len(items) and items[index + 1][0] == 'days'
+            preceding = not value['forward_only'] and bool(remaining) and remaining[-1][0] == 'days'
+            binds_back = preceding and not value['break_before'] and (
+                value['after_colon'] or value['break_after'] or not following
+            )
+            if binds_back:
+                closed |= remaining.pop()[1]
+            elif following:
+                closed |= items[index + 1][1]
+                items[index + 1] = ('used', None)
+            elif preceding:
+                closed |= remaining.pop()[1]
+        elif kind != 'used':
+            remaining.append((kind, value))
+
+    if not remaining:
+        return pairs, closed, bare_days
+    if remaining[0][0] == 'times':
+        # "9am - 8pm (Mon - Sat)": times apply to the days that follow them
+        for index, (kind, value) in enumerate(remaining):
+            if kind == 'times':
+                following = remaining[index + 1] if index + 1 < len(remaining) else None
+                pairs.append((following[1] if following and following[0] == 'days' else context, value))
+    else:
+        # "Mon to Thu: 10am - 9pm": times apply to the days before them
+        days = None
+        for kind, value in remaining:
+            if kind == 'days':
+                days = value
+            else:
+                pairs.append((days, value))
+        if remaining[-1][0] == 'days':
+            bare_days = remaining[-1][1]
+    return pairs, closed, bare_days
+
+
+def parse(text):
+    """
+    Weekly opening intervals for free-text opening hours.
+
+    Returns a sorted list of non-overlapping (start_minute, end_minute)
+    pairs in minutes from Monday 00:00, or [] if nothing could be read.
+    A line naming days only ("Monday to Friday", "Daily") sets the days
+    for the time ranges on the lines below it; time ranges with no days
+    at all mean every day.
+    """
+    if not text:
+        return []
+    context, closed, pairs = ALL_DAYS, set(), []
+    for line in _normalize(text).splitlines():
+        line_pairs, line_closed, bare_days = _assign(_tokens(line), context)
+        closed |= line_closed
+        pairs.extend(line_pairs)
+        if bare_days and not line_pairs:
+            context = frozenset(bare_days)
+
+    spans = []
+    for days, day_spans in pairs:
+        for day in set(days) - closed:
+            for start, end in day_spans:
+                spans.append((day * MINUTES_PER_DAY + start, day * MINUTES_PER_DAY + end))
+    return _weekly(spans)
+
+
+def _weekly(spans):
+    """Merge overlapping spans and wrap anything past Sunday midnight to Monday"""
+    wrapped = []
+    for start, end in spans:
+        if end > MINUTES_PER_WEEK:
+            wrapped.append((start, MINUTES_PER_WEEK))
+            wrapped.append((0, end - MINUTES_PER_WEEK))
+        else:
+            wrapped.append((start, end))
+    merged = []
+    for start, end in sorted(wrapped):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _rows(spans):
+    """Spans cut into rows of at most MAX_SPAN minutes"""
+    for start, end in spans:
+        while end - start > MAX_SPAN:
+            yield start, start + MAX_SPAN
+            start += MAX_SPAN
+        yield start, end
+
+
+def intervals_for(vendor, spans=None, interval_model=OpeningInterval):
+    """Unsaved OpeningInterval rows for a vendor (of a migration's historical model if given)"""
+    if spans is None:
+        spans = parse(vendor.opening_hours)
+    return [
+        interval_model(vendor_id=vendor.pk, start_minute=start, end_minute=end)
+        for start, end in _rows(spans)
+    ]
+
+
+def store(vendor):
+    """Replace a vendor's intervals with those parsed from its opening_hours"""
+    intervals = intervals_for(vendor)
+    with transaction.atomic():
+        OpeningInterval.objects.filter(vendor_id=vendor.pk).delete()
+        OpeningInterval.objects.bulk_create(intervals)
+    return intervals
+
+
+def minute_of_week(moment=None):
+    """Minutes since Monday 00:00 (site time) of an aware datetime, default now"""
+    moment = timezone.localtime(moment) if moment else timezone.localtime()
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def open_at(minute):
+    """Vendor ids open at a minute of the week, as a values() queryset"""
+    return OpeningInterval.objects.filter(
+        start_minute__gt=minute - MAX_SPAN,
+        start_minute__lte=minute,
+        end_minute__gt=minute,
+    ).values('vendor')
+
+
+def is_open_at(minute):
+    """Boolean expression: the outer vendor is open at a minute of the week"""
+    return Exists(open_at(minute).filter(vendor=OuterRef('pk')))
+
+
+def _minute_for(value, now=None):
+    moment = parse_datetime(value.upper())
+    if moment is not None:
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment)
+        return minute_of_week(moment)
+    day = minute_of_week(now) // MINUTES_PER_DAY
+    day_match = re.match(rf'{_DAY}\s+', value)
+    if day_match:
+        day = DAYS.index(day_match.group(1))
+        value = value[day_match.end():]
+    if not re.fullmatch(r'\d{1,2}:\d{2}', value):
+        return None
+    at = parse_time(value)
+    return day * MINUTES_PER_DAY + at.hour * 60 + at.minute
+
+
+def requested_minute(params, now=None):
+    """
+    Minute of the week asked for by ?open=now or ?open_at=, else None.
+
+    open_at takes "HH:MM" (today), "<day> HH:MM" ("sat 23:30") or an ISO
+    datetime; a value that cannot be read is ignored.
+    """
+    value = params.get('open_at', '').strip().lower()
+    if value:
+        try:
+            return _minute_for(value, now)
+        except ValueError:  # well-formed but out of range, e.g. "25:00"
+            return None
+    if params.get('open') in ('now', 'on'):
+        return minute_of_week(now)
+    return None
+
+
+def describe(minute):
+    """Label for a minute of the week, e.g. 'Sat 23:30'"""
+    day, minute = divmod(minute, MINUTES_PER_DAY)
+    return f"{DAYS[day].title()} {time(minute // 60, minute % 60):%H:%M}"
@@ -0,0 +1,36 @@
+# vendors/management/commands/backfill_vendor_areas.py
+from django.core.management.base import BaseCommand
+
+from vendors.areas import area_for_address
+from vendors import cards as vendor_cards
+from vendors.models import Vendor
+from webapp import listing_filters
+from webapp.checks import cache_is_shared
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Derive Vendor.area (postal district) from the address for existing vendors"
+
+    def handle(self, *args, **options):
+        changed, missing = [], 0
+        for vendor in Vendor.objects.only('id', 'address', 'area').iterator(chunk_size=BATCH_SIZE):
+            area = area_for_address(vendor.address)
+            if not area:
+                missing += 1
+            if area != vendor.area:
+                vendor.area = area
+                changed.append(vendor)
+        # bulk_update skips Vendor.save(), so no signals fire for the backfill
+        Vendor.objects.bulk_update(changed, ['area'], batch_size=BATCH_SIZE)
+        listing_filters.invalidate()
+        vendor_cards.refresh(vendor.pk for vendor in changed)
+        self.stdout.write(f"Updated {len(changed)} vendor(s); {missing} without a postal code")
+        if not cache_is_shared():
+            # The sidebar generation was bumped in this process's cache only
+            self.stdout.write(self.style.WARNING(
+                "The default cache is process-local: web workers keep their listing "
+                "sidebars until LISTING_FILTERS_CACHE_TIMEOUT. Restart them to pick up the new areas."
+            ))
+        self.stdout.write(self.style.SUCCESS("Vendor areas backfilled."))
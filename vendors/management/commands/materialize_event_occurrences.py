@@ -0,0 +1,19 @@
+# vendors/management/commands/materialize_event_occurrences.py
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from vendors import occurrences as event_occurrences
+
+
+class Command(BaseCommand):
+    help = (
+        "Expand every active event (and its recurrence pattern) into dated occurrences "
+        "up to EVENT_OCCURRENCE_HORIZON_DAYS ahead; run daily to roll the horizon forward"
+    )
+
+    def handle(self, *args, **options):
+        count = event_occurrences.rebuild()
+        self.stdout.write(
+            f"Stored {count} occurrence(s) up to {settings.EVENT_OCCURRENCE_HORIZON_DAYS} day(s) ahead"
+        )
+        self.stdout.write(self.style.SUCCESS("Event occurrences materialized."))
@@ -0,0 +1,12 @@
+# vendors/management/commands/rebuild_vendor_cards.py
+from django.core.management.base import BaseCommand
+
+from vendors import cards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the VendorCard read model for every active vendor"
+
+    def handle(self, *args, **options):
+        count = cards.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} vendor card(s)."))
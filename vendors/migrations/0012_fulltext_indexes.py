@@ -0,0 +1,44 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:00
+
+from django.db import migrations
+
+# FULLTEXT indexes used by webapp.search.backends.MySQLFulltextBackend.
+# MATCH() needs an index on exactly the columns it names, so the name-only
+# and the combined column sets each get their own index.
+FULLTEXT_INDEXES = [
+    ('vendors_ft_name', 'vendors', ['business_name']),
+    ('vendors_ft_name_desc', 'vendors', ['business_name', 'description']),
+    ('vendors_ft_all', 'vendors', ['business_name', 'description', 'address']),
+    ('vendor_events_ft_name', 'vendor_events', ['event_name']),
+    ('vendor_events_ft_all', 'vendor_events', ['event_name', 'event_description', 'event_address']),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {quote(name)} ON {quote(table)} "
+            f"({', '.join(quote(column) for column in columns)})"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX {quote(name)} ON {quote(table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0011_alter_event_event_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0012_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='area',
+            field=models.CharField(blank=True, choices=[('01', 'Raffles Place, Marina, Cecil'), ('02', 'Tanjong Pagar, Chinatown'), ('03', 'Tiong Bahru, Queenstown'), ('04', 'Telok Blangah, HarbourFront'), ('05', 'Pasir Panjang, Clementi'), ('06', 'City Hall, High Street'), ('07', 'Bugis, Beach Road'), ('08', 'Little India, Farrer Park'), ('09', 'Orchard, River Valley'), ('10', 'Bukit Timah, Holland, Tanglin'), ('11', 'Newton, Novena, Thomson'), ('12', 'Balestier, Toa Payoh'), ('13', 'MacPherson, Potong Pasir'), ('14', 'Geylang, Eunos, Paya Lebar'), ('15', 'Katong, Joo Chiat, Marine Parade'), ('16', 'Bedok, Upper East Coast'), ('17', 'Changi, Loyang'), ('18', 'Tampines, Pasir Ris'), ('19', 'Serangoon, Hougang, Punggol'), ('20', 'Bishan, Ang Mo Kio'), ('21', 'Upper Bukit Timah, Clementi Park'), ('22', 'Jurong, Boon Lay'), ('23', 'Bukit Batok, Bukit Panjang, Choa Chu Kang'), ('24', 'Lim Chu Kang, Tengah'), ('25', 'Kranji, Woodlands'), ('26', 'Upper Thomson, Springleaf'), ('27', 'Yishun, Sembawang'), ('28', 'Seletar, Yio Chu Kang')], db_index=True, editable=False, help_text="Postal district from the address's postal code (set on save)", max_length=2),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:33
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0013_vendor_area'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_active', 'event_start_date', 'event_start_time', 'id'], name='vendor_even_is_acti_a35342_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(models.F('vendor_type'), django.db.models.functions.text.Lower('business_name'), models.F('id'), name='vendors_type_name_idx'),
+        ),
+    ]
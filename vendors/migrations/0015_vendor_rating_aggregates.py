@@ -0,0 +1,74 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    VendorRating = apps.get_model('webapp', 'VendorRating')
+    ratings = VendorRating.objects.filter(vendor=OuterRef('pk')).order_by().values('vendor')
+
+    def aggregate(queryset, function):
+        return Coalesce(Subquery(queryset.annotate(value=function).values('value')[:1]), Value(0))
+
+    updates = {
+        'rating_count': aggregate(ratings, Count('pk')),
+        'rating_sum': aggregate(ratings, Sum('rating')),
+    }
+    for score in range(0, 6):
+        updates[f'rating_{score}'] = aggregate(ratings.filter(rating=score), Count('pk'))
+    Vendor.objects.update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0014_listing_keyset_indexes'),
+        ('webapp', '0006_remove_vendorrating_review_text_delete_vendorreview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_0',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='rating_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+from django.utils.text import Truncator
+
+
+def backfill_vendor_cards(apps, schema_editor):
+    # Mirrors vendors.cards.build() on the historical models
+    Vendor = apps.get_model('vendors', 'Vendor')
+    VendorCard = apps.get_model('vendors', 'VendorCard')
+    cards = []
+    for vendor in Vendor.objects.filter(is_active=True).prefetch_related('cuisine_types'):
+        cards.append(VendorCard(
+            vendor=vendor,
+            vendor_type=vendor.vendor_type,
+            business_name=vendor.business_name,
+            sort_name=vendor.business_name.lower(),
+            cuisines=', '.join(cuisine.name for cuisine in vendor.cuisine_types.all())[:500],
+            excerpt=vendor.description[:100],
+            summary=Truncator(vendor.description).words(30),
+            address=vendor.address or '',
+            area=vendor.area,
+            opening_hours=vendor.opening_hours,
+            phone=vendor.phone,
+            email=vendor.email,
+            website=vendor.website,
+            image_url=vendor.business_pix.url if vendor.business_pix else '',
+            is_featured=vendor.is_featured,
+            is_verified=vendor.is_verified,
+            halal=vendor.halal,
+            kosher=vendor.kosher,
+            vegetarian=vendor.vegetarian,
+            catering_service=vendor.catering_service,
+            accept_tour_partnership=vendor.accept_tour_partnership,
+            rating_count=vendor.rating_count,
+            average_rating=round(vendor.rating_sum / vendor.rating_count, 1) if vendor.rating_count else 0,
+        ))
+    VendorCard.objects.bulk_create(cards, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0015_vendor_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorCard',
+            fields=[
+                ('vendor', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='vendors.vendor')),
+                ('vendor_type', models.CharField(choices=[('restaurant', 'Restaurant'), ('stall', 'Food Stall'), ('event', 'Pop-up & Event')], max_length=20)),
+                ('business_name', models.CharField(max_length=200)),
+                ('sort_name', models.CharField(help_text='Lowercased business name (listing order)', max_length=200)),
+                ('cuisines', models.CharField(blank=True, help_text='Cuisine names, comma separated', max_length=500)),
+                ('excerpt', models.CharField(blank=True, help_text='First characters of the description', max_length=100)),
+                ('summary', models.TextField(blank=True, help_text='Description cut to 30 words')),
+                ('address', models.TextField(blank=True)),
+                ('area', models.CharField(blank=True, choices=[('01', 'Raffles Place, Marina, Cecil'), ('02', 'Tanjong Pagar, Chinatown'), ('03', 'Tiong Bahru, Queenstown'), ('04', 'Telok Blangah, HarbourFront'), ('05', 'Pasir Panjang, Clementi'), ('06', 'City Hall, High Street'), ('07', 'Bugis, Beach Road'), ('08', 'Little India, Farrer Park'), ('09', 'Orchard, River Valley'), ('10', 'Bukit Timah, Holland, Tanglin'), ('11', 'Newton, Novena, Thomson'), ('12', 'Balestier, Toa Payoh'), ('13', 'MacPherson, Potong Pasir'), ('14', 'Geylang, Eunos, Paya Lebar'), ('15', 'Katong, Joo Chiat, Marine Parade'), ('16', 'Bedok, Upper East Coast'), ('17', 'Changi, Loyang'), ('18', 'Tampines, Pasir Ris'), ('19', 'Serangoon, Hougang, Punggol'), ('20', 'Bishan, Ang Mo Kio'), ('21', 'Upper Bukit Timah, Clementi Park'), ('22', 'Jurong, Boon Lay'), ('23', 'Bukit Batok, Bukit Panjang, Choa Chu Kang'), ('24', 'Lim Chu Kang, Tengah'), ('25', 'Kranji, Woodlands'), ('26', 'Upper Thomson, Springleaf'), ('27', 'Yishun, Sembawang'), ('28', 'Seletar, Yio Chu Kang')], max_length=2)),
+                ('opening_hours', models.TextField(blank=True)),
+                ('phone', models.CharField(blank=True, max_length=20)),
+                ('email', models.EmailField(blank=True, max_length=254)),
+                ('website', models.URLField(blank=True)),
+                ('image_url', models.CharField(blank=True, max_length=500)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('is_verified', models.BooleanField(default=False)),
+                ('halal', models.BooleanField(default=False)),
+                ('kosher', models.BooleanField(default=False)),
+                ('vegetarian', models.BooleanField(default=False)),
+                ('catering_service', models.BooleanField(default=False)),
+                ('accept_tour_partnership', models.BooleanField(default=False)),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('average_rating', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'vendor_cards',
+            },
+        ),
+        migrations.RemoveIndex(
+            model_name='vendor',
+            name='vendors_type_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='vendorcard',
+            index=models.Index(fields=['vendor_type', 'sort_name', 'vendor'], name='vendor_cards_type_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendorcard',
+            index=models.Index(fields=['vendor_type', 'area'], name='vendor_cards_type_area_idx'),
+        ),
+        migrations.RunPython(backfill_vendor_cards, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:45
+
+from django.db import migrations, models
+
+from vendors.geo import encode
+
+
+def backfill_geohashes(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    Event = apps.get_model('vendors', 'Event')
+    vendors = list(Vendor.objects.filter(latitude__isnull=False, longitude__isnull=False))
+    for vendor in vendors:
+        vendor.geohash = encode(vendor.latitude, vendor.longitude)
+    Vendor.objects.bulk_update(vendors, ['geohash'], batch_size=500)
+    events = list(Event.objects.filter(event_latitude__isnull=False, event_longitude__isnull=False))
+    for event in events:
+        event.geohash = encode(event.event_latitude, event.event_longitude)
+    Event.objects.bulk_update(events, ['geohash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0016_vendor_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of the event coordinates for nearby search (set on save)', max_length=12),
+        ),
+        migrations.AddField(
+            model_name='vendor',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash of latitude/longitude for nearby search (set on save)', max_length=12),
+        ),
+        migrations.RunPython(backfill_geohashes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from vendors.hours import intervals_for
+
+
+def backfill_opening_intervals(apps, schema_editor):
+    Vendor = apps.get_model('vendors', 'Vendor')
+    OpeningInterval = apps.get_model('vendors', 'OpeningInterval')
+    intervals = []
+    for vendor in Vendor.objects.only('id', 'opening_hours').iterator(chunk_size=500):
+        intervals.extend(intervals_for(vendor, interval_model=OpeningInterval))
+    OpeningInterval.objects.bulk_create(intervals, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0017_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpeningInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_minute', models.PositiveIntegerField()),
+                ('end_minute', models.PositiveIntegerField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_intervals', to='vendors.vendor')),
+            ],
+            options={
+                'db_table': 'vendor_opening_intervals',
+                'ordering': ['vendor', 'start_minute'],
+                'indexes': [models.Index(fields=['start_minute', 'end_minute', 'vendor'], name='opening_interval_range_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_opening_intervals, migrations.RunPython.noop),
+    ]
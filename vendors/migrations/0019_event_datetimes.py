@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:54
+
+from django.db import migrations, models
+
+from vendors.event_times import end_datetime, start_datetime
+
+
+def backfill_event_datetimes(apps, schema_editor):
+    Event = apps.get_model('vendors', 'Event')
+    events = list(Event.objects.all())
+    for event in events:
+        event.starts_at = start_datetime(event.event_start_date, event.event_start_time)
+        event.ends_at = end_datetime(event.event_end_date, event.event_end_time)
+    Event.objects.bulk_update(events, ['starts_at', 'ends_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0018_opening_intervals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='ends_at',
+            field=models.DateTimeField(editable=False, help_text='End date and time combined (set on save)', null=True),
+        ),
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(editable=False, help_text='Start date and time combined (set on save)', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_active', 'starts_at'], name='vendor_events_starts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['is_active', 'ends_at'], name='vendor_events_ends_idx'),
+        ),
+        migrations.RunPython(backfill_event_datetimes, migrations.RunPython.noop),
+    ]
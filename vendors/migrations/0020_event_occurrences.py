@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from vendors import occurrences
+
+
+def materialize_occurrences(apps, schema_editor):
+    occurrences.rebuild(
+        event_model=apps.get_model('vendors', 'Event'),
+        occurrence_model=apps.get_model('vendors', 'EventOccurrence'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vendors', '0019_event_datetimes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('starts_at', models.DateTimeField()),
+                ('ends_at', models.DateTimeField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='occurrences', to='vendors.event')),
+            ],
+            options={
+                'db_table': 'vendor_event_occurrences',
+                'ordering': ['starts_at'],
+                'indexes': [models.Index(fields=['starts_at', 'event'], name='event_occurrence_starts_idx'), models.Index(fields=['ends_at', 'starts_at'], name='event_occurrence_ends_idx')],
+            },
+        ),
+        migrations.RunPython(materialize_occurrences, migrations.RunPython.noop),
+    ]
@@ -3,10 +3,15 @@
 Models for vendor dashboard app - vendor-specific data
 """
 
+from datetime import timedelta
+
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 
+from . import event_times, geo
+from .areas import POSTAL_DISTRICTS, area_for_address
+
 
 class Vendor(models.Model):
     VENDOR_TYPES = [
@@ -56,6 +61,31 @@ class Vendor(models.Model):
         blank=True, 
         help_text="Fixed location longitude (for restaurants & food stalls only)"
     )
+    area = models.CharField(
+        max_length=2,
+        blank=True,
+        db_index=True,
+        editable=False,
+        choices=POSTAL_DISTRICTS,
+        help_text="Postal district from the address's postal code (set on save)"
+    )
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Geohash of latitude/longitude for nearby search (set on save)"
+    )
+    
+    # ===== RATING AGGREGATES (MAINTAINED BY webapp.ratings) =====
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_0 = models.PositiveIntegerField(default=0, editable=False)
+    rating_1 = models.PositiveIntegerField(default=0, editable=False)
+    rating_2 = models.PositiveIntegerField(default=0, editable=False)
+    rating_3 = models.PositiveIntegerField(default=0, editable=False)
+    rating_4 = models.PositiveIntegerField(default=0, editable=False)
+    rating_5 = models.PositiveIntegerField(default=0, editable=False)
     
     # ===== OPENING HOURS (RESTAURANTS & FOOD STALLS ONLY) =====
     opening_hours = models.TextField(
@@ -138,6 +168,18 @@ class Vendor(models.Model):
     def __str__(self):
         return self.business_name
     
+    def save(self, *args, **kwargs):
+        # Keep the indexed postal district and geohash in step with the location
+        self.area = area_for_address(self.address)
+        self.geohash = geo.encode(self.latitude, self.longitude)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'area'} if 'address' in update_fields else set()
+            if {'latitude', 'longitude'} & set(update_fields):
+                derived.add('geohash')
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+    
     def get_cuisine_types_display(self):
         """Safe display method that handles empty cuisine types"""
         cuisines = self.cuisine_types.all()
@@ -221,18 +263,16 @@ class Vendor(models.Model):
     
     @property
     def average_rating(self):
-        from django.db.models import Avg
-        avg_rating = self.ratings.aggregate(Avg('rating'))['rating__avg']
-        return round(avg_rating, 1) if avg_rating else 0
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else 0
     
     @property
     def total_reviews(self):
-        return self.ratings.count()
+        return self.rating_count
     
     @property
     def rating_distribution(self):
-        from django.db.models import Count
-        return self.ratings.values('rating').annotate(count=Count('rating')).order_by('rating')
+        counts = [self.rating_0, self.rating_1, self.rating_2, self.rating_3, self.rating_4, self.rating_5]
+        return [{'rating': rating, 'count': count} for rating, count in enumerate(counts) if count]
     
     @property
     def service_badges(self):
@@ -274,6 +314,122 @@ class Vendor(models.Model):
         db_table = 'vendors'
 
 
+class VendorCard(models.Model):
+    """
+    Flat listing card for one active vendor (read model).
+    
+    Rebuilt by vendors.cards whenever the vendor, its cuisines or its
+    ratings change; never edit rows directly.
+    """
+    vendor = models.OneToOneField(Vendor, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    vendor_type = models.CharField(max_length=20, choices=Vendor.VENDOR_TYPES)
+    business_name = models.CharField(max_length=200)
+    sort_name = models.CharField(max_length=200, help_text="Lowercased business name (listing order)")
+    cuisines = models.CharField(max_length=500, blank=True, help_text="Cuisine names, comma separated")
+    excerpt = models.CharField(max_length=100, blank=True, help_text="First characters of the description")
+    summary = models.TextField(blank=True, help_text="Description cut to 30 words")
+    address = models.TextField(blank=True)
+    area = models.CharField(max_length=2, blank=True, choices=POSTAL_DISTRICTS)
+    opening_hours = models.TextField(blank=True)
+    phone = models.CharField(max_length=20, blank=True)
+    email = models.EmailField(blank=True)
+    website = models.URLField(blank=True)
+    image_url = models.CharField(max_length=500, blank=True)
+    
+    # Badges and filters
+    is_featured = models.BooleanField(default=False)
+    is_verified = models.BooleanField(default=False)
+    halal = models.BooleanField(default=False)
+    kosher = models.BooleanField(default=False)
+    vegetarian = models.BooleanField(default=False)
+    catering_service = models.BooleanField(default=False)
+    accept_tour_partnership = models.BooleanField(default=False)
+    
+    rating_count = models.PositiveIntegerField(default=0)
+    average_rating = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return self.business_name
+    
+    @property
+    def id(self):
+        # Same name as on Vendor, so templates and URLs can take either
+        return self.vendor_id
+    
+    class Meta:
+        db_table = 'vendor_cards'
+        indexes = [
+            # Keyset pagination of the restaurant / food stall listings
+            models.Index(fields=['vendor_type', 'sort_name', 'vendor'], name='vendor_cards_type_name_idx'),
+            models.Index(fields=['vendor_type', 'area'], name='vendor_cards_type_area_idx'),
+        ]
+
+
+class OpeningInterval(models.Model):
+    """
+    One weekly opening interval of a vendor, in minutes from Monday 00:00.
+
+    Parsed from Vendor.opening_hours by vendors.hours on every save; never
+    edit rows directly. end_minute may pass midnight (overnight hours).
+    """
+    vendor = models.ForeignKey(Vendor, on_delete=models.CASCADE, related_name='opening_intervals')
+    start_minute = models.PositiveIntegerField()
+    end_minute = models.PositiveIntegerField()
+
+    def __str__(self):
+        return f"{self.vendor_id}: {self.start_minute}-{self.end_minute}"
+
+    class Meta:
+        db_table = 'vendor_opening_intervals'
+        ordering = ['vendor', 'start_minute']
+        indexes = [
+            # "Open at" filter: range on start_minute, covering end_minute and vendor
+            models.Index(fields=['start_minute', 'end_minute', 'vendor'], name='opening_interval_range_idx'),
+        ]
+
+
+class TimeSpanQuerySet(models.QuerySet):
+    """Date filters on stored (indexed) starts_at / ends_at columns"""
+    
+    def current(self, now=None):
+        """Events running right now"""
+        now = now or timezone.now()
+        return self.filter(starts_at__lte=now, ends_at__gte=now)
+    
+    def upcoming(self, now=None):
+        """Events that have not started yet"""
+        return self.filter(starts_at__gt=now or timezone.now())
+    
+    def not_ended(self, now=None):
+        """Current and upcoming events"""
+        return self.filter(ends_at__gte=now or timezone.now())
+    
+    def past(self, days=None, now=None):
+        """Events that have ended, only those ending in the last `days` days if given"""
+        now = now or timezone.now()
+        queryset = self.filter(ends_at__lt=now)
+        if days is not None:
+            queryset = queryset.filter(ends_at__gte=now - timedelta(days=days))
+        return queryset
+    
+    def overlapping(self, start, end):
+        """Events running at any time between `start` and `end`"""
+        return self.filter(starts_at__lt=end, ends_at__gte=start)
+
+
+class EventQuerySet(TimeSpanQuerySet):
+    """
+    Event filters. The inherited ones look at the event's own date range;
+    occurring() goes through the materialized occurrences, which also
+    cover the later runs of recurring events.
+    """
+    
+    def occurring(self, occurrences):
+        """Events with any of `occurrences`, e.g. EventOccurrence.objects.current()"""
+        return self.filter(id__in=occurrences.values('event'))
+
+
 class Event(models.Model):
     """Model for individual events hosted by ALL vendor types"""
     
@@ -341,6 +497,16 @@ class Event(models.Model):
         blank=True,
         help_text="End time for this event (optional)"
     )
+    starts_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text="Start date and time combined (set on save)"
+    )
+    ends_at = models.DateTimeField(
+        null=True,
+        editable=False,
+        help_text="End date and time combined (set on save)"
+    )
     
     # ===== EVENT LOCATION (ALL VENDOR TYPES) =====
     event_address = models.TextField(
@@ -358,6 +524,13 @@ class Event(models.Model):
         null=True, 
         blank=True
     )
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        db_index=True,
+        editable=False,
+        help_text="Geohash of the event coordinates for nearby search (set on save)"
+    )
     
     # ===== RECURRENCE INFO (ALL VENDOR TYPES) =====
     is_recurring = models.BooleanField(
@@ -380,40 +553,55 @@ class Event(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = EventQuerySet.as_manager()
+    
+    # Sources of starts_at / ends_at
+    TIMING_FIELDS = ('event_start_date', 'event_start_time', 'event_end_date', 'event_end_time')
+    
     def __str__(self):
         return f"{self.event_name} - {self.vendor.business_name}"
     
+    def save(self, *args, **kwargs):
+        # Keep the indexed geohash and start/end datetimes in step with their sources
+        self.geohash = geo.encode(self.event_latitude, self.event_longitude)
+        for name in self.TIMING_FIELDS:
+            # Dates and times may still be ISO strings (Event.objects.create(...))
+            setattr(self, name, self._meta.get_field(name).to_python(getattr(self, name)))
+        self.starts_at = self.event_start_datetime
+        self.ends_at = self.event_end_datetime
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {'geohash'} if {'event_latitude', 'event_longitude'} & set(update_fields) else set()
+            if set(self.TIMING_FIELDS) & set(update_fields):
+                derived.update({'starts_at', 'ends_at'})
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+    
     @property
     def event_start_datetime(self):
         """Combine date and time for start"""
-        if self.event_start_time:
-            return timezone.make_aware(timezone.datetime.combine(self.event_start_date, self.event_start_time))
-        return timezone.make_aware(timezone.datetime.combine(self.event_start_date, timezone.datetime.min.time()))
+        return event_times.start_datetime(self.event_start_date, self.event_start_time)
     
     @property
     def event_end_datetime(self):
         """Combine date and time for end"""
-        if self.event_end_time:
-            return timezone.make_aware(timezone.datetime.combine(self.event_end_date, self.event_end_time))
-        return timezone.make_aware(timezone.datetime.combine(self.event_end_date, timezone.datetime.max.time()))
+        return event_times.end_datetime(self.event_end_date, self.event_end_time)
     
     @property
     def is_current(self):
-        """Check if event is currently ongoing"""
+        """Check if event is currently ongoing (EventQuerySet.current() in SQL)"""
         now = timezone.now()
-        return bool(self.event_start_datetime <= now <= self.event_end_datetime)
+        return bool(self.starts_at and self.starts_at <= now <= self.ends_at)
     
     @property
     def is_upcoming(self):
-        """Check if event is in the future"""
-        now = timezone.now()
-        return bool(self.event_start_datetime > now)
+        """Check if event is in the future (EventQuerySet.upcoming() in SQL)"""
+        return bool(self.starts_at and self.starts_at > timezone.now())
     
     @property
     def is_past(self):
-        """Check if event has ended"""
-        now = timezone.now()
-        return bool(self.event_end_datetime < now)
+        """Check if event has ended (EventQuerySet.past() in SQL)"""
+        return bool(self.ends_at and self.ends_at < timezone.now())
     
     @property
     def display_time(self):
@@ -441,6 +629,37 @@ class Event(models.Model):
         indexes = [
             models.Index(fields=['event_start_date', 'event_end_date']),
             models.Index(fields=['vendor', 'event_start_date']),
+            # Keyset pagination of the culinary events listing
+            models.Index(fields=['is_active', 'event_start_date', 'event_start_time', 'id']),
+            # EventQuerySet date filters
+            models.Index(fields=['is_active', 'starts_at'], name='vendor_events_starts_idx'),
+            models.Index(fields=['is_active', 'ends_at'], name='vendor_events_ends_idx'),
+        ]
+
+
+class EventOccurrence(models.Model):
+    """
+    One dated run of an active event (read model).
+    
+    Materialized by vendors.occurrences from the event's dates and
+    recurrence_pattern over a rolling horizon; never edit rows directly.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='occurrences')
+    starts_at = models.DateTimeField()
+    ends_at = models.DateTimeField()
+    
+    objects = TimeSpanQuerySet.as_manager()
+    
+    def __str__(self):
+        return f"{self.event_id}: {self.starts_at:%Y-%m-%d %H:%M}"
+    
+    class Meta:
+        db_table = 'vendor_event_occurrences'
+        ordering = ['starts_at']
+        indexes = [
+            # Calendar, "this weekend" and upcoming windows
+            models.Index(fields=['starts_at', 'event'], name='event_occurrence_starts_idx'),
+            models.Index(fields=['ends_at', 'starts_at'], name='event_occurrence_ends_idx'),
         ]
 
 
@@ -0,0 +1,168 @@
+# vendors/occurrences.py
+"""
+Recurring events expanded into dated occurrences.
+
+An event's own date range (starts_at .. ends_at) is its first run. With
+is_recurring set, recurrence_pattern repeats that run, keeping its
+length:
+
+  daily                      every day
+  weekly                     every week on the first run's weekday
+  weekly_saturday_sunday     every week on the named days
+  biweekly / fortnightly     every other week
+  monthly                    the first run's day of the month
+  monthly_first_saturday     nth (first .. fourth, last) weekday of a month
+
+"Every Saturday" is read as weekly_saturday. An unknown pattern leaves
+only the first run.
+
+Every active event gets EventOccurrence rows from HISTORY_DAYS ago up to
+EVENT_OCCURRENCE_HORIZON_DAYS ahead, so calendars, listings and "this
+weekend" are index range scans over occurrences instead of evaluating
+rules per request. webapp.signals refreshes an event's rows when it is
+saved, and migration 0020 fills the table on deploy. `manage.py
+materialize_event_occurrences` rebuilds every row and must run daily
+(e.g. from cron, see the README) to roll the horizon forward.
+"""
+
+import calendar
+import re
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import event_times
+from .models import Event, EventOccurrence
+
+HISTORY_DAYS = 30  # past occurrences kept, covering the "past 30 days" listing
+BATCH_SIZE = 1000
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+ORDINALS = {'first': 1, 'second': 2, 'third': 3, 'fourth': 4, 'last': -1}
+
+
+class Rule:
+    """A parsed recurrence_pattern"""
+
+    def __init__(self, frequency, weekdays=None, interval=1, nth=None):
+        self.frequency = frequency  # 'daily', 'weekly' or 'monthly'
+        self.weekdays = weekdays    # weekly: days of the week; monthly: [weekday] with nth
+        self.interval = interval    # weeks between runs (weekly)
+        self.nth = nth              # monthly: 1 .. 4, or -1 for the last
+
+    def matches(self, day, first_day):
+        """Whether a run starts on `day`, for a first run on `first_day`"""
+        if self.frequency == 'daily':
+            return True
+        if self.frequency == 'weekly':
+            weekdays = self.weekdays or [first_day.weekday()]
+            # Calendar weeks (Monday to Sunday) since the first run's week
+            week_start = day - timedelta(days=day.weekday())
+            first_week_start = first_day - timedelta(days=first_day.weekday())
+            weeks = (week_start - first_week_start).days // 7
+            return day.weekday() in weekdays and weeks % self.interval == 0
+        if self.nth is None:
+            # Same day of the month, or the month's last day when it is shorter
+            last = calendar.monthrange(day.year, day.month)[1]
+            return day.day == min(first_day.day, last)
+        if day.weekday() != self.weekdays[0]:
+            return False
+        if self.nth == -1:
+            return day.month != (day + timedelta(days=7)).month
+        return (day.day - 1) // 7 + 1 == self.nth
+
+
+def _weekday(name):
+    """0 (Monday) .. 6 for a day name or abbreviation ('sat', 'thurs'), else None"""
+    if len(name) >= 3:
+        for index, weekday in enumerate(WEEKDAYS):
+            if weekday.startswith(name[:3]):
+                return index
+    return None
+
+
+def parse_pattern(pattern):
+    """Rule for a recurrence_pattern, or None if it is not understood"""
+    words = [word for word in re.split(r'[\s_,&-]+', (pattern or '').strip().lower()) if word and word != 'and']
+    if not words:
+        return None
+    if words[0] == 'every' and len(words) > 1:
+        words = ['weekly', *words[1:]]
+    frequency, rest = words[0], words[1:]
+    if frequency == 'daily' and not rest:
+        return Rule('daily')
+    if frequency in ('biweekly', 'fortnightly') and not rest:
+        return Rule('weekly', interval=2)
+    if frequency == 'weekly':
+        weekdays = [_weekday(word.rstrip('s')) for word in rest]
+        if None in weekdays:
+            return None
+        return Rule('weekly', weekdays=sorted(set(weekdays)) or None)
+    if frequency == 'monthly':
+        if not rest:
+            return Rule('monthly')
+        if len(rest) == 2 and rest[0] in ORDINALS and _weekday(rest[1]) is not None:
+            return Rule('monthly', weekdays=[_weekday(rest[1])], nth=ORDINALS[rest[0]])
+    return None
+
+
+def expand(event, window_start, window_end):
+    """(starts_at, ends_at) of the event's runs overlapping the window"""
+    # The Event.event_*_datetime properties, which historical models lack
+    starts_at = event_times.start_datetime(event.event_start_date, event.event_start_time)
+    ends_at = event_times.end_datetime(event.event_end_date, event.event_end_time)
+    duration = max(ends_at - starts_at, timedelta(0))
+    rule = parse_pattern(event.recurrence_pattern) if event.is_recurring else None
+    runs = [(starts_at, ends_at)]
+    if rule is not None:
+        first_day = event.event_start_date
+        # Runs starting before this cannot reach the window
+        day = max(first_day + timedelta(days=1), timezone.localtime(window_start - duration).date())
+        last_day = timezone.localtime(window_end).date()
+        start_time = event.event_start_time or time.min
+        while day <= last_day:
+            if rule.matches(day, first_day):
+                run_start = timezone.make_aware(datetime.combine(day, start_time))
+                runs.append((run_start, run_start + duration))
+            day += timedelta(days=1)
+    return [(start, end) for start, end in runs if end >= window_start and start < window_end]
+
+
+def window(now=None):
+    """(start, end) of the materialized range around `now`"""
+    now = now or timezone.now()
+    return now - timedelta(days=HISTORY_DAYS), now + timedelta(days=settings.EVENT_OCCURRENCE_HORIZON_DAYS)
+
+
+def _occurrences(events, now=None, occurrence_model=EventOccurrence):
+    window_start, window_end = window(now)
+    for event in events:
+        for start, end in expand(event, window_start, window_end):
+            yield occurrence_model(event_id=event.pk, starts_at=start, ends_at=end)
+
+
+def refresh(event_ids, now=None):
+    """Re-materialize these events' occurrences (none for inactive events)"""
+    event_ids = list(event_ids)
+    if not event_ids:
+        return
+    events = Event.objects.filter(pk__in=event_ids, is_active=True)
+    with transaction.atomic():
+        EventOccurrence.objects.filter(event_id__in=event_ids).delete()
+        EventOccurrence.objects.bulk_create(_occurrences(events, now), batch_size=BATCH_SIZE)
+
+
+def rebuild(now=None, event_model=Event, occurrence_model=EventOccurrence):
+    """
+    Re-materialize every active event's occurrences; returns the row count.
+
+    A data migration passes its historical Event and EventOccurrence models.
+    """
+    events = event_model.objects.filter(is_active=True).iterator(chunk_size=BATCH_SIZE)
+    occurrences = list(_occurrences(events, now, occurrence_model))
+    with transaction.atomic():
+        occurrence_model.objects.all().delete()
+        occurrence_model.objects.bulk_create(occurrences, batch_size=BATCH_SIZE)
+    return len(occurrences)
@@ -7,7 +7,7 @@ from django.contrib.sessions.middleware import SessionMiddleware
 from django.utils import timezone
 import datetime
 
-from vendors.models import Vendor, MenuItem, Event, CuisineType
+from vendors.models import Vendor, VendorCard, OpeningInterval, MenuItem, Event, EventOccurrence, CuisineType
 from vendors.views import vendor_required, vendor_dashboard, vendor_login
 from tours.models import TourOperator
 
@@ -348,4 +348,334 @@ class VendorIntegrationTests(TestCase):
         # Test booking instructions
         self.assertIsNotNone(self.vendor.booking_instructions)
         
-        print("IT003V PASSED: Vendor event and booking workflow verified")
\ No newline at end of file
+        print("IT003V PASSED: Vendor event and booking workflow verified")
+
+class VendorAreaTests(TestCase):
+    """Postal district derived from the vendor address"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='stall@example.com',
+            email='stall@example.com',
+            password='stallpass123',
+            user_type='vendor'
+        )
+        self.stall = Vendor.objects.create(
+            user=self.user,
+            business_name='Maxwell Chicken Rice',
+            vendor_type='stall',
+            address='1 Kadayanallur Street, #01-10 Singapore 069184'
+        )
+
+    def test_area_follows_address(self):
+        self.assertEqual(self.stall.area, '01')
+        self.stall.address = '333 Orchard Road, #05-03 Singapore 238867'
+        self.stall.save(update_fields=['address'])
+        self.stall.refresh_from_db()
+        self.assertEqual(self.stall.area, '09')
+        self.assertEqual(self.stall.get_area_display(), 'Orchard, River Valley')
+
+        self.stall.address = '123 Test Street'
+        self.stall.save()
+        self.assertEqual(self.stall.area, '')
+
+    def test_food_stalls_filter_and_backfill(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        Vendor.objects.filter(pk=self.stall.pk).update(area='')
+        call_command('backfill_vendor_areas', stdout=StringIO())
+        self.stall.refresh_from_db()
+        self.assertEqual(self.stall.area, '01')
+
+        response = self.client.get(reverse('webapp:food_stalls'), {'location': '01'})
+        self.assertEqual([card.id for card in response.context['food_stalls']], [self.stall.id])
+        self.assertEqual(response.context['available_locations'], [
+            {'value': '01', 'label': 'Raffles Place, Marina, Cecil'},
+        ])
+        response = self.client.get(reverse('webapp:food_stalls'), {'location': '09'})
+        self.assertEqual(list(response.context['food_stalls']), [])
+
+
+class VendorCardTests(TestCase):
+    """Flat listing cards kept in step with vendors, cuisines and ratings"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='popiah@example.com',
+            email='popiah@example.com',
+            password='popiahpass123',
+            user_type='vendor'
+        )
+        self.stall = Vendor.objects.create(
+            user=self.user,
+            business_name='Kway Guan Huat Popiah',
+            vendor_type='stall',
+            description='Handmade popiah skins',
+            halal=True
+        )
+        self.cuisine = CuisineType.objects.create(name='Hokkien')
+
+    def test_card_follows_vendor_cuisine_and_rating_changes(self):
+        from webapp.models import VendorRating
+
+        self.stall.cuisine_types.add(self.cuisine)
+        self.cuisine.name = 'Fujian'
+        self.cuisine.save()
+        VendorRating.objects.create(vendor=self.stall, user=self.user, rating=4)
+
+        card = self.stall.card
+        card.refresh_from_db()
+        self.assertEqual((card.business_name, card.cuisines, card.summary), (
+            'Kway Guan Huat Popiah', 'Fujian', 'Handmade popiah skins'
+        ))
+        self.assertTrue(card.halal)
+        self.assertEqual((card.rating_count, card.average_rating), (1, 4.0))
+
+        self.stall.is_active = False
+        self.stall.save()
+        self.assertFalse(VendorCard.objects.filter(vendor=self.stall).exists())
+
+    def test_listing_reads_cards_in_one_query(self):
+        for i in range(3):
+            user = User.objects.create_user(
+                username=f'popiah{i}@example.com',
+                email=f'popiah{i}@example.com',
+                password='popiahpass123',
+                user_type='vendor'
+            )
+            vendor = Vendor.objects.create(user=user, business_name=f'Popiah {i}', vendor_type='stall')
+            vendor.cuisine_types.add(self.cuisine)
+        self.client.get(reverse('webapp:food_stalls'))  # warm the sidebar cache
+
+        # cards page only: it holds every row, so no total count
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('webapp:food_stalls'))
+        self.assertContains(response, '<strong>Cuisine:</strong> Hokkien', count=3)
+
+
+class OpeningHoursTests(TestCase):
+    """Free-text opening hours parsed into weekly intervals for "open now" filters"""
+
+    def setUp(self):
+        self.vendors = {}
+        for i, (name, hours) in enumerate([
+            ('Morning Kopi', '7am – 11am (Mon – Sat), Closed Sun'),
+            ('Late Night Satay', 'Tue to Sun: 6pm – 2am\r\nClosed Mon'),
+            ('All Day Prata', '24 Hrs'),
+        ]):
+            user = User.objects.create_user(
+                username=f'hours{i}@example.com',
+                email=f'hours{i}@example.com',
+                password='hourspass123',
+                user_type='vendor'
+            )
+            self.vendors[name] = Vendor.objects.create(
+                user=user, business_name=name, vendor_type='stall', opening_hours=hours
+            )
+
+    def test_parse_formats(self):
+        from vendors.hours import parse
+
+        day = 24 * 60
+        self.assertEqual(parse('9am – 8pm (Mon – Sat), Closed Sun')[:2], [(9 * 60, 20 * 60), (day + 9 * 60, day + 20 * 60)])
+        self.assertEqual(len(parse('9am – 8pm (Mon – Sat), Closed Sun')), 6)
+        # Shared meridiem and day context from the line above
+        self.assertEqual(parse('Daily\r\nLunch: 11:30 am–2:30 pm, 6–9:30 pm')[:2], [(690, 870), (1080, 1290)])
+        # Overnight Friday and Saturday; Saturday's runs into Sunday
+        self.assertIn((4 * day + 11 * 60, 5 * day + 4 * 60), parse('Sun to Thu: 11am – 10.30pm\r\nFri & Sat: 11am – 4am'))
+        self.assertEqual(parse('Daily: 12:00 - 14:30')[0], (720, 870))
+        self.assertEqual(parse('24 Hrs'), [(0, 7 * day)])
+        self.assertEqual(parse('Call ahead'), [])
+        # "closed" after "<days>:" closes those days, not the next segment's
+        tue_to_sun = [(d * day + 11 * 60, d * day + 21 * 60) for d in range(1, 7)]
+        self.assertEqual(parse('Mon: closed; Tue-Sun: 11am-9pm'), tue_to_sun)
+        self.assertEqual(parse('Mon closed, Tue-Sun 11am-9pm'), tue_to_sun)
+        self.assertEqual(
+            parse('Mon: 9am-5pm; Tue: closed; Wed-Sun: 9am-5pm'),
+            [(d * day + 9 * 60, d * day + 17 * 60) for d in (0, 2, 3, 4, 5, 6)],
+        )
+        # "except <days>" closes those days like "closed <days>"
+        except_wednesday = [(d * day + 9 * 60, d * day + 21 * 60) for d in (0, 1, 3, 4, 5, 6)]
+        self.assertEqual(parse('Daily 9am-9pm except Wednesday'), except_wednesday)
+        self.assertEqual(parse('Daily 9am-9pm, closed Wednesday'), except_wednesday)
+        self.assertEqual(parse('Mon-Sun except Wed: 9am-9pm'), except_wednesday)
+        self.assertEqual(len(parse('Daily 9am-9pm except public holidays')), 7)
+
+    def test_intervals_follow_opening_hours(self):
+        kopi = self.vendors['Morning Kopi']
+        self.assertEqual(kopi.opening_intervals.count(), 6)
+        kopi.opening_hours = ''
+        kopi.save(update_fields=['opening_hours'])
+        self.assertFalse(kopi.opening_intervals.exists())
+
+        # 24 hours a week is stored in rows of at most one day
+        self.assertEqual(self.vendors['All Day Prata'].opening_intervals.count(), 7)
+
+    def test_open_at_handles_overnight_and_week_wrap(self):
+        from vendors.hours import open_at
+
+        def open_names(day, hour, minute=0):
+            ids = open_at(day * 24 * 60 + hour * 60 + minute)
+            return set(Vendor.objects.filter(id__in=ids).values_list('business_name', flat=True))
+
+        self.assertEqual(open_names(0, 8), {'Morning Kopi', 'All Day Prata'})
+        # Monday 1am: Sunday night's satay, although closed on Mondays
+        self.assertEqual(open_names(0, 1), {'Late Night Satay', 'All Day Prata'})
+        self.assertEqual(open_names(0, 3), {'All Day Prata'})
+        self.assertEqual(open_names(2, 23, 30), {'Late Night Satay', 'All Day Prata'})
+        self.assertEqual(open_names(6, 9), {'All Day Prata'})
+
+    def test_food_stalls_open_at_filter_and_backfill(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        OpeningInterval.objects.all().delete()
+        call_command('backfill_opening_hours', stdout=StringIO())
+        self.assertEqual(OpeningInterval.objects.count(), 6 + 7 + 7)
+
+        response = self.client.get(reverse('webapp:food_stalls'), {'open_at': 'sat 23:30', 'format': 'json'})
+        names = [result['title'] for result in response.json()['results']]
+        self.assertEqual(names, ['All Day Prata', 'Late Night Satay'])
+
+
+class EventTimeTests(TestCase):
+    """Stored start/end datetimes and the SQL-side event date filters"""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username='events@example.com',
+            email='events@example.com',
+            password='eventspass123',
+            user_type='vendor'
+        )
+        self.vendor = Vendor.objects.create(user=user, business_name='Pasar Malam Co', vendor_type='event')
+        today = timezone.localdate()
+        self.events = {}
+        for name, start, end, start_time in [
+            ('Running Fair', -1, 1, None),
+            ('Next Week Pop-up', 8, 8, datetime.time(18, 0)),
+            ('Last Week Tasting', -8, -7, None),
+            ('Last Year Festival', -400, -399, None),
+        ]:
+            self.events[name] = Event.objects.create(
+                vendor=self.vendor,
+                event_name=name,
+                event_address='Bugis Street',
+                event_start_date=today + datetime.timedelta(days=start),
+                event_end_date=today + datetime.timedelta(days=end),
+                event_start_time=start_time,
+            )
+
+    def names(self, queryset):
+        return set(queryset.values_list('event_name', flat=True))
+
+    def test_datetimes_follow_dates_and_times(self):
+        event = self.events['Next Week Pop-up']
+        self.assertEqual(timezone.localtime(event.starts_at).time(), datetime.time(18, 0))
+        self.assertEqual(timezone.localtime(event.ends_at).time(), datetime.time.max)
+
+        event.event_start_time = datetime.time(19, 30)
+        event.save(update_fields=['event_start_time'])
+        event.refresh_from_db()
+        self.assertEqual(timezone.localtime(event.starts_at).time(), datetime.time(19, 30))
+        self.assertTrue(event.is_upcoming)
+        self.assertTrue(self.events['Running Fair'].is_current)
+
+    def test_queryset_date_filters(self):
+        events = Event.objects.all()
+        self.assertEqual(self.names(events.current()), {'Running Fair'})
+        self.assertEqual(self.names(events.upcoming()), {'Next Week Pop-up'})
+        self.assertEqual(self.names(events.not_ended()), {'Running Fair', 'Next Week Pop-up'})
+        self.assertEqual(self.names(events.past(days=30)), {'Last Week Tasting'})
+        self.assertEqual(len(events.past()), 2)
+
+    def test_culinary_events_date_windows(self):
+        def listed(**params):
+            response = self.client.get(reverse('webapp:culinary_events'), params)
+            return {event.event_name for event in response.context['events']}
+
+        self.assertEqual(listed(), {'Running Fair', 'Next Week Pop-up'})
+        self.assertEqual(listed(when='now'), {'Running Fair'})
+        self.assertEqual(listed(when='week'), {'Running Fair'})
+        self.assertEqual(listed(when='month'), {'Running Fair', 'Next Week Pop-up'})
+        self.assertEqual(listed(when='past'), {'Last Week Tasting'})
+
+
+class EventOccurrenceTests(TestCase):
+    """Recurring events expanded into materialized occurrences"""
+
+    def setUp(self):
+        user = User.objects.create_user(
+            username='pasarmalam@example.com',
+            email='pasarmalam@example.com',
+            password='pasarpass123',
+            user_type='vendor'
+        )
+        self.vendor = Vendor.objects.create(user=user, business_name='Pasar Malam Co', vendor_type='event')
+        # A Saturday night market that started four weeks ago
+        today = timezone.localdate()
+        first_saturday = today - datetime.timedelta(days=today.weekday() + 2 + 21)
+        self.market = Event.objects.create(
+            vendor=self.vendor,
+            event_name='Saturday Night Market',
+            event_address='Bugis Street',
+            event_start_date=first_saturday,
+            event_end_date=first_saturday,
+            event_start_time=datetime.time(18, 0),
+            event_end_time=datetime.time(23, 0),
+            is_recurring=True,
+            recurrence_pattern='weekly',
+        )
+
+    def test_parse_pattern_and_monthly_rules(self):
+        from vendors import occurrences
+
+        self.assertIsNone(occurrences.parse_pattern('whenever we feel like it'))
+        self.assertEqual(occurrences.parse_pattern('Every Saturday').weekdays, [5])
+        self.assertEqual(occurrences.parse_pattern('weekly_friday_saturday').weekdays, [4, 5])
+
+        rule = occurrences.parse_pattern('monthly_first_saturday')
+        first = datetime.date(2026, 1, 3)
+        matches = [day for day in (first + datetime.timedelta(days=n) for n in range(90)) if rule.matches(day, first)]
+        self.assertEqual(matches, [datetime.date(2026, 1, 3), datetime.date(2026, 2, 7), datetime.date(2026, 3, 7)])
+
+        rule = occurrences.parse_pattern('monthly_last_friday')
+        self.assertTrue(rule.matches(datetime.date(2026, 1, 30), first))
+        self.assertFalse(rule.matches(datetime.date(2026, 1, 23), first))
+
+    def test_weekly_event_is_materialized_on_save(self):
+        runs = list(self.market.occurrences.values_list('starts_at', flat=True))
+        # Last 30 days plus the horizon ahead, every Saturday at 6pm
+        self.assertGreater(len(runs), 20)
+        self.assertTrue(all(timezone.localtime(run).weekday() == 5 for run in runs))
+        self.assertTrue(all(timezone.localtime(run).time() == datetime.time(18, 0) for run in runs))
+
+        # Its first run is over, but it is still listed as upcoming
+        self.assertFalse(Event.objects.not_ended().exists())
+        self.assertTrue(Event.objects.occurring(EventOccurrence.objects.not_ended()).exists())
+
+        self.market.recurrence_pattern = 'fortnightly'
+        self.market.save()
+        self.assertLess(self.market.occurrences.count(), len(runs))
+
+        self.market.is_active = False
+        self.market.save()
+        self.assertFalse(self.market.occurrences.exists())
+
+    def test_rebuild_command_and_calendar(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        EventOccurrence.objects.all().delete()
+        call_command('materialize_event_occurrences', stdout=StringIO())
+        self.assertTrue(self.market.occurrences.exists())
+
+        today = timezone.localdate()
+        response = self.client.get(reverse('webapp:culinary_events_calendar'), {
+            'start': today.isoformat(), 'end': (today + datetime.timedelta(days=14)).isoformat(),
+        })
+        runs = response.json()['occurrences']
+        self.assertEqual(len(runs), 2)
+        self.assertEqual({run['title'] for run in runs}, {'Saturday Night Market'})
+        self.assertEqual(self.client.get(reverse('webapp:culinary_events_calendar'), {'start': 'soon'}).status_code, 400)
@@ -3,7 +3,6 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from .models import Vendor, MenuItem, Event
 from .forms import VendorForm, MenuItemForm, EventForm
@@ -84,7 +83,7 @@ def vendor_dashboard(request):
     vendor = get_object_or_404(Vendor, user=request.user)
     menu_items_count = MenuItem.objects.filter(vendor=vendor).count()
     events_count = Event.objects.filter(vendor=vendor).count()
-    upcoming_events = Event.objects.filter(vendor=vendor, event_start_date__gte=timezone.now())[:5]
+    upcoming_events = Event.objects.filter(vendor=vendor).upcoming()[:5]
     
     # Get booking links for dashboard display
     booking_links = vendor.booking_links_list
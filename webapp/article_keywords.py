@@ -0,0 +1,114 @@
+# webapp/article_keywords.py
+"""
+In-memory keyword sets for the foodie crawls and foodie stories filters.
+
+Both pages filter articles by keyword (and stories also by author and
+year). Each extra keyword used to add another join on ArticleKeyword.
+Instead every process keeps, per keyword, the set of article ids tagged
+with it, plus each article's author and year. Filtering is then set
+intersection (all of) or union (any of) in Python, and the page fetches
+the matching articles once by id, however many filters are ticked. The
+same structure supplies the sidebar options and the keyword badges, so
+those cost no queries either.
+
+The structure is built with three queries on first use. webapp.signals
+calls invalidate() on every Article, Keyword or ArticleKeyword change,
+and each process rebuilds its copy on next use (see search.versioned).
+Writes that skip signals must call invalidate() themselves.
+"""
+
+from collections import defaultdict
+
+from .models import Article, ArticleKeyword, Keyword
+from .search.versioned import VersionedStructure
+
+
+class KeywordSets:
+    """Article ids per keyword, author and year"""
+
+    def __init__(self):
+        self.keyword_names = {}                   # keyword id -> name
+        self.keyword_ids = {}                     # lowercased name -> keyword id
+        self.tagged = defaultdict(set)            # keyword id -> article ids
+        self.article_keywords = defaultdict(set)  # article id -> keyword ids
+        self.by_author = defaultdict(set)         # author name -> article ids
+        self.by_year = defaultdict(set)           # year -> article ids
+
+    def keyword_id(self, name):
+        """Id of the keyword with this name (case-insensitive), else None"""
+        return self.keyword_ids.get(name.strip().lower())
+
+    def all_of(self, keyword_ids):
+        """Ids of the articles tagged with every one of these keywords"""
+        postings = sorted((self.tagged.get(keyword_id, set()) for keyword_id in keyword_ids), key=len)
+        if not postings:
+            return set()
+        matched = set(postings[0])
+        for posting in postings[1:]:
+            matched &= posting
+        return matched
+
+    def any_of(self, keyword_ids):
+        """Ids of the articles tagged with at least one of these keywords"""
+        matched = set()
+        for keyword_id in keyword_ids:
+            matched |= self.tagged.get(keyword_id, set())
+        return matched
+
+    def written_by(self, authors):
+        matched = set()
+        for author in authors:
+            matched |= self.by_author.get(author, set())
+        return matched
+
+    def written_in(self, years):
+        matched = set()
+        for year in years:
+            matched |= self.by_year.get(year, set())
+        return matched
+
+    def keywords(self):
+        """[{'id', 'name'}] of every keyword, by id"""
+        return [{'id': keyword_id, 'name': self.keyword_names[keyword_id]} for keyword_id in sorted(self.keyword_names)]
+
+    def authors(self):
+        return sorted(self.by_author)
+
+    def years(self):
+        """Years with at least one article, newest first"""
+        return sorted(self.by_year, reverse=True)
+
+    def names_for(self, article_id, exclude=()):
+        """Keyword names of an article, by keyword id"""
+        return [
+            self.keyword_names[keyword_id]
+            for keyword_id in sorted(self.article_keywords.get(article_id, ()))
+            if keyword_id not in exclude
+        ]
+
+
+def build():
+    """Build the keyword sets from the database (three queries)"""
+    sets = KeywordSets()
+    for keyword_id, name in Keyword.objects.values_list('id', 'name'):
+        sets.keyword_names[keyword_id] = name
+        sets.keyword_ids[name.lower()] = keyword_id
+    for article_id, keyword_id in ArticleKeyword.objects.values_list('article_id', 'keyword_id'):
+        sets.tagged[keyword_id].add(article_id)
+        sets.article_keywords[article_id].add(keyword_id)
+    for article_id, author, written in Article.objects.values_list('id', 'author_name', 'date_written'):
+        sets.by_author[author].add(article_id)
+        sets.by_year[written.year].add(article_id)
+    return sets
+
+
+_sets = VersionedStructure('article-keywords', build)
+
+
+def get():
+    """This process's KeywordSets"""
+    return _sets.get()
+
+
+def invalidate():
+    _sets.invalidate()
@@ -0,0 +1,34 @@
+# webapp/checks.py
+"""
+Deployment checks for webapp's caching.
+
+Search results, the listing sidebar, vendor detail fragments and the
+version counters of the in-process search structures all live in the
+default cache, and edits invalidate them there. With a process-local
+backend an edit is only seen by the worker that made it.
+"""
+
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_is_shared():
+    """Whether the default cache is seen by every process (not process-local)"""
+    return settings.CACHES.get('default', {}).get('BACKEND') not in PROCESS_LOCAL_CACHES
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    if not cache_is_shared():
+        return [Warning(
+            "The default cache is local to each process, so cache invalidations "
+            "made by one worker are not seen by the others.",
+            hint="Set CACHE_BACKEND and CACHE_LOCATION to a shared cache (Redis, Memcached).",
+            id='webapp.W001',
+        )]
+    return []
@@ -0,0 +1,186 @@
+# webapp/event_feeds.py
+"""
+iCalendar (.ics) and JSON feeds of culinary events for partner calendars.
+
+A feed lists the materialized runs (see vendors.occurrences) of active
+events, optionally narrowed to one vendor (?vendor=) or to cuisines
+(?cuisine=, repeatable), and is built with one query.
+
+Partners poll feeds, so every request first reads the feed's version
+with one aggregate query: the latest Event.updated_at and the number of
+matching events (a deleted event lowers the count). The version gives
+the ETag and Last-Modified validators, so an unchanged feed answers
+If-None-Match / If-Modified-Since with a 304 and no feed query. The
+materialized window rolls daily, so both validators also cover the day:
+Last-Modified is never earlier than the start of today. The body is
+cached under the ETag, which changes whenever the feed does.
+"""
+
+import hashlib
+import json
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from vendors import event_times
+from vendors.models import Event, EventOccurrence
+
+FORMATS = {
+    'ics': 'text/calendar; charset=utf-8',
+    'json': 'application/json',
+}
+PRODUCT_ID = '-//TasteLocal Singapore//Culinary Events//EN'
+ICS_LINE_OCTETS = 75
+
+
+class FeedFilters:
+    """Which events a feed covers (?vendor=, ?cuisine=)"""
+
+    def __init__(self, vendor_id=None, cuisines=()):
+        self.vendor_id = vendor_id
+        self.cuisines = sorted(set(cuisines))
+
+    @classmethod
+    def from_params(cls, params):
+        """Filters from a QueryDict; raises ValueError for a non-numeric vendor"""
+        vendor = params.get('vendor')
+        return cls(int(vendor) if vendor else None, params.getlist('cuisine'))
+
+    def events(self):
+        events = Event.objects.filter(is_active=True)
+        if self.vendor_id is not None:
+            events = events.filter(vendor_id=self.vendor_id)
+        if self.cuisines:
+            events = events.filter(id__in=Event.objects.filter(event_cuisine__name__in=self.cuisines).values('id'))
+        return events
+
+    def key(self):
+        return json.dumps([self.vendor_id, self.cuisines])
+
+
+class FeedVersion:
+    """Validators for the current state of one feed"""
+
+    def __init__(self, filters, last_modified, event_count):
+        # The materialized window rolls daily, so the day is part of the version
+        today = timezone.localdate()
+        if last_modified is not None:
+            last_modified = max(last_modified, event_times.start_datetime(today))
+        self.last_modified = last_modified
+        raw = f'{filters.key()}|{last_modified and last_modified.isoformat()}|{event_count}|{today}'
+        self.etag = '"%s"' % hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+
+def version(filters):
+    """The feed's ETag and Last-Modified, from one aggregate query"""
+    state = filters.events().aggregate(last_modified=Max('updated_at'), event_count=Count('id'))
+    return FeedVersion(filters, state['last_modified'], state['event_count'])
+
+
+def _occurrences(filters):
+    return (
+        EventOccurrence.objects.filter(event__in=filters.events())
+        .select_related('event', 'event__vendor')
+        .order_by('starts_at', 'event_id')
+    )
+
+
+def _event_url(base_url, event_id):
+    return base_url + reverse('webapp:culinary_event_detail', args=[event_id])
+
+
+def build_json(filters, base_url):
+    occurrences = []
+    for occurrence in _occurrences(filters):
+        event = occurrence.event
+        occurrences.append({
+            'id': event.id,
+            'title': event.event_name,
+            'description': event.event_description,
+            'event_type': event.event_type,
+            'vendor': event.vendor.business_name,
+            'start': occurrence.starts_at,
+            'end': occurrence.ends_at,
+            'address': event.event_address,
+            'latitude': event.event_latitude,
+            'longitude': event.event_longitude,
+            'url': _event_url(base_url, event.id),
+            'website': event.event_website or None,
+            'is_recurring': event.is_recurring,
+            'updated_at': event.updated_at,
+        })
+    return json.dumps({'events': occurrences}, cls=DjangoJSONEncoder)
+
+
+def _ics_text(value):
+    """Escape a TEXT value (RFC 5545 3.3.11)"""
+    value = str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+    return value.replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '\\n')
+
+
+def _ics_time(moment):
+    return moment.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _fold(line):
+    """Split a content line into 75-octet pieces joined by CRLF + space"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= ICS_LINE_OCTETS:
+        return line
+    pieces, start = [], 0
+    limit = ICS_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never cut a multi-byte character in half
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        pieces.append(encoded[start:end].decode('utf-8'))
+        start, limit = end, ICS_LINE_OCTETS - 1  # continuation lines start with a space
+    return '\r\n '.join(pieces)
+
+
+def build_ics(filters, base_url):
+    host = base_url.split('://', 1)[-1]
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODUCT_ID}',
+        'CALSCALE:GREGORIAN',
+        f'X-WR-CALNAME:{_ics_text(settings.SITE_NAME + " Culinary Events")}',
+    ]
+    for occurrence in _occurrences(filters):
+        event = occurrence.event
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:event-{event.id}-{_ics_time(occurrence.starts_at)}@{host}',
+            f'DTSTAMP:{_ics_time(event.updated_at)}',
+            f'DTSTART:{_ics_time(occurrence.starts_at)}',
+            f'DTEND:{_ics_time(occurrence.ends_at)}',
+            f'SUMMARY:{_ics_text(event.event_name)}',
+            f'DESCRIPTION:{_ics_text(event.event_description)}',
+            f'LOCATION:{_ics_text(event.event_address)}',
+            f'URL:{_event_url(base_url, event.id)}',
+        ]
+        if event.event_latitude is not None and event.event_longitude is not None:
+            lines.append(f'GEO:{event.event_latitude};{event.event_longitude}')
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return ''.join(_fold(line) + '\r\n' for line in lines)
+
+
+BUILDERS = {'ics': build_ics, 'json': build_json}
+
+
+def body(feed_format, filters, feed_version, base_url):
+    """The feed's content, from the cache when this version was built before"""
+    key = f'events:feed:{feed_format}:{base_url}:{feed_version.etag}'
+    content = cache.get(key)
+    if content is None:
+        content = BUILDERS[feed_format](filters, base_url)
+        cache.set(key, content, settings.EVENT_FEED_CACHE_TIMEOUT)
+    return content
@@ -0,0 +1,110 @@
+# webapp/listing_filters.py
+"""
+Cached filter-sidebar snapshot for the restaurant and food stall listings.
+
+The sidebar shows the cuisines (with vendor counts), the postal districts
+and the dietary filters that the listing's vendors actually offer. That
+data changes a few times a day, so it is built with one query per listing
+and kept in the Django cache. A page view then costs a single cache read
+(one get_many() of the snapshot and the generation below).
+
+Each snapshot stores the generation of a counter in the cache that it was
+built under. webapp.signals calls invalidate() on every Vendor or
+CuisineType write and on cuisine m2m changes; invalidate() bumps the
+counter once the writing transaction commits (earlier, a page view could
+cache the pre-commit data under the new generation), and the next page
+view in any worker sees a newer generation and rebuilds the snapshot. Writes that skip signals (queryset.update(),
+bulk_update(), management commands) must call invalidate() themselves.
+The counter only reaches the web workers through a shared cache backend
+(settings.CACHES); on a process-local cache a command's invalidate() is
+lost and LISTING_FILTERS_CACHE_TIMEOUT bounds how stale the sidebar stays.
+"""
+
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from vendors.areas import AREA_LABELS
+from vendors.models import Vendor
+
+# Listing -> the vendors it shows
+LISTINGS = {
+    'restaurants': Q(vendor_type__in=['restaurant', 'cafe'], is_active=True),
+    'food_stalls': Q(vendor_type='stall', is_active=True),
+}
+DIETARY_FLAGS = ['halal', 'kosher', 'vegetarian']
+
+
+class SidebarSnapshot:
+    """Filter options available on one listing page"""
+
+    def __init__(self, cuisines, areas, dietary):
+        self.cuisines = cuisines  # [{'name', 'count'}] by name
+        self.areas = areas        # [{'value', 'label'}] by district
+        self.dietary = dietary    # {flag: any vendor has it}
+
+
+GENERATION_KEY = 'listing:filters:generation'
+
+
+def _cache_key(listing):
+    return f'listing:filters:{listing}'
+
+
+def build(listing):
+    """Build a listing's snapshot from the database in a single query"""
+    rows = Vendor.objects.filter(LISTINGS[listing]).values_list(
+        'area', 'cuisine_types__name', *DIETARY_FLAGS
+    )
+    cuisines, areas, dietary = Counter(), set(), dict.fromkeys(DIETARY_FLAGS, False)
+    # One row per (vendor, cuisine); vendors without cuisines get one row with None
+    for area, cuisine, *flags in rows:
+        if cuisine is not None:
+            cuisines[cuisine] += 1
+        if area:
+            areas.add(area)
+        for flag, enabled in zip(DIETARY_FLAGS, flags):
+            dietary[flag] = dietary[flag] or enabled
+    return SidebarSnapshot(
+        cuisines=[{'name': name, 'count': cuisines[name]} for name in sorted(cuisines)],
+        areas=[{'value': area, 'label': AREA_LABELS.get(area, area)} for area in sorted(areas)],
+        dietary=dietary,
+    )
+
+
+def _start_generation():
+    # A fresh counter must not collide with one that was evicted, so it
+    # starts from the clock rather than from 1
+    cache.add(GENERATION_KEY, time.time_ns(), None)
+    return cache.get(GENERATION_KEY)
+
+
+def snapshot(listing):
+    """The listing's sidebar snapshot, from the cache when still current"""
+    key = _cache_key(listing)
+    cached = cache.get_many([key, GENERATION_KEY])
+    generation = cached.get(GENERATION_KEY)
+    if generation is None:
+        generation = _start_generation()
+    entry = cached.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1]
+    built = build(listing)
+    cache.set(key, (generation, built), settings.LISTING_FILTERS_CACHE_TIMEOUT)
+    return built
+
+
+def _bump():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        _start_generation()
+
+
+def invalidate():
+    """Make every worker rebuild the listings' snapshots on their next page view, on commit"""
+    transaction.on_commit(_bump)
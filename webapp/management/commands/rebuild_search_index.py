@@ -0,0 +1,23 @@
+# webapp/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from webapp.search import index as search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the search inverted index for vendors, events, articles and tours"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--type',
+            action='append',
+            dest='doc_types',
+            choices=sorted(search_index.DOC_TYPES.values()),
+            help="Only rebuild this listing type (can be repeated)",
+        )
+
+    def handle(self, *args, **options):
+        counts = search_index.rebuild(options['doc_types'])
+        for doc_type, count in counts.items():
+            self.stdout.write(f"Indexed {count} {doc_type} listing(s)")
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
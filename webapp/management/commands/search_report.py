@@ -0,0 +1,64 @@
+# webapp/management/commands/search_report.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from webapp.models import SearchRollup
+from webapp.search import metrics as search_metrics
+
+
+def _format_ms(value):
+    if value is None:
+        return '-'
+    if value == float('inf'):
+        return f'>{search_metrics.BUCKETS_MS[-2]}ms'
+    return f'<={value:g}ms'
+
+
+class Command(BaseCommand):
+    help = "Report search latency per phase, the slowest queries and zero-result queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help="How many days back to report on")
+        parser.add_argument('--limit', type=int, default=10, help="Queries to list per section")
+
+    def handle(self, *args, **options):
+        # Include this process's unflushed samples (e.g. from a shell session)
+        search_metrics.flush()
+        since = timezone.now() - timedelta(days=options['days'])
+        rollups = SearchRollup.objects.filter(period__gte=since)
+        limit = options['limit']
+
+        self.stdout.write(f"Search latency since {since:%Y-%m-%d %H:%M}")
+        self.stdout.write(f"{'phase':<10} {'count':>8} {'avg':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+        for phase, _ in SearchRollup.PHASES:
+            count, total_ms = 0, 0.0
+            histogram = [0] * len(search_metrics.BUCKETS_MS)
+            for row in rollups.filter(phase=phase).only('count', 'total_ms', 'histogram'):
+                count += row.count
+                total_ms += row.total_ms
+                histogram = [a + b for a, b in zip(histogram, row.histogram)]
+            if not count:
+                continue
+            self.stdout.write(
+                f"{phase:<10} {count:>8} {total_ms / count:>8.1f}ms "
+                f"{_format_ms(search_metrics.percentile(histogram, 0.50)):>10} "
+                f"{_format_ms(search_metrics.percentile(histogram, 0.95)):>10} "
+                f"{_format_ms(search_metrics.percentile(histogram, 0.99)):>10}"
+            )
+
+        self.stdout.write("\nSlowest queries (whole request)")
+        slowest = rollups.filter(phase='total').values('query').annotate(
+            searches=Sum('count'), total=Sum('total_ms')
+        ).annotate(average=F('total') / F('searches')).order_by('-average')[:limit]
+        for row in slowest:
+            self.stdout.write(f"  {row['average']:>8.1f}ms avg  x{row['searches']:<5} {row['query']}")
+
+        self.stdout.write("\nZero-result queries")
+        zero = rollups.filter(phase='total', zero_results__gt=0).values('query').annotate(
+            searches=Sum('zero_results')
+        ).order_by('-searches', 'query')[:limit]
+        for row in zero:
+            self.stdout.write(f"  x{row['searches']:<5} {row['query']}")
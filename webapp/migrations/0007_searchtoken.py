@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0006_remove_vendorrating_review_text_delete_vendorreview'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64)),
+                ('doc_type', models.CharField(choices=[('vendor', 'Vendor'), ('event', 'Event'), ('article', 'Article'), ('tour', 'Tour')], max_length=10)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(choices=[('name', 'Name / Title'), ('body', 'Description, Content & Address'), ('tags', 'Cuisines & Keywords')], max_length=5)),
+                ('position', models.PositiveIntegerField()),
+            ],
+            options={
+                'db_table': 'search_tokens',
+                'indexes': [models.Index(fields=['token', 'doc_type'], name='search_toke_token_021923_idx'), models.Index(fields=['doc_type', 'object_id'], name='search_toke_doc_typ_954b23_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-17 09:00
+
+from django.db import migrations
+
+# FULLTEXT indexes used by webapp.search.backends.MySQLFulltextBackend.
+# MATCH() needs an index on exactly the columns it names, so the name-only
+# and the combined column sets each get their own index.
+FULLTEXT_INDEXES = [
+    ('webapp_article_ft_title', 'webapp_article', ['title']),
+    ('webapp_article_ft_all', 'webapp_article', ['title', 'content']),
+]
+
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX {quote(name)} ON {quote(table)} "
+            f"({', '.join(quote(column) for column in columns)})"
+        )
+
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    quote = schema_editor.quote_name
+    for name, table, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX {quote(name)} ON {quote(table)}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0007_searchtoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0008_article_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.DateTimeField(help_text='Start of the hour')),
+                ('query', models.CharField(max_length=255)),
+                ('phase', models.CharField(choices=[('primary', 'Primary Tier Queries'), ('secondary', 'Secondary Tier Queries'), ('fuzzy', 'Fuzzy Fallback'), ('hydration', 'Hydration'), ('render', 'Template Render'), ('total', 'Whole Request')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('zero_results', models.PositiveIntegerField(default=0, help_text='Searches with no exact matches')),
+                ('total_ms', models.FloatField(default=0)),
+                ('max_ms', models.FloatField(default=0)),
+                ('histogram', models.JSONField(default=list)),
+            ],
+            options={
+                'db_table': 'search_rollups',
+                'indexes': [models.Index(fields=['phase', 'period'], name='search_roll_phase_892bd1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchrollup',
+            constraint=models.UniqueConstraint(fields=('period', 'query', 'phase'), name='unique_search_rollup'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-17 01:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0009_searchrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['title', 'id'], name='webapp_arti_title_e418aa_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from webapp.article_meta import TEXT_FIELDS, text_fields
+
+
+def backfill_article_listing_fields(apps, schema_editor):
+    Article = apps.get_model('webapp', 'Article')
+    ArticleImage = apps.get_model('webapp', 'ArticleImage')
+    lead_images = {}
+    for image_id, article_id in ArticleImage.objects.order_by('-order', '-id').values_list('id', 'article_id'):
+        lead_images[article_id] = image_id  # the lowest order wins
+    articles = list(Article.objects.all())
+    for article in articles:
+        for name, value in text_fields(article.content).items():
+            setattr(article, name, value)
+        article.lead_image_id = lead_images.get(article.id)
+    Article.objects.bulk_update(articles, [*TEXT_FIELDS, 'lead_image'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0010_listing_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, help_text='First characters of the content (set on save)', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='lead_image',
+            field=models.ForeignKey(blank=True, editable=False, help_text='First image by order (kept current by webapp.signals)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='webapp.articleimage'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='reading_minutes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='summary',
+            field=models.TextField(blank=True, editable=False, help_text='Content cut to 50 words (set on save)'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='word_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_article_listing_fields, migrations.RunPython.noop),
+    ]
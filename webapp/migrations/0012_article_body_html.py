@@ -0,0 +1,35 @@
+# Generated by Django 4.2.7 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+from webapp.article_meta import content_hash, render_body
+
+
+def backfill_article_bodies(apps, schema_editor):
+    Article = apps.get_model('webapp', 'Article')
+    articles = list(Article.objects.all())
+    for article in articles:
+        article.body_html = render_body(article.content)
+        article.body_hash = content_hash(article.content)
+    Article.objects.bulk_update(articles, ['body_html', 'body_hash'], batch_size=100)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webapp', '0011_article_listing_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='body_hash',
+            field=models.CharField(blank=True, editable=False, help_text='SHA-256 of the content body_html came from', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='body_html',
+            field=models.TextField(blank=True, editable=False, help_text='Content rendered to HTML (set on save)'),
+        ),
+        migrations.RunPython(backfill_article_bodies, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
 from django.urls import reverse
 
+from . import article_meta
+
 class Article(models.Model):
     # Only essential fields - no defaults needed
     title = models.CharField(max_length=200)
@@ -15,14 +17,49 @@ class Article(models.Model):
     # KEYWORDS RELATIONSHIP
     keywords = models.ManyToManyField('Keyword', through='ArticleKeyword', related_name='articles')
     
+    # Listing data (see webapp.article_meta)
+    excerpt = models.CharField(max_length=100, blank=True, editable=False, help_text="First characters of the content (set on save)")
+    summary = models.TextField(blank=True, editable=False, help_text="Content cut to 50 words (set on save)")
+    word_count = models.PositiveIntegerField(default=0, editable=False)
+    reading_minutes = models.PositiveIntegerField(default=0, editable=False)
+    body_html = models.TextField(blank=True, editable=False, help_text="Content rendered to HTML (set on save)")
+    body_hash = models.CharField(max_length=64, blank=True, editable=False, help_text="SHA-256 of the content body_html came from")
+    lead_image = models.ForeignKey(
+        'ArticleImage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='+',
+        help_text="First image by order (kept current by webapp.signals)"
+    )
+    
     class Meta:
         ordering = ['-date_written']
         verbose_name = 'Article'
         verbose_name_plural = 'Articles'
+        indexes = [
+            # Keyset pagination of the foodie stories listing
+            models.Index(fields=['title', 'id']),
+        ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # Keep the listing excerpt, reading time and rendered body in step with the content
+        for name, value in article_meta.text_fields(self.content).items():
+            setattr(self, name, value)
+        # Render the body only when the content actually changed
+        body_hash = article_meta.content_hash(self.content)
+        if body_hash != self.body_hash:
+            self.body_html = article_meta.render_body(self.content)
+            self.body_hash = body_hash
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, *article_meta.TEXT_FIELDS, *article_meta.BODY_FIELDS}
+        super().save(*args, **kwargs)
+    
     def get_absolute_url(self):
         return reverse('article_detail', kwargs={'slug': self.slug})
 
@@ -71,4 +108,69 @@ class VendorRating(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.user.username} - {self.vendor.business_name} - {self.rating} stars"
\ No newline at end of file
+        return f"{self.user.username} - {self.vendor.business_name} - {self.rating} stars"
+
+# Search Index
+class SearchToken(models.Model):
+    """One token occurrence in a searchable listing (a row of the inverted index)"""
+    DOC_TYPES = [
+        ('vendor', 'Vendor'),
+        ('event', 'Event'),
+        ('article', 'Article'),
+        ('tour', 'Tour'),
+    ]
+    FIELD_GROUPS = [
+        ('name', 'Name / Title'),
+        ('body', 'Description, Content & Address'),
+        ('tags', 'Cuisines & Keywords'),
+    ]
+
+    token = models.CharField(max_length=64)
+    doc_type = models.CharField(max_length=10, choices=DOC_TYPES)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=5, choices=FIELD_GROUPS)
+    position = models.PositiveIntegerField()
+
+    class Meta:
+        db_table = 'search_tokens'
+        indexes = [
+            models.Index(fields=['token', 'doc_type']),
+            models.Index(fields=['doc_type', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.doc_type}:{self.object_id} ({self.field}@{self.position})"
+
+
+class SearchRollup(models.Model):
+    """Search timings aggregated per hour, normalized query and phase"""
+    PHASES = [
+        ('primary', 'Primary Tier Queries'),
+        ('secondary', 'Secondary Tier Queries'),
+        ('fuzzy', 'Fuzzy Fallback'),
+        ('hydration', 'Hydration'),
+        ('render', 'Template Render'),
+        ('total', 'Whole Request'),
+    ]
+
+    period = models.DateTimeField(help_text="Start of the hour")
+    query = models.CharField(max_length=255)
+    phase = models.CharField(max_length=10, choices=PHASES)
+    count = models.PositiveIntegerField(default=0)
+    zero_results = models.PositiveIntegerField(default=0, help_text="Searches with no exact matches")
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    # Sample counts per upper bound in webapp.search.metrics.BUCKETS_MS
+    histogram = models.JSONField(default=list)
+
+    class Meta:
+        db_table = 'search_rollups'
+        constraints = [
+            models.UniqueConstraint(fields=['period', 'query', 'phase'], name='unique_search_rollup'),
+        ]
+        indexes = [
+            models.Index(fields=['phase', 'period']),
+        ]
+
+    def __str__(self):
+        return f"{self.query} [{self.phase}] {self.period:%Y-%m-%d %H:00} x{self.count}"
@@ -0,0 +1,173 @@
+# webapp/pagination.py
+"""
+Keyset (seek) pagination for the listing pages.
+
+A page is fetched with `WHERE (sort keys) > (last row's keys) ORDER BY
+sort keys LIMIT n`, never with OFFSET, so page 50 costs the same as page
+1. Every ordering ends with the primary key, which makes the position
+unique. The last row's key values travel in an opaque ?cursor=.
+
+NULL sort values are treated the way MySQL and SQLite order them: lowest,
+so first when ascending and last when descending.
+
+The "Found N" total counts at most LISTING_COUNT_LIMIT rows (shown as
+"N+" beyond that), so it stays bounded as the catalogue grows too. A
+first page that holds every row needs no count at all.
+"""
+
+import base64
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+
+
+class SortKey:
+    """One column (or expression) of a keyset ordering"""
+
+    def __init__(self, expression, descending=False):
+        self.expression = F(expression) if isinstance(expression, str) else expression
+        self.descending = descending
+
+
+class Page:
+    """One page of a listing plus the cursor for the next page"""
+
+    def __init__(self, items, next_cursor, next_url, total, total_capped=False):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.next_url = next_url
+        self.total = total
+        self.total_capped = total_capped  # more than `total` rows match
+
+    @property
+    def total_display(self):
+        return f"{self.total}+" if self.total_capped else str(self.total)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def json(self, results):
+        """Dict for the ?format=json infinite-scroll variant"""
+        return {
+            'results': results,
+            'total': self.total,
+            'total_capped': self.total_capped,
+            'next_cursor': self.next_cursor,
+            'next_url': self.next_url,
+        }
+
+
+def page_size(requested=None):
+    """Clamp a requested page size to the configured bounds"""
+    default = settings.LISTING_PAGE_SIZE
+    try:
+        size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, settings.LISTING_MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, cls=DjangoJSONEncoder, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """Decode a cursor into its key values, or None if it is missing or invalid"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+
+def _after(name, key, value):
+    """Rows strictly after `value` on one key"""
+    if key.descending:
+        if value is None:
+            return Q(pk__in=[])
+        return Q(**{f'{name}__lt': value}) | Q(**{f'{name}__isnull': True})
+    if value is None:
+        return Q(**{f'{name}__isnull': False})
+    return Q(**{f'{name}__gt': value})
+
+
+def _equal(name, value):
+    if value is None:
+        return Q(**{f'{name}__isnull': True})
+    return Q(**{name: value})
+
+
+def seek(queryset, keys, cursor=None, limit=None):
+    """
+    Return (rows, next_cursor) for the page after `cursor`.
+
+    `keys` is a list of SortKeys; the primary key is appended as the
+    final tie-breaker.
+    """
+    keys = [*keys, SortKey('pk')]
+    names = [f'keyset_{i}' for i in range(len(keys))]
+    queryset = queryset.annotate(**{
+        name: key.expression for name, key in zip(names, keys)
+    }).order_by(*[
+        F(name).desc() if key.descending else F(name).asc() for name, key in zip(names, keys)
+    ])
+
+    values = decode_cursor(cursor, len(keys))
+    if values is not None:
+        condition = Q(pk__in=[])
+        equal = Q()
+        for name, key, value in zip(names, keys, values):
+            condition |= equal & _after(name, key, value)
+            equal &= _equal(name, value)
+        queryset = queryset.filter(condition)
+
+    limit = limit or page_size()
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], name) for name in names])
+    return rows, next_cursor
+
+
+def count(queryset, limit=None):
+    """(rows in `queryset` up to `limit`, whether there are more)"""
+    limit = limit or settings.LISTING_COUNT_LIMIT
+    # Distinct rows only: some filters join through many-to-many tables
+    total = queryset.order_by().values('pk').distinct()[:limit + 1].count()
+    return min(total, limit), total > limit
+
+
+def paginate(request, queryset, keys):
+    """Keyset page of `queryset` for a listing view (?cursor=, ?limit=)"""
+    cursor = request.GET.get('cursor')
+    rows, next_cursor = seek(
+        queryset, keys,
+        cursor=cursor,
+        limit=page_size(request.GET.get('limit')),
+    )
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = '?' + params.urlencode()
+    if not cursor and not next_cursor:
+        total, capped = len(rows), False
+    else:
+        total, capped = count(queryset)
+    return Page(rows, next_cursor, next_url, total, capped)
+
+
+def wants_json(request):
+    return request.GET.get('format') == 'json'
@@ -0,0 +1,85 @@
+# webapp/ratings.py
+"""
+Rating aggregates stored on Vendor.
+
+Vendor.rating_count, rating_sum and rating_0 .. rating_5 (a histogram of
+0-5 star ratings) are kept in step with VendorRating so listings and
+detail pages read ratings without touching the ratings table.
+
+Every rating write ends in refresh(), which recomputes the vendor's
+aggregates in a single UPDATE ... SET col = (SELECT ...) statement. The
+aggregates are recounted rather than incremented, so concurrent writes
+cannot drift them. submit() is the site's write path: it upserts the
+user's rating and refreshes the vendor in one transaction. Ratings saved
+or deleted through the ORM (admin, cascades) are refreshed from the
+signal handlers in webapp.signals.
+"""
+
+from django.db import connection, transaction
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.dispatch import Signal
+
+from vendors.models import Vendor
+from .models import VendorRating
+
+SCORES = range(0, 6)
+RATING_FIELDS = ['rating_count', 'rating_sum', *(f'rating_{score}' for score in SCORES)]
+
+# Sent with vendor_id after a vendor's aggregates have been refreshed
+ratings_changed = Signal()
+
+
+def _aggregate(ratings, function):
+    return Coalesce(Subquery(ratings.annotate(value=function).values('value')[:1]), Value(0))
+
+
+def aggregate_expressions():
+    """{field: expression} recomputing each aggregate column for the outer vendor"""
+    ratings = VendorRating.objects.filter(vendor=OuterRef('pk')).order_by().values('vendor')
+    expressions = {
+        'rating_count': _aggregate(ratings, Count('pk')),
+        'rating_sum': _aggregate(ratings, Sum('rating')),
+    }
+    for score in SCORES:
+        expressions[f'rating_{score}'] = _aggregate(ratings.filter(rating=score), Count('pk'))
+    return expressions
+
+
+def refresh(vendor_id):
+    """Recompute one vendor's rating aggregates in a single UPDATE"""
+    Vendor.objects.filter(pk=vendor_id).update(**aggregate_expressions())
+    ratings_changed.send(sender=Vendor, vendor_id=vendor_id)
+
+
+def score(value):
+    """A submitted rating as an int in SCORES; raises ValueError for anything else"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"rating must be a whole number of stars, not {value!r}")
+    if value not in SCORES:
+        raise ValueError(f"rating must be from {SCORES[0]} to {SCORES[-1]}, not {value}")
+    return value
+
+
+def submit(vendor, user, rating):
+    """
+    Create or replace `user`'s rating of `vendor` and refresh its aggregates.
+
+    A single upsert, with no read first: whether the rating is new is not
+    reported, since checking would race with a concurrent submit. Raises
+    ValueError, before writing anything, for a rating outside SCORES (it
+    would count towards rating_count but land in no histogram bucket).
+    """
+    rating = score(rating)
+    # MySQL's ON DUPLICATE KEY UPDATE picks the unique key itself
+    unique_fields = ['vendor', 'user'] if connection.features.supports_update_conflicts_with_target else None
+    with transaction.atomic():
+        VendorRating.objects.bulk_create(
+            [VendorRating(vendor=vendor, user=user, rating=rating)],
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=['rating', 'updated_at'],
+        )
+        refresh(vendor.pk)
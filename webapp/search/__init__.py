@@ -0,0 +1,4 @@
+# webapp/search/__init__.py
+"""
+Search engine behind the global search bar (webapp.views.search).
+"""
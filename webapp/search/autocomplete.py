@@ -0,0 +1,294 @@
+# webapp/search/autocomplete.py
+"""
+In-process prefix trie for search-bar typeahead.
+
+Suggestions cover vendor, event, article, tour, cuisine and keyword names.
+Every name is inserted once per word, starting at that word, so "chi" and
+"chicken ri" both find "Tian Tian Chicken Rice". Each trie node keeps the
+top SUGGESTION_LIMIT entries of its subtree, ranked by popularity, so a
+lookup is a walk down the prefix and a slice - no queries, no sorting.
+
+Popularity:
+  vendor  - number of ratings (+ featured bonus)
+  event   - none (alphabetical)
+  article - number of keywords
+  tour    - featured bonus
+  cuisine - number of vendors serving it
+  keyword - number of articles tagged with it
+
+The trie is built lazily on first use and patched in place by
+webapp.signals (see versioned.py for how other workers catch up). A
+save that leaves a suggestion as it was changes nothing. A rating only
+moves a vendor's popularity, so it patches this process's trie without
+making every other process rebuild.
+"""
+
+import re
+
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from vendors.models import Vendor, Event, CuisineType
+from tours.models import Tour
+from webapp.models import Article, Keyword
+from .versioned import VersionedStructure
+
+KINDS = {
+    Vendor: 'vendor',
+    Event: 'event',
+    Article: 'article',
+    Tour: 'tour',
+    CuisineType: 'cuisine',
+    Keyword: 'keyword',
+}
+
+SUGGESTION_LIMIT = 10
+MAX_KEY_LENGTH = 40
+FEATURED_BONUS = 1000
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase and collapse punctuation/whitespace to single spaces"""
+    return ' '.join(_WORD_RE.findall((text or '').lower()))
+
+
+class Suggestion:
+    __slots__ = ('key', 'label', 'kind', 'url', 'popularity', 'rank')
+
+    def __init__(self, kind, object_id, label, url, popularity=0):
+        self.key = (kind, object_id)
+        self.label = label
+        self.kind = kind
+        self.url = url
+        self.popularity = popularity
+        # Higher popularity first, then alphabetical
+        self.rank = (-popularity, label.lower())
+
+    def as_dict(self):
+        return {'label': self.label, 'type': self.kind, 'url': self.url}
+
+    def same_as(self, other):
+        return (self.label, self.url, self.popularity) == (other.label, other.url, other.popularity)
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = set()   # keys whose indexed string ends here
+        self.top = []          # best suggestions in this subtree
+
+
+class PrefixTrie:
+    """Prefix trie with per-node top-k lists and in-place updates"""
+
+    def __init__(self, limit=SUGGESTION_LIMIT):
+        self.limit = limit
+        self.root = _Node()
+        self.suggestions = {}
+
+    @staticmethod
+    def _keys_for(label):
+        """Index strings for a label: the name from each word onwards"""
+        words = normalize(label).split()
+        return {' '.join(words[i:])[:MAX_KEY_LENGTH] for i in range(len(words))}
+
+    def _path(self, key, create=False):
+        """Return the node path for a key (root first), or None if missing"""
+        node = self.root
+        path = [node]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    def _refresh(self, path):
+        """Recompute top lists bottom-up along a path"""
+        for node in reversed(path):
+            candidates = [self.suggestions[key] for key in node.entries]
+            for child in node.children.values():
+                candidates.extend(child.top)
+            unique = {s.key: s for s in candidates}
+            node.top = sorted(unique.values(), key=lambda s: s.rank)[:self.limit]
+
+    def _prune(self, path, key):
+        """Drop empty nodes left behind after a removal"""
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.entries or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def add(self, suggestion, refresh=True):
+        """Insert or replace a suggestion"""
+        if suggestion.key in self.suggestions:
+            self.remove(suggestion.key)
+        self.suggestions[suggestion.key] = suggestion
+        for key in self._keys_for(suggestion.label):
+            path = self._path(key, create=True)
+            path[-1].entries.add(suggestion.key)
+            if refresh:
+                self._refresh(path)
+
+    def remove(self, entry_key):
+        """Remove a suggestion by (kind, id)"""
+        suggestion = self.suggestions.pop(entry_key, None)
+        if suggestion is None:
+            return
+        for key in self._keys_for(suggestion.label):
+            path = self._path(key)
+            if path is None:
+                continue
+            path[-1].entries.discard(entry_key)
+            self._prune(path, key)
+            self._refresh(path)
+
+    def finalize(self):
+        """Compute every top list after a bulk load (post-order)"""
+        stack = [(self.root, False)]
+        while stack:
+            node, visited = stack.pop()
+            if visited:
+                self._refresh([node])
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    def lookup(self, prefix, limit=None):
+        """Return the best suggestions for a typed prefix"""
+        key = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not key:
+            return []
+        path = self._path(key)
+        if path is None:
+            return []
+        return path[-1].top[:limit or self.limit]
+
+
+# ===== SUGGESTION SOURCES =====
+
+def _search_url(text):
+    return reverse('webapp:search') + '?' + urlencode({'q': text})
+
+
+def vendor_suggestion(vendor):
+    if vendor.vendor_type == 'restaurant':
+        url = reverse('webapp:restaurant_detail', args=[vendor.id])
+    else:
+        url = reverse('webapp:food_stall_detail', args=[vendor.id])
+    popularity = vendor.rating_count + (FEATURED_BONUS if vendor.is_featured else 0)
+    return Suggestion('vendor', vendor.id, vendor.business_name, url, popularity)
+
+
+def event_suggestion(event):
+    url = reverse('webapp:culinary_event_detail', args=[event.id])
+    return Suggestion('event', event.id, event.event_name, url)
+
+
+def article_suggestion(article, keyword_count=None):
+    if keyword_count is None:
+        keyword_count = article.keywords.count()
+    url = reverse('webapp:article_detail', args=[article.slug])
+    return Suggestion('article', article.id, article.title, url, keyword_count)
+
+
+def tour_suggestion(tour):
+    url = reverse('webapp:tour_detail', args=[tour.id])
+    popularity = FEATURED_BONUS if tour.is_featured else 0
+    return Suggestion('tour', tour.id, tour.name, url, popularity)
+
+
+def cuisine_suggestion(cuisine, vendor_count=None):
+    if vendor_count is None:
+        vendor_count = cuisine.vendors.count()
+    return Suggestion('cuisine', cuisine.id, cuisine.name, _search_url(cuisine.name), vendor_count)
+
+
+def keyword_suggestion(keyword, article_count=None):
+    if article_count is None:
+        article_count = keyword.articles.count()
+    url = reverse('webapp:foodie_stories') + '?' + urlencode({'keyword': keyword.id})
+    return Suggestion('keyword', keyword.id, keyword.name, url, article_count)
+
+
+def build_trie():
+    """Build a trie from the database (one query per source)"""
+    trie = PrefixTrie()
+    vendors = Vendor.objects.filter(is_active=True).only(
+        'id', 'business_name', 'vendor_type', 'is_featured', 'rating_count'
+    )
+    for vendor in vendors:
+        trie.add(vendor_suggestion(vendor), refresh=False)
+    for event in Event.objects.filter(is_active=True).only('id', 'event_name'):
+        trie.add(event_suggestion(event), refresh=False)
+    for article in Article.objects.annotate(keyword_count=Count('keywords')).only('id', 'title', 'slug'):
+        trie.add(article_suggestion(article, article.keyword_count), refresh=False)
+    for tour in Tour.objects.filter(is_active=True).only('id', 'name', 'is_featured'):
+        trie.add(tour_suggestion(tour), refresh=False)
+    for cuisine in CuisineType.objects.annotate(vendor_count=Count('vendors')):
+        trie.add(cuisine_suggestion(cuisine, cuisine.vendor_count), refresh=False)
+    for keyword in Keyword.objects.annotate(article_count=Count('articles')):
+        trie.add(keyword_suggestion(keyword, keyword.article_count), refresh=False)
+    trie.finalize()
+    return trie
+
+
+# ===== PROCESS-WIDE TRIE =====
+
+_trie = VersionedStructure('autocomplete', build_trie)
+
+
+def get_trie():
+    """Return this process's trie, rebuilding it if another process changed data"""
+    return _trie.get()
+
+
+def suggest(prefix, limit=None):
+    """Return suggestion dicts for a typed prefix"""
+    return [s.as_dict() for s in get_trie().lookup(prefix, limit)]
+
+
+def _unchanged(suggestion, remove_key):
+    """True if an up-to-date trie already reflects this change"""
+    trie = _trie.current()
+    if trie is None:
+        return False
+    if remove_key is not None and remove_key in trie.suggestions:
+        return False
+    if suggestion is None:
+        return True
+    existing = trie.suggestions.get(suggestion.key)
+    return existing is not None and existing.same_as(suggestion)
+
+
+def update(suggestion=None, remove_key=None, shared=True):
+    """
+    Apply a change to this process's trie and bump the shared version, on commit.
+
+    Pass a Suggestion to add/replace it, or remove_key=(kind, id) to drop one.
+    Changes the trie already reflects are skipped. With shared=False other
+    processes are not made to rebuild (see VersionedStructure.apply).
+    """
+    if _unchanged(suggestion, remove_key):
+        return
+
+    def change(trie):
+        if remove_key is not None:
+            trie.remove(remove_key)
+        if suggestion is not None:
+            trie.add(suggestion)
+    _trie.apply(change, shared=shared)
+
+
+def invalidate():
+    """Force every process to rebuild its trie on next lookup"""
+    _trie.invalidate()
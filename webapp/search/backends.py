@@ -0,0 +1,198 @@
+# webapp/search/backends.py
+"""
+Pluggable search backends.
+
+A backend answers two questions:
+  - lookup(query): SearchHits for the global search bar (webapp.views.search)
+  - filter_vendors(queryset, query): vendor matches for the tour operator
+    vendor search/list pages, ranked by relevance
+vendor_ranking(query, vendor_field) gives that ranking as ordering
+expressions, for listings of rows related to the vendor (VendorCard).
+
+Backends:
+  icontains - portable substring matching (the original logic; SQLite tests)
+  index     - token inverted index (index.py), with icontains vendor filtering
+  mysql     - MySQL FULLTEXT (boolean mode for matching, natural language
+              mode for relevance), using the indexes created by the
+              *_fulltext_indexes migrations
+
+settings.SEARCH_BACKEND picks one by name; 'auto' (the default) uses
+mysql on a MySQL connection and index everywhere else.
+"""
+
+import re
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+
+from vendors.models import Vendor, Event
+from tours.models import Tour
+from webapp.models import Article
+from . import index as search_index
+from . import metrics
+from .index import SearchHits
+
+# (doc_type, model, name field, fields searched by the secondary tier)
+DOCUMENTS = [
+    ('vendor', Vendor, 'business_name', ['business_name', 'description', 'address']),
+    ('event', Event, 'event_name', ['event_name', 'event_description', 'event_address']),
+    ('article', Article, 'title', ['title', 'content']),
+    ('tour', Tour, 'name', ['name', 'description']),
+]
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def _add_hits(hits, doc_type, primary, secondary):
+    """Record non-empty tiers only, as index.lookup does"""
+    if primary:
+        hits.primary[doc_type] = primary
+    if secondary:
+        hits.secondary[doc_type] = secondary
+
+
+class IContainsBackend:
+    """Substring matching with icontains - works on every database"""
+
+    name = 'icontains'
+
+    def lookup(self, query):
+        hits = SearchHits()
+        terms = query.split()
+        if not terms:
+            return hits
+        phrase = query.lower()
+        for doc_type, model, name_field, fields in DOCUMENTS:
+            primary_q = Q()
+            for term in terms:
+                primary_q &= Q(**{f'{name_field}__icontains': term})
+            with metrics.phase('primary'):
+                primary = set(model.objects.filter(primary_q).values_list('id', flat=True))
+
+            secondary_q = Q()
+            for field in fields:
+                secondary_q |= Q(**{f'{field}__icontains': query})
+            with metrics.phase('secondary'):
+                rows = model.objects.filter(secondary_q).exclude(id__in=primary).values_list('id', name_field)
+                secondary = {object_id: phrase in (name or '').lower() for object_id, name in rows}
+            _add_hits(hits, doc_type, primary, secondary)
+        return hits
+
+    def filter_vendors(self, queryset, query):
+        return queryset.filter(
+            Q(business_name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(cuisine_types__name__icontains=query)
+        ).distinct()
+
+    def vendor_ranking(self, query, vendor_field=None):
+        """Ordering expressions ranking vendor matches, best first (none: no relevance here)"""
+        return []
+
+
+class IndexBackend(IContainsBackend):
+    """Global search from the token inverted index"""
+
+    name = 'index'
+
+    def lookup(self, query):
+        return search_index.lookup(query)
+
+
+class MatchAgainst(Func):
+    """MATCH (columns) AGAINST (query IN <mode>) - MySQL FULLTEXT relevance"""
+
+    output_field = FloatField()
+
+    def __init__(self, *columns, query, mode='NATURAL LANGUAGE MODE'):
+        super().__init__(*[F(column) for column in columns])
+        self.query = query
+        self.mode = mode
+
+    def as_sql(self, compiler, connection, **extra_context):
+        columns, params = [], []
+        for expression in self.source_expressions:
+            sql, column_params = compiler.compile(expression)
+            columns.append(sql)
+            params.extend(column_params)
+        return f"MATCH ({', '.join(columns)}) AGAINST (%s IN {self.mode})", params + [self.query]
+
+
+class MySQLFulltextBackend(IContainsBackend):
+    """MySQL FULLTEXT matching with engine-computed relevance"""
+
+    name = 'mysql'
+    # InnoDB ignores shorter tokens (innodb_ft_min_token_size)
+    MIN_TOKEN_LENGTH = 3
+
+    def _terms(self, query):
+        return [term for term in _WORD_RE.findall(query.lower()) if len(term) >= self.MIN_TOKEN_LENGTH]
+
+    def _boolean_queries(self, query):
+        """
+        (all words, phrase) BOOLEAN MODE queries for the primary and secondary tiers.
+
+        Short words are left out of the primary clause only, where InnoDB
+        could never match them; the phrase keeps every word of the query,
+        as the other backends' phrase tier does.
+        """
+        all_words = ' '.join(f'+{term}*' for term in self._terms(query))
+        phrase = '"{}"'.format(' '.join(_WORD_RE.findall(query.lower())))
+        return all_words, phrase
+
+    def lookup(self, query):
+        if not self._terms(query):
+            # Nothing FULLTEXT can match on (only short words or stopwords)
+            return super().lookup(query)
+
+        all_words, phrase = self._boolean_queries(query)
+        hits = SearchHits()
+        for doc_type, model, name_field, fields in DOCUMENTS:
+            with metrics.phase('primary'):
+                primary = set(
+                    model.objects.annotate(
+                        primary_match=MatchAgainst(name_field, query=all_words, mode='BOOLEAN MODE')
+                    ).filter(primary_match__gt=0).values_list('id', flat=True)
+                )
+            with metrics.phase('secondary'):
+                rows = model.objects.annotate(
+                    phrase_match=MatchAgainst(*fields, query=phrase, mode='BOOLEAN MODE'),
+                    in_name=MatchAgainst(name_field, query=phrase, mode='BOOLEAN MODE'),
+                ).filter(phrase_match__gt=0).exclude(id__in=primary).values_list('id', 'in_name')
+                secondary = {object_id: in_name > 0 for object_id, in_name in rows}
+            _add_hits(hits, doc_type, primary, secondary)
+            hits.ranking[doc_type] = MatchAgainst(*fields, query=query)
+        return hits
+
+    def filter_vendors(self, queryset, query):
+        if not self._terms(query):
+            return super().filter_vendors(queryset, query)
+        cuisine_matches = Vendor.cuisine_types.through.objects.filter(
+            cuisinetype__name__icontains=query
+        ).values('vendor_id')
+        return queryset.annotate(
+            relevance=MatchAgainst('business_name', 'description', query=query)
+        ).filter(
+            Q(relevance__gt=0) | Q(id__in=cuisine_matches)
+        ).order_by('-relevance', 'business_name')
+
+    def vendor_ranking(self, query, vendor_field=None):
+        if not self._terms(query):
+            return super().vendor_ranking(query, vendor_field)
+        prefix = f'{vendor_field}__' if vendor_field else ''
+        return [MatchAgainst(f'{prefix}business_name', f'{prefix}description', query=query).desc()]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (IContainsBackend, IndexBackend, MySQLFulltextBackend)
+}
+
+
+def get_backend():
+    """Return the configured backend (settings.SEARCH_BACKEND)"""
+    name = getattr(settings, 'SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        name = 'mysql' if connection.vendor == 'mysql' else 'index'
+    return BACKENDS[name]()
@@ -0,0 +1,206 @@
+# webapp/search/facets.py
+"""
+Facet counts and facet filtering for search results.
+
+Facets:
+  category   - Dining / Events / Articles / Tours (from the hit sets)
+  vendor_type, cuisine, dietary - attributes of matched vendors
+  open       - matched vendors open now (or at ?open_at=, see vendors.hours)
+
+Category counts come straight from SearchHits. Vendor attributes for
+every matched vendor are read in one query, with one row per
+(vendor, cuisine). Vendors without a VendorCard (inactive ones) have no
+result card, so that query skips them and they are dropped from the hits
+before anything is counted. Every count is then tallied from those rows, so
+there is no COUNT query per facet value. Filtering narrows the same
+SearchHits in memory, without running the search again.
+
+Within a facet the selected values are ORed; across facets they are
+ANDed. Selecting a vendor facet leaves only Dining results.
+"""
+
+from collections import Counter
+
+from vendors import hours as vendor_hours
+from vendors.models import Vendor
+from .index import SearchHits
+from .pagination import CATEGORIES
+
+# (GET parameter, sidebar title) in display order
+FACETS = [
+    ('category', 'Result Type'),
+    ('vendor_type', 'Vendor Type'),
+    ('cuisine', 'Cuisine'),
+    ('dietary', 'Dietary'),
+    ('open', 'Opening Hours'),
+]
+FACET_PARAMS = [name for name, _ in FACETS]
+DIETARY_FLAGS = [
+    ('halal', 'Halal'),
+    ('kosher', 'Kosher'),
+    ('vegetarian', 'Vegetarian'),
+]
+CATEGORY_DOC_TYPES = {key: doc_type for key, doc_type, _ in CATEGORIES}
+
+
+class VendorFacets:
+    """Facet attributes of one matched vendor"""
+    __slots__ = ('vendor_type', 'dietary', 'cuisines', 'is_open')
+
+    def __init__(self, vendor_type, is_open=False):
+        self.vendor_type = vendor_type
+        self.is_open = is_open
+        self.dietary = set()
+        self.cuisines = set()
+
+
+def vendor_attributes(vendor_ids, open_minute=None):
+    """
+    Load facet attributes for matched vendors with a card in a single query.
+
+    `open_minute` (minute of the week, default now) decides is_open.
+
+    Returns ({vendor_id: VendorFacets}, {cuisine_id: cuisine name}).
+    """
+    vendors, cuisine_names = {}, {}
+    if not vendor_ids:
+        return vendors, cuisine_names
+    if open_minute is None:
+        open_minute = vendor_hours.minute_of_week()
+    rows = Vendor.objects.filter(id__in=vendor_ids, card__isnull=False).annotate(
+        is_open=vendor_hours.is_open_at(open_minute),
+    ).values_list(
+        'id', 'vendor_type', 'is_open', 'cuisine_types__id', 'cuisine_types__name',
+        *(flag for flag, _ in DIETARY_FLAGS),
+    )
+    for vendor_id, vendor_type, is_open, cuisine_id, cuisine_name, *flags in rows:
+        facets = vendors.get(vendor_id)
+        if facets is None:
+            facets = vendors[vendor_id] = VendorFacets(vendor_type, is_open)
+            facets.dietary.update(flag for (flag, _), enabled in zip(DIETARY_FLAGS, flags) if enabled)
+        if cuisine_id is not None:
+            facets.cuisines.add(str(cuisine_id))
+            cuisine_names[str(cuisine_id)] = cuisine_name
+    return vendors, cuisine_names
+
+
+def _vendor_ids(hits):
+    return set(hits.primary['vendor']) | set(hits.secondary['vendor'])
+
+
+def _option(value, label, count, selected):
+    return {'value': value, 'label': label, 'count': count, 'selected': value in selected}
+
+
+def facet_counts(hits, attributes, selected=None, open_label='Open now'):
+    """
+    Facet options with counts over all matches (before any facet filter).
+
+    Returns {facet: [{'value', 'label', 'count', 'selected'}, ...]};
+    values with no matches are left out.
+    """
+    selected = selected or {}
+    vendors, cuisine_names = attributes
+    vendor_types, cuisines, dietary = Counter(), Counter(), Counter()
+    open_count = 0
+    for facets in vendors.values():
+        vendor_types[facets.vendor_type] += 1
+        cuisines.update(facets.cuisines)
+        dietary.update(facets.dietary)
+        open_count += facets.is_open
+
+    categories = []
+    for key, doc_type, label in CATEGORIES:
+        count = len(hits.primary[doc_type]) + len(hits.secondary[doc_type])
+        if count:
+            categories.append(_option(key, label, count, selected.get('category', [])))
+
+    return {
+        'category': categories,
+        'vendor_type': [
+            _option(value, label, vendor_types[value], selected.get('vendor_type', []))
+            for value, label in Vendor.VENDOR_TYPES if vendor_types[value]
+        ],
+        'cuisine': [
+            _option(value, cuisine_names[value], count, selected.get('cuisine', []))
+            for value, count in sorted(cuisines.items(), key=lambda item: (-item[1], cuisine_names[item[0]]))
+        ],
+        'dietary': [
+            _option(value, label, dietary[value], selected.get('dietary', []))
+            for value, label in DIETARY_FLAGS if dietary[value]
+        ],
+        'open': [_option('now', open_label, open_count, selected.get('open', []))] if open_count else [],
+    }
+
+
+def sections(facets):
+    """Non-empty facets as [{'name', 'title', 'options'}] for the sidebar"""
+    return [
+        {'name': name, 'title': title, 'options': facets[name]}
+        for name, title in FACETS if facets.get(name)
+    ]
+
+
+def selected_facets(params):
+    """Read selected facet values from a QueryDict"""
+    return {name: params.getlist(name) for name in FACET_PARAMS if params.getlist(name)}
+
+
+def narrow(hits, attributes, selected):
+    """
+    Return a new SearchHits with only the listings matching every selected
+    facet, and only vendors found by vendor_attributes().
+    """
+    vendors, _ = attributes
+    if not selected and _vendor_ids(hits) <= vendors.keys():
+        return hits
+    doc_types = {CATEGORY_DOC_TYPES[key] for key in selected.get('category', []) if key in CATEGORY_DOC_TYPES}
+    vendor_filters = [selected.get(name) for name in ('vendor_type', 'cuisine', 'dietary', 'open')]
+    if any(vendor_filters):
+        doc_types = doc_types & {'vendor'} if doc_types else {'vendor'}
+
+    def keep_vendor(vendor_id):
+        facets = vendors.get(vendor_id)
+        if facets is None:
+            return False
+        vendor_types, cuisines, dietary, open_filter = vendor_filters
+        return (
+            (not vendor_types or facets.vendor_type in vendor_types) and
+            (not cuisines or facets.cuisines.intersection(cuisines)) and
+            (not dietary or facets.dietary.intersection(dietary)) and
+            (not open_filter or facets.is_open)
+        )
+
+    narrowed = SearchHits()
+    narrowed.ranking = hits.ranking
+    for _, doc_type, _ in CATEGORIES:
+        if doc_types and doc_type not in doc_types:
+            continue
+        primary, secondary = hits.primary[doc_type], hits.secondary[doc_type]
+        if doc_type == 'vendor':
+            primary = {vendor_id for vendor_id in primary if keep_vendor(vendor_id)}
+            secondary = {vendor_id: in_name for vendor_id, in_name in secondary.items() if keep_vendor(vendor_id)}
+        if primary:
+            narrowed.primary[doc_type] = set(primary)
+        if secondary:
+            narrowed.secondary[doc_type] = dict(secondary)
+    return narrowed
+
+
+def apply(hits, params):
+    """
+    Facet counts for `hits` and the hits narrowed by the facets in `params`.
+
+    Returns (facets, narrowed hits).
+    """
+    selected = selected_facets(params)
+    open_minute = vendor_hours.requested_minute(params)
+    open_label = 'Open now'
+    if open_minute is not None:
+        selected['open'] = ['now']
+        if params.get('open_at'):
+            open_label = f"Open at {vendor_hours.describe(open_minute)}"
+    attributes = vendor_attributes(_vendor_ids(hits), open_minute)
+    # Count only what can be shown
+    hits = narrow(hits, attributes, {})
+    return facet_counts(hits, attributes, selected, open_label), narrow(hits, attributes, selected)
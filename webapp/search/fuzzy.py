@@ -0,0 +1,236 @@
+# webapp/search/fuzzy.py
+"""
+Typo-tolerant trigram index for "did you mean" and fuzzy fallback results.
+
+Covers vendor names, MenuItem.dish_name, event names and article titles.
+Each word is padded ("  laksa ") and cut into character trigrams, the way
+pg_trgm does it, so "lakhsa" still shares most trigrams with "laksa".
+
+A name scores max(dice, containment) against the query, where
+  dice        = 2 * shared / (query trigrams + name trigrams)
+  containment = shared / query trigrams   ("prata" -> "Roti Prata")
+
+Candidate pruning: to reach MIN_SIMILARITY a name must share at least
+`needed` trigrams with the query, so it must contain at least one of the
+query's (len(query trigrams) - needed + 1) rarest trigrams. Only the
+posting lists of those rare trigrams are read; every other name is never
+looked at.
+"""
+
+import math
+import re
+from collections import defaultdict
+
+from django.urls import reverse
+from django.utils.http import urlencode
+
+from vendors.models import Vendor, Event, MenuItem
+from webapp.models import Article
+from .index import SearchHits
+from .versioned import VersionedStructure
+
+MIN_SIMILARITY = 0.4
+MIN_QUERY_LENGTH = 3
+SUGGESTION_LIMIT = 5
+RESULT_LIMIT = 50
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def trigrams(text):
+    """Padded per-word character trigrams of a text"""
+    grams = set()
+    for word in _WORD_RE.findall((text or '').lower()):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+class FuzzyEntry:
+    __slots__ = ('key', 'label', 'kind', 'object_id', 'vendor_id', 'grams')
+
+    def __init__(self, kind, object_id, label, vendor_id=None):
+        self.key = (kind, object_id)
+        self.kind = kind
+        self.object_id = object_id
+        self.label = label
+        # Dishes point search results at the vendor that serves them
+        self.vendor_id = vendor_id
+        self.grams = trigrams(label)
+
+
+class FuzzyMatch:
+    __slots__ = ('entry', 'score', 'dice')
+
+    def __init__(self, entry, score, dice):
+        self.entry = entry
+        self.score = score
+        self.dice = dice
+
+
+class TrigramIndex:
+    """Trigram posting lists over short names"""
+
+    def __init__(self):
+        self.entries = {}
+        self.postings = defaultdict(set)
+
+    def add(self, entry):
+        if entry.key in self.entries:
+            self.remove(entry.key)
+        self.entries[entry.key] = entry
+        for gram in entry.grams:
+            self.postings[gram].add(entry.key)
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for gram in entry.grams:
+            posting = self.postings.get(gram)
+            if posting is not None:
+                posting.discard(key)
+                if not posting:
+                    del self.postings[gram]
+
+    def match(self, query, min_similarity=MIN_SIMILARITY, limit=RESULT_LIMIT):
+        """Return FuzzyMatches for a query, best first"""
+        if len(query.strip()) < MIN_QUERY_LENGTH:
+            return []
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        size = len(query_grams)
+        # Fewest shared trigrams that can still reach min_similarity
+        needed = max(1, math.ceil(min_similarity * size / (2 - min_similarity)))
+        rarest = sorted(query_grams, key=lambda gram: len(self.postings.get(gram, ())))
+        candidates = set()
+        for gram in rarest[:size - needed + 1]:
+            candidates.update(self.postings.get(gram, ()))
+
+        matches = []
+        for key in candidates:
+            entry = self.entries[key]
+            shared = len(query_grams & entry.grams)
+            if shared < needed:
+                continue
+            dice = 2 * shared / (size + len(entry.grams))
+            score = max(dice, shared / size)
+            if score >= min_similarity:
+                matches.append(FuzzyMatch(entry, score, dice))
+
+        matches.sort(key=lambda m: (-m.score, -m.dice, m.entry.label.lower()))
+        return matches[:limit]
+
+
+# ===== ENTRY SOURCES =====
+
+def vendor_entry(vendor):
+    return FuzzyEntry('vendor', vendor.id, vendor.business_name)
+
+
+def dish_entry(item):
+    return FuzzyEntry('dish', item.id, item.dish_name, vendor_id=item.vendor_id)
+
+
+def event_entry(event):
+    return FuzzyEntry('event', event.id, event.event_name)
+
+
+def article_entry(article):
+    return FuzzyEntry('article', article.id, article.title)
+
+
+def build_index():
+    """Build the trigram index from the database (one query per source)"""
+    index = TrigramIndex()
+    for vendor in Vendor.objects.only('id', 'business_name'):
+        index.add(vendor_entry(vendor))
+    for item in MenuItem.objects.only('id', 'dish_name', 'vendor_id'):
+        index.add(dish_entry(item))
+    for event in Event.objects.only('id', 'event_name'):
+        index.add(event_entry(event))
+    for article in Article.objects.only('id', 'title'):
+        index.add(article_entry(article))
+    return index
+
+
+_index = VersionedStructure('fuzzy', build_index)
+
+
+def _unchanged(entry, remove_key):
+    """True if an up-to-date index already reflects this change"""
+    index = _index.current()
+    if index is None:
+        return False
+    if remove_key is not None and remove_key in index.entries:
+        return False
+    if entry is None:
+        return True
+    existing = index.entries.get(entry.key)
+    return existing is not None and (existing.label, existing.vendor_id) == (entry.label, entry.vendor_id)
+
+
+def update(entry=None, remove_key=None):
+    """
+    Add/replace an entry or drop one by (kind, id) in the shared index.
+
+    Changes the index already reflects (a save that kept the name) are
+    skipped, so they do not make every other process rebuild.
+    """
+    if _unchanged(entry, remove_key):
+        return
+
+    def change(index):
+        if remove_key is not None:
+            index.remove(remove_key)
+        if entry is not None:
+            index.add(entry)
+    _index.apply(change)
+
+
+def invalidate():
+    _index.invalidate()
+
+
+# ===== SEARCH HELPERS =====
+
+def match(query):
+    """FuzzyMatches for a query against this process's index"""
+    return _index.get().match(query)
+
+
+def did_you_mean(query, matches, limit=SUGGESTION_LIMIT):
+    """Distinct names from `matches` to offer as spelling suggestions"""
+    suggestions = []
+    seen = {query.strip().lower()}
+    for fuzzy_match in matches:
+        label = fuzzy_match.entry.label
+        if label.lower() in seen:
+            continue
+        seen.add(label.lower())
+        suggestions.append({
+            'label': label,
+            'url': reverse('webapp:search') + '?' + urlencode({'q': label}),
+        })
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+def fallback_hits(matches):
+    """
+    SearchHits built from fuzzy name matches, for when the exact search is empty.
+
+    Matches land in the secondary tier as name matches; a dish match brings
+    in the vendor that serves it.
+    """
+    hits = SearchHits()
+    for fuzzy_match in matches:
+        entry = fuzzy_match.entry
+        if entry.kind == 'dish':
+            hits.secondary['vendor'].setdefault(entry.vendor_id, False)
+        else:
+            hits.secondary[entry.kind][entry.object_id] = True
+    return hits
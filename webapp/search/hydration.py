@@ -0,0 +1,255 @@
+# webapp/search/hydration.py
+"""
+Turn matched listing ids into search result dicts in a fixed number of queries.
+
+Each listing type is loaded once for both tiers (primary and secondary ids
+together): vendors joined to their VendorCard, tours to their
+TourSummary and articles to their lead image (with the stored excerpt),
+other descriptions cut down to an excerpt in SQL. The page
+costs the same number of queries whether it shows 2 results or 200.
+
+Within a type, results are ranked in SQL by (tier, relevance, lowercased
+name, id): tier 0 is the primary tier, tier 1 a phrase match in the
+name/title and tier 2 a phrase match elsewhere; relevance is the search
+engine's score when the backend provides one (see backends.py). load_page()
+seeks past a previous ranking key so every page is a bounded query.
+"""
+
+from django.db.models import Case, FloatField, IntegerField, Q, Value, When
+from django.db.models.functions import Lower, Substr
+from django.urls import reverse
+
+from vendors.models import Vendor, Event
+from tours.models import Tour
+from webapp import article_meta
+from webapp.models import Article
+
+EXCERPT_LENGTH = 100
+
+# Placeholder used to reverse each detail URL once per request
+_ID_SENTINEL = 987654321
+_SLUG_SENTINEL = 'slug-sentinel'
+
+
+class UrlBuilder:
+    """reverse() a detail URL once, then fill in ids by string substitution"""
+
+    def __init__(self):
+        self._patterns = {}
+
+    def __call__(self, name, value):
+        sentinel = _SLUG_SENTINEL if isinstance(value, str) else _ID_SENTINEL
+        if name not in self._patterns:
+            self._patterns[name] = reverse(name, args=[sentinel])
+        return self._patterns[name].replace(str(sentinel), str(value), 1)
+
+
+def _excerpt(text):
+    return text + '...' if text else ''
+
+
+# ===== LOADERS (one query per type, plus one per prefetch) =====
+
+def _load_vendors(ids):
+    # Card data comes from the VendorCard read model; only active vendors have one
+    return (
+        Vendor.objects.filter(id__in=ids, card__isnull=False)
+        .only('id', 'business_name')
+        .select_related('card')
+    )
+
+
+def _load_events(ids):
+    return (
+        Event.objects.filter(id__in=ids)
+        .only('id', 'event_name', 'event_pix', 'event_start_date', 'event_end_date')
+        .annotate(excerpt=Substr('event_description', 1, EXCERPT_LENGTH))
+    )
+
+
+def _load_articles(ids):
+    # Excerpt and lead image are stored on the article (see webapp.article_meta)
+    return article_meta.listing(Article.objects.filter(id__in=ids))
+
+
+def _load_tours(ids):
+    return (
+        Tour.objects.filter(id__in=ids)
+        .select_related('summary')
+        .only('id', 'name', 'tour_type', 'tour_pic', 'summary__stop_count')
+        .annotate(excerpt=Substr('description', 1, EXCERPT_LENGTH))
+    )
+
+
+# ===== CARD BUILDERS (no queries) =====
+
+def card_result(card, url_for):
+    """Result dict for a VendorCard"""
+    if card.vendor_type == 'restaurant':
+        url = url_for('webapp:restaurant_detail', card.vendor_id)
+    else:
+        url = url_for('webapp:food_stall_detail', card.vendor_id)
+    return {
+        'type': 'vendor',
+        'vendor_type': card.vendor_type,
+        'object_id': card.vendor_id,
+        'title': card.business_name,
+        'description': _excerpt(card.excerpt),
+        'url': url,
+        'image_url': card.image_url or None,
+        'category': 'Dining',
+        'subtitle': card.cuisines or "Not specified",
+    }
+
+
+def _vendor_card(vendor, url_for):
+    return card_result(vendor.card, url_for)
+
+
+def _event_card(event, url_for):
+    return {
+        'type': 'event',
+        'object_id': event.id,
+        'title': event.event_name,
+        'description': _excerpt(event.excerpt),
+        'url': url_for('webapp:culinary_event_detail', event.id),
+        'image_url': event.event_pix.url if event.event_pix else None,
+        'category': 'Events',
+        'subtitle': event.display_date_range,
+    }
+
+
+def _article_card(article, url_for):
+    lead_image = article.lead_image
+    return {
+        'type': 'article',
+        'object_id': article.id,
+        'slug': article.slug,
+        'title': article.title,
+        'description': _excerpt(article.excerpt),
+        'url': url_for('webapp:article_detail', article.slug),
+        'image_url': lead_image.image.url if lead_image else None,
+        'category': 'Articles',
+        'subtitle': f"By {article.author_name}",
+    }
+
+
+def _tour_card(tour, url_for):
+    return {
+        'type': 'tour',
+        'object_id': tour.id,
+        'title': tour.name,
+        'description': _excerpt(tour.excerpt),
+        'url': url_for('webapp:tour_detail', tour.id),
+        'image_url': tour.tour_pic.url if tour.tour_pic else None,
+        'category': 'Tours',
+        'subtitle': tour.type_display,
+        'itinerary_count': tour.itinerary_count,
+    }
+
+
+# Display order of the primary tier: (doc_type, loader, card builder,
+# name/title field, relevance labels for tiers 0, 1 and 2)
+HYDRATORS = [
+    ('vendor', _load_vendors, _vendor_card, 'business_name', ('primary', 'exact_name', 'exact_other')),
+    ('event', _load_events, _event_card, 'event_name', ('primary', 'exact_name', 'exact_other')),
+    ('article', _load_articles, _article_card, 'title', ('primary', 'exact_title', 'exact_content')),
+    ('tour', _load_tours, _tour_card, 'name', ('primary', 'exact_name', 'exact_other')),
+]
+HYDRATORS_BY_TYPE = {hydrator[0]: hydrator for hydrator in HYDRATORS}
+
+
+def _ranked(queryset, hits, doc_type, name_field):
+    """Annotate tier, relevance and sort_name and order by the ranking key"""
+    primary_ids = hits.primary[doc_type]
+    name_ids = [object_id for object_id, in_name in hits.secondary[doc_type].items() if in_name]
+    whens = []
+    if primary_ids:
+        whens.append(When(id__in=primary_ids, then=Value(0)))
+    if name_ids:
+        whens.append(When(id__in=name_ids, then=Value(1)))
+    return queryset.annotate(
+        tier=Case(*whens, default=Value(2), output_field=IntegerField()),
+        relevance=hits.ranking.get(doc_type, Value(0.0, output_field=FloatField())),
+        sort_name=Lower(name_field),
+    ).order_by('tier', '-relevance', 'sort_name', 'id')
+
+
+def load_page(hits, doc_type, after=None, limit=None, url_for=None):
+    """
+    Load one page of result cards for a listing type.
+
+    `after` is the (tier, relevance, sort_name, id) key of the last card
+    already shown.
+    Returns (cards, next_key) where next_key is None on the last page.
+    """
+    _, load, build_card, name_field, labels = HYDRATORS_BY_TYPE[doc_type]
+    ids = set(hits.primary[doc_type]) | set(hits.secondary[doc_type])
+    if not ids:
+        return [], None
+
+    queryset = _ranked(load(ids), hits, doc_type, name_field)
+    if after:
+        tier, relevance, sort_name, last_id = after
+        queryset = queryset.filter(
+            Q(tier__gt=tier) |
+            Q(tier=tier, relevance__lt=relevance) |
+            Q(tier=tier, relevance=relevance, sort_name__gt=sort_name) |
+            Q(tier=tier, relevance=relevance, sort_name=sort_name, id__gt=last_id)
+        )
+    rows = list(queryset if limit is None else queryset[:limit + 1])
+
+    next_key = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_key = (last.tier, last.relevance, last.sort_name, last.id)
+
+    url_for = url_for or UrlBuilder()
+    cards = []
+    for obj in rows:
+        card = build_card(obj, url_for)
+        card['relevance'] = labels[obj.tier]
+        cards.append(card)
+    return cards, next_key
+
+
+def load_cards(doc_type, ids, url_for=None):
+    """Result cards for `ids` in the given order (listing pages' JSON variant)"""
+    _, load, build_card, _, _ = HYDRATORS_BY_TYPE[doc_type]
+    url_for = url_for or UrlBuilder()
+    objects = {obj.id: obj for obj in load(ids)}
+    return [build_card(objects[object_id], url_for) for object_id in ids if object_id in objects]
+
+
+def vendor_results(cards):
+    """Result dicts for VendorCards already loaded (listing pages' JSON variant)"""
+    url_for = UrlBuilder()
+    return [card_result(card, url_for) for card in cards]
+
+
+def split_tiers(cards):
+    """
+    Split cards into {'primary': [...], 'secondary': [...]}.
+
+    Secondary results put phrase matches in the name/title first.
+    """
+    results = {'primary': [], 'secondary': []}
+    for card in cards:
+        tier = 'primary' if card['relevance'] == 'primary' else 'secondary'
+        results[tier].append(card)
+    results['secondary'].sort(key=lambda x: (
+        0 if x['relevance'] in ['exact_name', 'exact_title'] else 1,
+        x['title'].lower()
+    ))
+    return results
+
+
+def hydrate(hits):
+    """Build {'primary': [...], 'secondary': [...]} result dicts for every hit"""
+    url_for = UrlBuilder()
+    cards = []
+    for doc_type, *_ in HYDRATORS:
+        page, _ = load_page(hits, doc_type, url_for=url_for)
+        cards.extend(page)
+    return split_tiers(cards)
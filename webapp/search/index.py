@@ -0,0 +1,248 @@
+# webapp/search/index.py
+"""
+Token-level inverted index over Vendor, Event, Article and Tour.
+
+Every listing is split into three field groups:
+  - name: business_name / event_name / title / name
+  - body: description, content and address text
+  - tags: cuisine names (vendors, events) and keyword names (articles)
+
+Each token is stored with its position so the secondary tier can check
+exact phrases without loading the listing text. The index is kept current
+by webapp.signals and can be rebuilt with `manage.py rebuild_search_index`.
+"""
+
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+
+from vendors.models import Vendor, Event
+from tours.models import Tour
+from webapp.models import Article, SearchToken
+from . import metrics
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TOKEN_LENGTH = 64
+# Shortest last query word matched as a prefix; shorter ones must match exactly
+MIN_PREFIX_LENGTH = 3
+BATCH_SIZE = 1000
+
+DOC_TYPES = {
+    Vendor: 'vendor',
+    Event: 'event',
+    Article: 'article',
+    Tour: 'tour',
+}
+
+
+def tokenize(text):
+    """Lowercase text and split it into word tokens"""
+    if not text:
+        return []
+    return [token[:MAX_TOKEN_LENGTH] for token in TOKEN_RE.findall(text.lower())]
+
+
+def doc_type_for(instance):
+    """Return the index doc_type for a model instance (or None if not indexed)"""
+    return DOC_TYPES.get(type(instance))
+
+
+# ===== DOCUMENT FIELDS =====
+
+def _document_fields(instance):
+    """Return {field_group: [text, ...]} for an indexed instance"""
+    if isinstance(instance, Vendor):
+        return {
+            'name': [instance.business_name],
+            'body': [instance.description, instance.address],
+            'tags': [c.name for c in instance.cuisine_types.all()],
+        }
+    if isinstance(instance, Event):
+        return {
+            'name': [instance.event_name],
+            'body': [instance.event_description, instance.event_address],
+            'tags': [c.name for c in instance.event_cuisine.all()],
+        }
+    if isinstance(instance, Article):
+        return {
+            'name': [instance.title],
+            'body': [instance.content],
+            'tags': [k.name for k in instance.keywords.all()],
+        }
+    if isinstance(instance, Tour):
+        return {
+            'name': [instance.name],
+            'body': [instance.description],
+            'tags': [],
+        }
+    return {}
+
+
+def _build_tokens(instance):
+    """Build unsaved SearchToken rows for an instance"""
+    doc_type = doc_type_for(instance)
+    rows = []
+    for field, texts in _document_fields(instance).items():
+        position = 0
+        for text in texts:
+            for token in tokenize(text):
+                rows.append(SearchToken(
+                    token=token,
+                    doc_type=doc_type,
+                    object_id=instance.pk,
+                    field=field,
+                    position=position,
+                ))
+                position += 1
+            # Leave a gap so a phrase can never span two separate fields
+            position += 1
+    return rows
+
+
+# ===== INDEX MAINTENANCE =====
+
+def index_document(instance):
+    """(Re)index a single instance, replacing any existing tokens"""
+    doc_type = doc_type_for(instance)
+    if doc_type is None or instance.pk is None:
+        return
+    with transaction.atomic():
+        SearchToken.objects.filter(doc_type=doc_type, object_id=instance.pk).delete()
+        SearchToken.objects.bulk_create(_build_tokens(instance), batch_size=BATCH_SIZE)
+
+
+def remove_document(doc_type, object_id):
+    """Drop all tokens for a listing"""
+    SearchToken.objects.filter(doc_type=doc_type, object_id=object_id).delete()
+
+
+def reindex_queryset(queryset):
+    """Reindex every instance in a queryset"""
+    for instance in queryset:
+        index_document(instance)
+
+
+def rebuild(doc_types=None):
+    """Rebuild the index from scratch. Returns {doc_type: listings indexed}"""
+    prefetch = {
+        Vendor: ['cuisine_types'],
+        Event: ['event_cuisine'],
+        Article: ['keywords'],
+        Tour: [],
+    }
+    counts = {}
+    for model, doc_type in DOC_TYPES.items():
+        if doc_types and doc_type not in doc_types:
+            continue
+        counts[doc_type] = 0
+        with transaction.atomic():
+            SearchToken.objects.filter(doc_type=doc_type).delete()
+            batch = []
+            queryset = model.objects.prefetch_related(*prefetch[model]).order_by('pk')
+            for instance in queryset.iterator(chunk_size=BATCH_SIZE):
+                batch.extend(_build_tokens(instance))
+                counts[doc_type] += 1
+                if len(batch) >= BATCH_SIZE:
+                    SearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+                    batch = []
+            SearchToken.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+    return counts
+
+
+# ===== QUERYING =====
+
+class SearchHits:
+    """Matched listing ids per doc_type for both search tiers"""
+
+    def __init__(self):
+        # primary: {doc_type: set(ids)} - every word found in the name/title
+        self.primary = defaultdict(set)
+        # secondary: {doc_type: {id: matched_in_name}} - exact phrase anywhere
+        self.secondary = defaultdict(dict)
+        # ranking: {doc_type: expression} - engine relevance used to order
+        # hits within a tier (see backends.py); by name when missing
+        self.ranking = {}
+
+    def __bool__(self):
+        return any(self.primary.values()) or any(self.secondary.values())
+
+
+def _matches(token, term, prefix):
+    return token.startswith(term) if prefix else token == term
+
+
+def _phrase_at(positions, start, terms, prefix):
+    """Check the phrase starting at `start`: inner words exact, last word as prefix if allowed"""
+    last = len(terms) - 1
+    for offset, term in enumerate(terms):
+        token = positions.get(start + offset)
+        if token is None:
+            return False
+        if not _matches(token, term, prefix and offset == last):
+            return False
+    return True
+
+
+def lookup(query):
+    """
+    Resolve a raw query string against the index.
+
+    Primary tier: every query word is a word of the name/title, the last
+    one as a prefix (the user may still be typing it).
+    Secondary tier: the whole query appears as a phrase in any field group
+    (listings already in the primary tier are left out).
+
+    Only the last word is read by prefix, and only from MIN_PREFIX_LENGTH
+    characters, so a short word never pulls in the postings of every
+    token that starts with it.
+    """
+    hits = SearchHits()
+    terms = tokenize(query)
+    if not terms:
+        return hits
+    last = terms[-1]
+    prefix = len(last) >= MIN_PREFIX_LENGTH
+
+    # The postings read is shared by both tiers and is timed as primary
+    with metrics.phase('primary'):
+        exact = set(terms) if not prefix else set(terms[:-1])
+        condition = Q(token__in=exact) if exact else Q()
+        if prefix:
+            condition |= Q(token__startswith=last)
+        postings = SearchToken.objects.filter(condition).values_list(
+            'doc_type', 'object_id', 'field', 'position', 'token'
+        )
+
+        # term -> docs that have a name token starting with it
+        name_docs = defaultdict(set)
+        # (doc_type, id, field) -> {position: token}
+        fields = defaultdict(dict)
+        for doc_type, object_id, field, position, token in postings:
+            doc = (doc_type, object_id)
+            if field == 'name':
+                for term in terms:
+                    if token == term or (prefix and term == last and token.startswith(term)):
+                        name_docs[term].add(doc)
+            fields[(doc_type, object_id, field)][position] = token
+
+        primary_docs = set.intersection(*(name_docs[term] for term in terms))
+        for doc_type, object_id in primary_docs:
+            hits.primary[doc_type].add(object_id)
+
+    with metrics.phase('secondary'):
+        first = terms[0]
+        single = len(terms) == 1
+        for (doc_type, object_id, field), positions in fields.items():
+            if (doc_type, object_id) in primary_docs:
+                continue
+            for position, token in positions.items():
+                if not _matches(token, first, prefix and single):
+                    continue
+                if _phrase_at(positions, position, terms, prefix):
+                    in_name = hits.secondary[doc_type].get(object_id, False)
+                    hits.secondary[doc_type][object_id] = in_name or field == 'name'
+                    break
+
+    return hits
@@ -0,0 +1,166 @@
+# webapp/search/metrics.py
+"""
+Per-phase search timings.
+
+webapp.views.search wraps each request in a SearchTrace. Code anywhere
+below it times its work with `with metrics.phase('primary'):`. Outside a
+trace, phase() does nothing. The phases are:
+  primary, secondary - backend queries for each tier (skipped on a
+                       result-cache hit)
+  fuzzy              - trigram fallback when nothing matched exactly
+  hydration          - loading the result cards
+  render             - template rendering
+  total              - the whole request
+
+Finished traces go into a bounded in-process ring buffer. Every
+SEARCH_METRICS_FLUSH_SIZE samples the buffer is merged into SearchRollup
+rows, one per (hour, normalized query, phase). Each row holds a latency
+histogram, so `manage.py search_report` can estimate percentiles from
+the rollups alone. Samples still in the buffer when a process exits are
+lost.
+"""
+
+import bisect
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from webapp.models import SearchRollup
+
+# Histogram upper bounds in milliseconds; the last bucket is open-ended
+BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+
+_local = threading.local()
+_lock = threading.Lock()
+_buffer = deque(maxlen=settings.SEARCH_METRICS_BUFFER_SIZE)
+
+
+class SearchTrace:
+    """Phase timings for one search request (query already normalized)"""
+
+    def __init__(self, query):
+        self.query = query[:255]
+        self.phases = defaultdict(float)
+        self.zero_results = False
+        self._started = None
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += (time.perf_counter() - started) * 1000
+
+    def __enter__(self):
+        _local.trace = self
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _local.trace = None
+        if exc_type is None:
+            self.phases['total'] = (time.perf_counter() - self._started) * 1000
+            record(self)
+        return False
+
+
+def phase(name):
+    """Time a block against the current thread's trace, if there is one"""
+    trace = getattr(_local, 'trace', None)
+    return trace.phase(name) if trace is not None else nullcontext()
+
+
+def record(trace):
+    """Buffer a finished trace and flush once a batch has built up"""
+    sample = (timezone.now(), trace.query, dict(trace.phases), trace.zero_results)
+    with _lock:
+        _buffer.append(sample)
+        if len(_buffer) < settings.SEARCH_METRICS_FLUSH_SIZE:
+            return
+        samples = list(_buffer)
+        _buffer.clear()
+    _write(samples)
+
+
+def flush():
+    """Write every buffered sample to the rollup table"""
+    with _lock:
+        samples = list(_buffer)
+        _buffer.clear()
+    _write(samples)
+
+
+def bucket_index(ms):
+    return bisect.bisect_left(BUCKETS_MS, ms)
+
+
+def _write(samples):
+    if not samples:
+        return
+    # (period, query, phase) -> [count, zero_results, total_ms, max_ms, histogram]
+    batch = {}
+    for recorded_at, query, phases, zero_results in samples:
+        period = recorded_at.replace(minute=0, second=0, microsecond=0)
+        for name, ms in phases.items():
+            totals = batch.setdefault((period, query, name), [0, 0, 0.0, 0.0, [0] * len(BUCKETS_MS)])
+            totals[0] += 1
+            totals[1] += int(zero_results)
+            totals[2] += ms
+            totals[3] = max(totals[3], ms)
+            totals[4][bucket_index(ms)] += 1
+
+    try:
+        _merge(batch)
+    except IntegrityError:
+        # Another process created some of the same rows first
+        _merge(batch)
+
+
+def _merge(batch):
+    periods = {key[0] for key in batch}
+    queries = {key[1] for key in batch}
+    with transaction.atomic():
+        existing = {
+            (row.period, row.query, row.phase): row
+            for row in SearchRollup.objects.select_for_update().filter(
+                period__in=periods, query__in=queries
+            )
+        }
+        updated, created = [], []
+        for key, (count, zero_results, total_ms, max_ms, histogram) in batch.items():
+            row = existing.get(key)
+            if row is None:
+                period, query, name = key
+                row = SearchRollup(period=period, query=query, phase=name, histogram=[0] * len(BUCKETS_MS))
+                created.append(row)
+            else:
+                updated.append(row)
+            row.count += count
+            row.zero_results += zero_results
+            row.total_ms += total_ms
+            row.max_ms = max(row.max_ms, max_ms)
+            row.histogram = [a + b for a, b in zip(row.histogram, histogram)]
+        SearchRollup.objects.bulk_create(created)
+        SearchRollup.objects.bulk_update(
+            updated, ['count', 'zero_results', 'total_ms', 'max_ms', 'histogram']
+        )
+
+
+def percentile(histogram, fraction):
+    """Upper bucket bound below which `fraction` of the samples fall"""
+    total = sum(histogram)
+    if not total:
+        return None
+    needed = fraction * total
+    seen = 0
+    for bound, count in zip(BUCKETS_MS, histogram):
+        seen += count
+        if seen >= needed:
+            return bound
+    return BUCKETS_MS[-1]
@@ -0,0 +1,89 @@
+# webapp/search/pagination.py
+"""
+Per-category pages for search results.
+
+Each category (Dining, Events, Articles, Tours) is paged on its own with an
+opaque cursor, so a broad query only ever loads and renders a bounded
+number of cards per category. Page sizes come from settings:
+
+    SEARCH_PAGE_SIZE      - default cards per category (12)
+    SEARCH_MAX_PAGE_SIZE  - upper bound for a requested ?limit= (50)
+"""
+
+import base64
+import json
+
+from django.conf import settings
+
+from .hydration import load_page, UrlBuilder
+
+# (category key, index doc_type, display label)
+CATEGORIES = [
+    ('dining', 'vendor', 'Dining'),
+    ('events', 'event', 'Events'),
+    ('articles', 'article', 'Articles'),
+    ('tours', 'tour', 'Tours'),
+]
+CATEGORY_KEYS = [key for key, _, _ in CATEGORIES]
+
+
+def page_size(requested=None):
+    """Clamp a requested page size to the configured bounds"""
+    default = getattr(settings, 'SEARCH_PAGE_SIZE', 12)
+    maximum = getattr(settings, 'SEARCH_MAX_PAGE_SIZE', 50)
+    try:
+        size = int(requested)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, maximum))
+
+
+def encode_cursor(key):
+    """Encode a (tier, relevance, sort_name, id) key as a URL-safe string"""
+    if key is None:
+        return None
+    raw = json.dumps(list(key), separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back to a ranking key, or None if invalid"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        tier, relevance, sort_name, object_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(tier), float(relevance), str(sort_name), int(object_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def category_pages(hits, cursors=None, limit=None, categories=None):
+    """
+    Load one page per category.
+
+    `cursors` maps category key -> cursor string for the page to load.
+    Returns a list of dicts (key, label, total, results, next_cursor)
+    in display order.
+    """
+    cursors = cursors or {}
+    url_for = UrlBuilder()
+    pages = []
+    for key, doc_type, label in CATEGORIES:
+        if categories and key not in categories:
+            continue
+        total = len(hits.primary[doc_type]) + len(hits.secondary[doc_type])
+        cards, next_key = load_page(
+            hits, doc_type,
+            after=decode_cursor(cursors.get(key)),
+            limit=limit,
+            url_for=url_for,
+        )
+        pages.append({
+            'key': key,
+            'label': label,
+            'total': total,
+            'results': cards,
+            'next_cursor': encode_cursor(next_key),
+        })
+    return pages
@@ -0,0 +1,109 @@
+# webapp/search/result_cache.py
+"""
+Cache of search hits per normalized query.
+
+Popular queries ("chicken rice", "hawker", "halal") are answered from the
+Django cache instead of the search backend. Each doc_type has a generation
+counter in the cache that webapp.signals bumps on every write to its model
+(and to the cuisines/keywords it is searched by). A cached entry stores the
+generations it was computed under, so one get_many() returns both the entry
+and the current generations, and any edit since makes the entry stale.
+
+Generations are bumped once the writing transaction commits: bumping
+earlier would let a concurrent reader cache the pre-commit state under
+the new generation. Until then the writer's own connection sees rows no
+one else can (and that a rollback discards), so its lookups bypass the
+cache.
+
+The counters only reach every worker through a shared cache backend
+(settings.CACHES); on a process-local cache other workers keep serving
+their entries until SEARCH_RESULT_CACHE_TIMEOUT.
+
+Writes that skip signals (queryset.update(), raw SQL) must call bump().
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from .backends import get_backend
+from .index import DOC_TYPES
+
+GENERATIONS = tuple(DOC_TYPES.values())
+
+
+def normalize(query):
+    """Lowercase and collapse whitespace"""
+    return ' '.join(query.lower().split())
+
+
+def _generation_key(doc_type):
+    return f'search:generation:{doc_type}'
+
+
+def _result_key(backend_name, normalized):
+    digest = hashlib.md5(normalized.encode('utf-8')).hexdigest()
+    return f'search:results:{backend_name}:{digest}'
+
+
+def _start_generation(key):
+    # A fresh counter must not collide with one that was evicted, so it
+    # starts from the clock rather than from 1
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+class _Bump:
+    """on_commit callback bumping the generations of some doc_types"""
+
+    def __init__(self, doc_types):
+        self.doc_types = doc_types
+        self.done = False
+
+    def __call__(self):
+        for doc_type in self.doc_types:
+            key = _generation_key(doc_type)
+            try:
+                cache.incr(key)
+            except ValueError:
+                _start_generation(key)
+        self.done = True
+
+
+def bump(*doc_types):
+    """Invalidate every cached query that could include these doc_types, on commit"""
+    transaction.on_commit(_Bump(doc_types))
+
+
+def _pending_bump():
+    """True while this connection has uncommitted writes that will bump a generation"""
+    return any(
+        isinstance(callback, _Bump) and not callback.done
+        for _, callback, _ in connection.run_on_commit
+    )
+
+
+def lookup(query, backend=None):
+    """SearchHits for a query, from the cache when still current"""
+    backend = backend or get_backend()
+    if _pending_bump():
+        return backend.lookup(normalize(query))
+    normalized = normalize(query)
+    result_key = _result_key(backend.name, normalized)
+    generation_keys = [_generation_key(doc_type) for doc_type in GENERATIONS]
+
+    values = cache.get_many([result_key, *generation_keys])
+    generations = tuple(
+        values[key] if key in values else _start_generation(key)
+        for key in generation_keys
+    )
+    cached = values.get(result_key)
+    if cached is not None and cached[0] == generations:
+        return cached[1]
+
+    hits = backend.lookup(normalized)
+    cache.set(result_key, (generations, hits), settings.SEARCH_RESULT_CACHE_TIMEOUT)
+    return hits
@@ -0,0 +1,126 @@
+# webapp/search/versioned.py
+"""
+Process-local search structures kept in step across worker processes.
+
+Each structure is built lazily from the database and then patched in
+place by signal handlers. Every change bumps a version number in the
+Django cache; a process whose copy is older than the cached version
+rebuilds it on next use. Edits made in one worker therefore reach the
+others only when settings.CACHES is a backend shared between them. On
+the process-local default every worker keeps its own version and sees
+only its own edits (`manage.py check --deploy` warns about this).
+
+apply(change, shared=False) patches this process's copy without bumping
+the version, for changes too minor to make every other process rebuild
+(those pick them up on their next rebuild).
+
+Changes and invalidations run once the writing transaction commits.
+Bumping earlier would let another process rebuild from the pre-commit
+rows and keep that copy under the new version, and a rollback would
+leave this process's copy patched with rows that never existed. While a
+change is pending, current() reports no up-to-date copy.
+"""
+
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+class _Deferred:
+    """on_commit callback running one change to a VersionedStructure"""
+
+    def __init__(self, structure, run):
+        self.structure = structure
+        self.run = run
+        self.done = False
+
+    def __call__(self):
+        self.run()
+        self.done = True
+
+
+class VersionedStructure:
+    """Lazily built, in-place updated structure with a shared cache version"""
+
+    def __init__(self, name, build):
+        self.cache_key = f'search:{name}:version'
+        self.build = build
+        self._lock = threading.Lock()
+        self._structure = None
+        self._version = None
+
+    def _shared_version(self):
+        # A restarted counter (evicted, cache cleared) must not match a copy
+        # built under the old one, so it starts from the clock rather than 1
+        cache.add(self.cache_key, time.time_ns(), None)
+        return cache.get(self.cache_key)
+
+    def _bump(self):
+        try:
+            return cache.incr(self.cache_key)
+        except ValueError:
+            version = time.time_ns()
+            cache.set(self.cache_key, version, None)
+            return version
+
+    def get(self):
+        """Return this process's copy, rebuilding it if it is out of date"""
+        version = self._shared_version()
+        structure = self._structure
+        if structure is not None and self._version == version:
+            return structure
+        with self._lock:
+            if self._structure is None or self._version != version:
+                self._structure = self.build()
+                self._version = version
+            return self._structure
+
+    def _pending(self):
+        """True while this connection has uncommitted changes to this structure"""
+        return any(
+            isinstance(callback, _Deferred) and callback.structure is self and not callback.done
+            for _, callback, _ in connection.run_on_commit
+        )
+
+    def current(self):
+        """This process's copy if it is up to date, else None (never builds)"""
+        structure = self._structure
+        if structure is not None and not self._pending() and self._version == self._shared_version():
+            return structure
+        return None
+
+    def apply(self, change, shared=True):
+        """
+        Apply change(structure) to this process's copy and bump the version, on commit.
+
+        If the copy is missing or already behind another process it is
+        dropped instead and rebuilt on next use. With shared=False only a
+        present copy is patched and the version is left alone.
+        """
+        transaction.on_commit(_Deferred(self, lambda: self._apply(change, shared)))
+
+    def _apply(self, change, shared):
+        with self._lock:
+            if not shared:
+                if self._structure is not None:
+                    change(self._structure)
+                return
+            previous = self._version
+            version = self._bump()
+            if self._structure is None or previous != version - 1:
+                self._structure = None
+                return
+            change(self._structure)
+            self._version = version
+
+    def invalidate(self):
+        """Force every process to rebuild on next use, on commit"""
+        transaction.on_commit(_Deferred(self, self._invalidate))
+
+    def _invalidate(self):
+        with self._lock:
+            self._bump()
+            self._structure = None
+            self._version = None
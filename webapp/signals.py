@@ -0,0 +1,499 @@
+# webapp/signals.py
+"""
+Signal handlers that keep webapp's derived data in sync with the models
+they are built from.
+"""
+
+from django.db import transaction
+from django.db.models import Subquery
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from vendors import cards as vendor_cards
+from vendors import hours as vendor_hours
+from vendors import occurrences as event_occurrences
+from vendors.models import Vendor, Event, CuisineType, MenuItem
+from tours import summaries as tour_summaries
+from tours.models import Tour, TourItinerary
+from .models import Article, ArticleImage, ArticleKeyword, Keyword, VendorRating
+from . import article_keywords
+from . import listing_filters
+from . import ratings
+from . import vendor_detail
+from .search import autocomplete
+from .search import fuzzy
+from .search import index as search_index
+from .search import result_cache
+
+
+# ===== VENDOR RATING AGGREGATES =====
+
+@receiver(post_save, sender=VendorRating)
+def refresh_vendor_ratings(sender, instance, **kwargs):
+    ratings.refresh(instance.vendor_id)
+    # Keep a vendor already loaded through the rating (rating.vendor) current
+    if VendorRating.vendor.is_cached(instance):
+        instance.vendor.refresh_from_db(fields=ratings.RATING_FIELDS)
+
+
+@receiver(post_delete, sender=VendorRating)
+def refresh_unrated_vendor(sender, instance, **kwargs):
+    # After commit: when the vendor itself is being deleted, refreshing it
+    # mid-cascade would recreate rows (its card) that point at it
+    vendor_id = instance.vendor_id
+    transaction.on_commit(lambda: ratings.refresh(vendor_id))
+
+
+# ===== SEARCH INDEX =====
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Tour)
+def index_listing(sender, instance, **kwargs):
+    search_index.index_document(instance)
+
+
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Tour)
+def unindex_listing(sender, instance, **kwargs):
+    search_index.remove_document(search_index.doc_type_for(instance), instance.pk)
+
+
+@receiver(post_save, sender=ArticleKeyword)
+@receiver(post_delete, sender=ArticleKeyword)
+def reindex_article_keywords(sender, instance, **kwargs):
+    article = Article.objects.filter(pk=instance.article_id).first()
+    if article:
+        search_index.index_document(article)
+
+
+def _reindex_tagged(instance, action, reverse, model, pk_set, related_name):
+    """Reindex listings after a cuisine/keyword m2m change on either side"""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            search_index.index_document(instance)
+        return
+    # Reverse side: instance is the CuisineType / Keyword
+    if action == 'pre_clear':
+        instance._search_reindex_ids = list(
+            getattr(instance, related_name).values_list('pk', flat=True)
+        )
+    elif action in ('post_add', 'post_remove'):
+        search_index.reindex_queryset(model.objects.filter(pk__in=pk_set))
+    elif action == 'post_clear':
+        ids = getattr(instance, '_search_reindex_ids', [])
+        search_index.reindex_queryset(model.objects.filter(pk__in=ids))
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def reindex_vendor_cuisines(sender, instance, action, reverse, pk_set, **kwargs):
+    _reindex_tagged(instance, action, reverse, Vendor, pk_set, 'vendors')
+
+
+@receiver(m2m_changed, sender=Event.event_cuisine.through)
+def reindex_event_cuisines(sender, instance, action, reverse, pk_set, **kwargs):
+    _reindex_tagged(instance, action, reverse, Event, pk_set, 'events')
+
+
+@receiver(m2m_changed, sender=Article.keywords.through)
+def reindex_article_keyword_set(sender, instance, action, reverse, pk_set, **kwargs):
+    _reindex_tagged(instance, action, reverse, Article, pk_set, 'articles')
+
+
+@receiver(post_save, sender=CuisineType)
+def reindex_renamed_cuisine(sender, instance, created, **kwargs):
+    if not created:
+        search_index.reindex_queryset(instance.vendors.all())
+        search_index.reindex_queryset(instance.events.all())
+
+
+@receiver(post_save, sender=Keyword)
+def reindex_renamed_keyword(sender, instance, created, **kwargs):
+    if not created:
+        search_index.reindex_queryset(instance.articles.all())
+
+
+@receiver(pre_delete, sender=CuisineType)
+def remember_cuisine_listings(sender, instance, **kwargs):
+    instance._search_reindex = (
+        list(instance.vendors.values_list('pk', flat=True)),
+        list(instance.events.values_list('pk', flat=True)),
+    )
+
+
+@receiver(post_delete, sender=CuisineType)
+def reindex_deleted_cuisine(sender, instance, **kwargs):
+    vendor_ids, event_ids = getattr(instance, '_search_reindex', ([], []))
+    search_index.reindex_queryset(Vendor.objects.filter(pk__in=vendor_ids))
+    search_index.reindex_queryset(Event.objects.filter(pk__in=event_ids))
+
+
+# ===== AUTOCOMPLETE TRIE =====
+
+@receiver(post_save, sender=Vendor)
+def autocomplete_vendor(sender, instance, **kwargs):
+    if instance.is_active:
+        autocomplete.update(autocomplete.vendor_suggestion(instance))
+    else:
+        autocomplete.update(remove_key=('vendor', instance.pk))
+
+
+@receiver(post_save, sender=Event)
+def autocomplete_event(sender, instance, **kwargs):
+    if instance.is_active:
+        autocomplete.update(autocomplete.event_suggestion(instance))
+    else:
+        autocomplete.update(remove_key=('event', instance.pk))
+
+
+@receiver(post_save, sender=Tour)
+def autocomplete_tour(sender, instance, **kwargs):
+    if instance.is_active:
+        autocomplete.update(autocomplete.tour_suggestion(instance))
+    else:
+        autocomplete.update(remove_key=('tour', instance.pk))
+
+
+@receiver(post_save, sender=Article)
+def autocomplete_article(sender, instance, **kwargs):
+    autocomplete.update(autocomplete.article_suggestion(instance))
+
+
+@receiver(post_save, sender=CuisineType)
+def autocomplete_cuisine(sender, instance, **kwargs):
+    autocomplete.update(autocomplete.cuisine_suggestion(instance))
+
+
+@receiver(post_save, sender=Keyword)
+def autocomplete_keyword(sender, instance, **kwargs):
+    autocomplete.update(autocomplete.keyword_suggestion(instance))
+
+
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Tour)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=CuisineType)
+@receiver(post_delete, sender=Keyword)
+def autocomplete_remove(sender, instance, **kwargs):
+    autocomplete.update(remove_key=(autocomplete.KINDS[sender], instance.pk))
+
+
+@receiver(ratings.ratings_changed)
+def autocomplete_vendor_popularity(sender, vendor_id, **kwargs):
+    # Popularity only: not worth a rebuild in every other process
+    vendor = Vendor.objects.filter(pk=vendor_id, is_active=True).first()
+    if vendor:
+        autocomplete.update(autocomplete.vendor_suggestion(vendor), shared=False)
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def autocomplete_cuisine_popularity(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        cuisines = [instance]
+    elif pk_set:
+        cuisines = CuisineType.objects.filter(pk__in=pk_set)
+    else:
+        # post_clear on the vendor side does not say which cuisines were removed
+        autocomplete.invalidate()
+        return
+    for cuisine in cuisines:
+        autocomplete.update(autocomplete.cuisine_suggestion(cuisine))
+
+
+@receiver(post_save, sender=ArticleKeyword)
+@receiver(post_delete, sender=ArticleKeyword)
+def autocomplete_keyword_popularity(sender, instance, **kwargs):
+    for model, pk, build in (
+        (Article, instance.article_id, autocomplete.article_suggestion),
+        (Keyword, instance.keyword_id, autocomplete.keyword_suggestion),
+    ):
+        obj = model.objects.filter(pk=pk).first()
+        if obj:
+            autocomplete.update(build(obj))
+
+
+@receiver(m2m_changed, sender=Article.keywords.through)
+def autocomplete_keyword_set_popularity(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        autocomplete.invalidate()
+
+
+# ===== FUZZY TRIGRAM INDEX =====
+
+@receiver(post_save, sender=Vendor)
+def fuzzy_vendor(sender, instance, **kwargs):
+    fuzzy.update(fuzzy.vendor_entry(instance))
+
+
+@receiver(post_save, sender=MenuItem)
+def fuzzy_dish(sender, instance, **kwargs):
+    fuzzy.update(fuzzy.dish_entry(instance))
+
+
+@receiver(post_save, sender=Event)
+def fuzzy_event(sender, instance, **kwargs):
+    fuzzy.update(fuzzy.event_entry(instance))
+
+
+@receiver(post_save, sender=Article)
+def fuzzy_article(sender, instance, **kwargs):
+    fuzzy.update(fuzzy.article_entry(instance))
+
+
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=MenuItem)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Article)
+def fuzzy_remove(sender, instance, **kwargs):
+    kind = 'dish' if sender is MenuItem else search_index.doc_type_for(instance)
+    fuzzy.update(remove_key=(kind, instance.pk))
+
+
+# ===== SEARCH RESULT CACHE =====
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_save, sender=Event)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_delete, sender=Event)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Tour)
+def expire_listing_results(sender, instance, **kwargs):
+    result_cache.bump(search_index.doc_type_for(instance))
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+@receiver(m2m_changed, sender=Event.event_cuisine.through)
+@receiver(m2m_changed, sender=Article.keywords.through)
+def expire_tagged_results(sender, action, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if sender is Article.keywords.through:
+        result_cache.bump('article')
+    elif sender is Event.event_cuisine.through:
+        result_cache.bump('event')
+    else:
+        result_cache.bump('vendor')
+
+
+@receiver(post_save, sender=CuisineType)
+@receiver(post_delete, sender=CuisineType)
+def expire_cuisine_results(sender, **kwargs):
+    result_cache.bump('vendor', 'event')
+
+
+@receiver(post_save, sender=Keyword)
+@receiver(post_delete, sender=Keyword)
+@receiver(post_save, sender=ArticleKeyword)
+@receiver(post_delete, sender=ArticleKeyword)
+def expire_keyword_results(sender, **kwargs):
+    result_cache.bump('article')
+
+
+# ===== ARTICLE LEAD IMAGES =====
+
+@receiver(post_save, sender=ArticleImage)
+@receiver(post_delete, sender=ArticleImage)
+def refresh_article_lead_image(sender, instance, **kwargs):
+    first = ArticleImage.objects.filter(article_id=instance.article_id).order_by('order', 'id').values('id')[:1]
+    Article.objects.filter(pk=instance.article_id).update(lead_image=Subquery(first))
+    result_cache.bump('article')
+
+
+# ===== ARTICLE KEYWORD SETS =====
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=Keyword)
+@receiver(post_delete, sender=Keyword)
+@receiver(post_save, sender=ArticleKeyword)
+@receiver(post_delete, sender=ArticleKeyword)
+def invalidate_article_keywords(sender, **kwargs):
+    article_keywords.invalidate()
+
+
+@receiver(m2m_changed, sender=Article.keywords.through)
+def invalidate_tagged_article_keywords(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        article_keywords.invalidate()
+
+
+# ===== LISTING FILTER SIDEBAR =====
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+@receiver(post_save, sender=CuisineType)
+@receiver(post_delete, sender=CuisineType)
+def expire_listing_filters(sender, **kwargs):
+    listing_filters.invalidate()
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def expire_listing_cuisine_filters(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        listing_filters.invalidate()
+
+
+# ===== VENDOR CARDS =====
+
+@receiver(post_save, sender=Vendor)
+def refresh_vendor_card(sender, instance, **kwargs):
+    vendor_cards.refresh([instance.pk])
+
+
+@receiver(ratings.ratings_changed)
+def refresh_rated_vendor_card(sender, vendor_id, **kwargs):
+    vendor_cards.refresh([vendor_id])
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def refresh_vendor_card_cuisines(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            vendor_cards.refresh([instance.pk])
+    elif action == 'pre_clear':
+        instance._card_refresh_ids = list(instance.vendors.values_list('pk', flat=True))
+    elif action in ('post_add', 'post_remove'):
+        vendor_cards.refresh(pk_set)
+    elif action == 'post_clear':
+        vendor_cards.refresh(getattr(instance, '_card_refresh_ids', []))
+
+
+@receiver(post_save, sender=CuisineType)
+def refresh_renamed_cuisine_cards(sender, instance, created, **kwargs):
+    if not created:
+        vendor_cards.refresh(instance.vendors.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=CuisineType)
+def refresh_deleted_cuisine_cards(sender, instance, **kwargs):
+    # Vendor ids collected by remember_cuisine_listings before the delete
+    vendor_ids, _ = getattr(instance, '_search_reindex', ([], []))
+    vendor_cards.refresh(vendor_ids)
+
+
+# ===== VENDOR DETAIL FRAGMENTS =====
+
+@receiver(post_save, sender=Vendor)
+@receiver(post_delete, sender=Vendor)
+def expire_vendor_detail(sender, instance, **kwargs):
+    vendor_detail.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=MenuItem)
+@receiver(post_delete, sender=MenuItem)
+def expire_menu_vendor_detail(sender, instance, **kwargs):
+    vendor_detail.invalidate([instance.vendor_id])
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def expire_cuisine_vendor_detail(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            vendor_detail.invalidate([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        vendor_detail.invalidate(pk_set)
+    elif action == 'post_clear':
+        # Vendor ids collected by refresh_vendor_card_cuisines on pre_clear
+        vendor_detail.invalidate(getattr(instance, '_card_refresh_ids', []))
+
+
+@receiver(post_save, sender=CuisineType)
+def expire_renamed_cuisine_vendor_detail(sender, instance, created, **kwargs):
+    if not created:
+        vendor_detail.invalidate(instance.vendors.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=CuisineType)
+def expire_deleted_cuisine_vendor_detail(sender, instance, **kwargs):
+    # Vendor ids collected by remember_cuisine_listings before the delete
+    vendor_ids, _ = getattr(instance, '_search_reindex', ([], []))
+    vendor_detail.invalidate(vendor_ids)
+
+
+# ===== OPENING HOURS =====
+
+@receiver(post_save, sender=Vendor)
+def store_opening_intervals(sender, instance, update_fields=None, **kwargs):
+    # Re-parse only when the text may have changed
+    if update_fields is None or 'opening_hours' in update_fields:
+        vendor_hours.store(instance)
+
+
+# ===== EVENT OCCURRENCES =====
+
+@receiver(post_save, sender=Event)
+def refresh_event_occurrences(sender, instance, **kwargs):
+    event_occurrences.refresh([instance.pk])
+
+
+# ===== TOUR SUMMARIES =====
+
+def _forget_summary(tour):
+    # A tour already loaded through the stop (stop.tour) rereads its summary
+    tour._state.fields_cache.pop('summary', None)
+
+
+@receiver(post_save, sender=Tour)
+def create_tour_summary(sender, instance, created, **kwargs):
+    if created:
+        tour_summaries.refresh([instance.pk])
+
+
+@receiver(post_save, sender=TourItinerary)
+def refresh_tour_summary(sender, instance, **kwargs):
+    tour_summaries.refresh([instance.tour_id])
+    if TourItinerary.tour.is_cached(instance):
+        _forget_summary(instance.tour)
+
+
+@receiver(post_delete, sender=TourItinerary)
+def refresh_tour_summary_without_stop(sender, instance, **kwargs):
+    # After commit: when the tour itself is being deleted, refreshing it
+    # mid-cascade would recreate its summary
+    tour_id = instance.tour_id
+    transaction.on_commit(lambda: tour_summaries.refresh([tour_id]))
+    if TourItinerary.tour.is_cached(instance):
+        _forget_summary(instance.tour)
+
+
+@receiver(post_save, sender=Vendor)
+def refresh_vendor_tour_summaries(sender, instance, created, update_fields=None, **kwargs):
+    # Only the featured flag of a vendor is summarized; a new vendor is on no tour
+    if not created and (update_fields is None or 'is_featured' in update_fields):
+        tour_summaries.refresh(tour_summaries.tours_for_vendors([instance.pk]))
+
+
+@receiver(m2m_changed, sender=Vendor.cuisine_types.through)
+def refresh_tour_summary_cuisines(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        vendor_ids = [instance.pk] if action in ('post_add', 'post_remove', 'post_clear') else []
+    elif action in ('post_add', 'post_remove'):
+        vendor_ids = pk_set
+    elif action == 'post_clear':
+        # Vendor ids collected by refresh_vendor_card_cuisines on pre_clear
+        vendor_ids = getattr(instance, '_card_refresh_ids', [])
+    else:
+        vendor_ids = []
+    if vendor_ids:
+        tour_summaries.refresh(tour_summaries.tours_for_vendors(vendor_ids))
+
+
+@receiver(post_save, sender=CuisineType)
+def refresh_renamed_cuisine_tour_summaries(sender, instance, created, **kwargs):
+    if not created:
+        tour_summaries.refresh(tour_summaries.tours_for_vendors(instance.vendors.values_list('pk', flat=True)))
+
+
+@receiver(post_delete, sender=CuisineType)
+def refresh_deleted_cuisine_tour_summaries(sender, instance, **kwargs):
+    # Vendor ids collected by remember_cuisine_listings before the delete
+    vendor_ids, _ = getattr(instance, '_search_reindex', ([], []))
+    tour_summaries.refresh(tour_summaries.tours_for_vendors(vendor_ids))
@@ -96,4 +96,1156 @@ class IntegrationTests(TestCase):
             with self.subTest(page=page_name):
                 response = self.client.get(reverse(page_name))
                 self.assertEqual(response.status_code, 200)
-                # Don't check template - some might not exist yet
\ No newline at end of file
+                # Don't check template - some might not exist yet
+
+class SearchIndexTests(TestCase):
+    """Tests for the inverted index behind the search bar"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor, CuisineType
+
+        User = get_user_model()
+        user = User.objects.create_user(
+            username='hawker@example.com',
+            email='hawker@example.com',
+            password='hawkerpass123',
+            user_type='vendor'
+        )
+        # Committed (on_commit hooks run), as search result caching expects
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor = Vendor.objects.create(
+                user=user,
+                business_name='Tian Tian Hainanese Chicken Rice',
+                vendor_type='stall',
+                description='Famous for steamed chicken rice since 1987',
+                address='1 Kadayanallur Street, Maxwell Food Centre'
+            )
+            self.cuisine = CuisineType.objects.create(name='Hainanese')
+
+    def test_primary_and_secondary_tiers(self):
+        """All words in the name -> primary, exact phrase elsewhere -> secondary"""
+        from webapp.search import index as search_index
+
+        hits = search_index.lookup('chicken tian')
+        self.assertEqual(hits.primary['vendor'], {self.vendor.id})
+
+        hits = search_index.lookup('maxwell food')
+        self.assertEqual(hits.primary['vendor'], set())
+        self.assertEqual(hits.secondary['vendor'], {self.vendor.id: False})
+
+        # Words present but not as a phrase do not match the secondary tier
+        hits = search_index.lookup('food maxwell')
+        self.assertFalse(hits)
+
+    def test_only_the_last_word_is_a_prefix(self):
+        """Earlier words match whole tokens; the last one from MIN_PREFIX_LENGTH letters"""
+        from webapp.search import index as search_index
+
+        self.assertEqual(search_index.lookup('tian hain').primary['vendor'], {self.vendor.id})
+        self.assertFalse(search_index.lookup('tia hainanese'))
+        self.assertFalse(search_index.lookup('ch'))
+        self.assertEqual(search_index.lookup('chi').primary['vendor'], {self.vendor.id})
+        self.assertEqual(search_index.lookup('since 1987').secondary['vendor'], {self.vendor.id: False})
+
+    def test_index_follows_model_changes(self):
+        """Saves, m2m changes and deletes are reflected immediately"""
+        from webapp.search import index as search_index
+
+        self.vendor.business_name = 'Ah Tai Chicken Rice'
+        self.vendor.save()
+        self.assertFalse(search_index.lookup('tian tian').primary['vendor'])
+        self.assertTrue(search_index.lookup('ah tai').primary['vendor'])
+
+        self.vendor.cuisine_types.add(self.cuisine)
+        self.assertIn(self.vendor.id, search_index.lookup('hainanese').secondary['vendor'])
+
+        self.vendor.delete()
+        self.assertFalse(search_index.lookup('chicken'))
+
+    def test_search_view_uses_index(self):
+        response = self.client.get(reverse('webapp:search'), {'q': 'chicken rice'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['primary_count'], 1)
+        self.assertEqual(response.context['results']['primary'][0]['object_id'], self.vendor.id)
+
+    def test_mysql_phrase_keeps_short_words(self):
+        from webapp.search import backends
+
+        all_words, phrase = backends.MySQLFulltextBackend()._boolean_queries('Ah Ma  chicken rice')
+        self.assertEqual(all_words, '+chicken* +rice*')
+        self.assertEqual(phrase, '"ah ma chicken rice"')
+
+    def test_backends_agree_on_whole_words(self):
+        """The icontains and index backends find the same listings"""
+        from vendors.models import Vendor
+        from webapp.search import backends
+
+        self.assertEqual(backends.get_backend().name, 'index')
+        for query in ('chicken rice', 'maxwell food', 'tian'):
+            with self.subTest(query=query):
+                expected = backends.IContainsBackend().lookup(query)
+                actual = backends.IndexBackend().lookup(query)
+                self.assertEqual(dict(actual.primary), dict(expected.primary))
+                self.assertEqual(dict(actual.secondary), dict(expected.secondary))
+
+        self.vendor.cuisine_types.add(self.cuisine)
+        vendors = backends.get_backend().filter_vendors(Vendor.objects.all(), 'hainanese')
+        self.assertEqual(list(vendors), [self.vendor])
+
+    def test_result_cache_expires_on_edit(self):
+        """Repeat queries skip the database until a listing changes"""
+        from webapp.search import result_cache
+
+        self.assertEqual(result_cache.lookup('Chicken  Rice').primary['vendor'], {self.vendor.id})
+        with self.assertNumQueries(0):
+            hits = result_cache.lookup('chicken rice')
+        self.assertEqual(hits.primary['vendor'], {self.vendor.id})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.business_name = 'Ah Tai Hainanese'
+            self.vendor.save()
+        self.assertFalse(result_cache.lookup('chicken rice').primary['vendor'])
+
+        self.assertEqual(result_cache.lookup('maxwell').secondary['vendor'], {self.vendor.id: False})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.delete()
+        self.assertFalse(result_cache.lookup('maxwell'))
+
+    def test_result_cache_ignores_uncommitted_writes(self):
+        """A rolled-back write leaves nothing behind in the cache"""
+        from django.db import transaction
+        from webapp.search import result_cache
+
+        self.assertEqual(result_cache.lookup('chicken rice').primary['vendor'], {self.vendor.id})
+        try:
+            with transaction.atomic():
+                self.vendor.business_name = 'Ah Tai Hainanese'
+                self.vendor.save()
+                # The writer sees its own change, without caching it
+                self.assertFalse(result_cache.lookup('chicken rice').primary['vendor'])
+                raise RuntimeError('roll back')
+        except RuntimeError:
+            pass
+        with self.assertNumQueries(0):
+            hits = result_cache.lookup('chicken rice')
+        self.assertEqual(hits.primary['vendor'], {self.vendor.id})
+
+
+class SearchHydrationTests(TestCase):
+    """Search result cards are built in a constant number of queries"""
+
+    def setUp(self):
+        import datetime
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor, CuisineType
+        from webapp.models import Article, ArticleImage
+
+        User = get_user_model()
+        cuisine = CuisineType.objects.create(name='Peranakan')
+        self.vendor_ids = []
+        for i in range(5):
+            user = User.objects.create_user(
+                username=f'stall{i}@example.com',
+                email=f'stall{i}@example.com',
+                password='stallpass123',
+                user_type='vendor'
+            )
+            vendor = Vendor.objects.create(
+                user=user,
+                business_name=f'Laksa Stall {i}',
+                vendor_type='stall',
+                description='Curry laksa ' * 20
+            )
+            vendor.cuisine_types.add(cuisine)
+            self.vendor_ids.append(vendor.id)
+
+        self.article_ids = []
+        for i in range(3):
+            article = Article.objects.create(
+                title=f'Laksa Trail {i}',
+                slug=f'laksa-trail-{i}',
+                author_name='Mei Ling',
+                content='A bowl of laksa',
+                date_written=datetime.date(2025, 11, 1)
+            )
+            ArticleImage.objects.create(article=article, image=f'article_images/lead{i}.png', order=0)
+            ArticleImage.objects.create(article=article, image=f'article_images/more{i}.png', order=1)
+            self.article_ids.append(article.id)
+
+    def test_hydrate_uses_constant_queries(self):
+        from webapp.search.index import SearchHits
+        from webapp.search.hydration import hydrate
+
+        hits = SearchHits()
+        hits.primary['vendor'] = set(self.vendor_ids[:3])
+        hits.secondary['vendor'] = {vid: False for vid in self.vendor_ids[3:]}
+        hits.primary['article'] = set(self.article_ids)
+
+        # vendors joined to their cards, articles joined to their lead images
+        with self.assertNumQueries(2):
+            results = hydrate(hits)
+
+        self.assertEqual(len(results['primary']), 6)
+        self.assertEqual(len(results['secondary']), 2)
+        vendor_card = results['primary'][0]
+        self.assertEqual(vendor_card['subtitle'], 'Peranakan')
+        self.assertEqual(vendor_card['url'], reverse('webapp:food_stall_detail', args=[self.vendor_ids[0]]))
+        self.assertEqual(len(vendor_card['description']), 103)
+        article_card = results['primary'][3]
+        self.assertTrue(article_card['image_url'].endswith('lead0.png'))
+
+    def test_search_api_pages_each_category(self):
+        """Cursors walk a category page by page without repeats"""
+        seen = []
+        params = {'q': 'laksa', 'category': 'dining', 'limit': 2}
+        while True:
+            response = self.client.get(reverse('webapp:search_api'), params)
+            self.assertEqual(response.status_code, 200)
+            dining = response.json()['categories']['dining']
+            self.assertEqual(dining['total'], 5)
+            self.assertLessEqual(len(dining['results']), 2)
+            seen.extend(card['object_id'] for card in dining['results'])
+            if not dining['next_cursor']:
+                break
+            params['cursor'] = dining['next_cursor']
+        self.assertEqual(seen, self.vendor_ids)
+
+        response = self.client.get(reverse('webapp:search'), {'q': 'laksa', 'limit': 2})
+        self.assertEqual(response.context['total_results'], 8)
+        self.assertEqual(len(response.context['results']['primary']), 4)
+
+
+class SearchAutocompleteTests(TestCase):
+    """Tests for the typeahead prefix trie"""
+
+    def test_trie_ranks_by_popularity_and_updates_in_place(self):
+        from webapp.search.autocomplete import PrefixTrie, Suggestion
+
+        trie = PrefixTrie(limit=2)
+        trie.add(Suggestion('vendor', 1, 'Tian Tian Chicken Rice', '/v/1/', popularity=5))
+        trie.add(Suggestion('vendor', 2, 'Chicken Satay King', '/v/2/', popularity=9))
+        trie.add(Suggestion('cuisine', 3, 'Chinese', '/c/3/', popularity=1))
+
+        self.assertEqual([s.key for s in trie.lookup('chi')], [('vendor', 2), ('vendor', 1)])
+        self.assertEqual([s.key for s in trie.lookup('chicken ri')], [('vendor', 1)])
+
+        trie.remove(('vendor', 2))
+        self.assertEqual([s.key for s in trie.lookup('chi')], [('vendor', 1), ('cuisine', 3)])
+        self.assertEqual(trie.lookup('satay'), [])
+
+    def test_autocomplete_endpoint_follows_model_changes(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor
+        from webapp.search import autocomplete
+
+        user = get_user_model().objects.create_user(
+            username='prata@example.com',
+            email='prata@example.com',
+            password='pratapass123',
+            user_type='vendor'
+        )
+        # Trie changes run on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            autocomplete.invalidate()
+            vendor = Vendor.objects.create(user=user, business_name='Roti Prata House', vendor_type='stall')
+
+        response = self.client.get(reverse('webapp:search_autocomplete'), {'q': 'prat'})
+        labels = [s['label'] for s in response.json()['suggestions']]
+        self.assertEqual(labels, ['Roti Prata House'])
+
+        vendor.business_name = 'Springleaf Prata Place'
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor.save()
+        labels = [s['label'] for s in autocomplete.suggest('prata')]
+        self.assertEqual(labels, ['Springleaf Prata Place'])
+        self.assertEqual(autocomplete.suggest('roti'), [])
+
+    def test_changes_wait_for_commit(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from django.db import transaction
+        from vendors.models import Vendor
+        from webapp.search import autocomplete
+
+        trie = autocomplete.get_trie()
+        version = cache.get(autocomplete._trie.cache_key)
+        user = get_user_model().objects.create_user(
+            username='satay@example.com', email='satay@example.com', password='sataypass123'
+        )
+        with transaction.atomic():
+            Vendor.objects.create(user=user, business_name='Lau Pa Sat Satay', vendor_type='stall')
+            self.assertEqual(cache.get(autocomplete._trie.cache_key), version)
+            transaction.set_rollback(True)
+        # The rolled-back vendor never reached this process's trie
+        self.assertEqual(cache.get(autocomplete._trie.cache_key), version)
+        self.assertIs(autocomplete.get_trie(), trie)
+        self.assertEqual(autocomplete.suggest('lau pa'), [])
+
+    def test_unchanged_saves_and_ratings_do_not_bump_the_version(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from vendors.models import Vendor
+        from webapp.models import VendorRating
+        from webapp.search import autocomplete
+
+        User = get_user_model()
+        owner = User.objects.create_user(username='mee@example.com', email='mee@example.com', password='meepass123')
+        diner = User.objects.create_user(username='diner@example.com', email='diner@example.com', password='dinerpass123')
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor = Vendor.objects.create(user=owner, business_name='Hokkien Mee Corner', vendor_type='stall')
+        trie = autocomplete.get_trie()
+        version = cache.get(autocomplete._trie.cache_key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor.description = 'Prawn stock simmered overnight'
+            vendor.save()
+            VendorRating.objects.create(vendor=vendor, user=diner, rating=5)
+        self.assertEqual(cache.get(autocomplete._trie.cache_key), version)
+        # This process still sees the new popularity
+        self.assertIs(autocomplete.get_trie(), trie)
+        self.assertEqual(trie.suggestions[('vendor', vendor.id)].popularity, 1)
+
+
+class SearchFuzzyTests(TestCase):
+    """Tests for the typo-tolerant trigram index"""
+
+    def test_trigram_index_tolerates_typos(self):
+        from webapp.search.fuzzy import TrigramIndex, FuzzyEntry
+
+        index = TrigramIndex()
+        index.add(FuzzyEntry('dish', 1, 'Char Kway Teow', vendor_id=10))
+        index.add(FuzzyEntry('dish', 2, 'Roti Prata', vendor_id=11))
+        index.add(FuzzyEntry('dish', 3, 'Curry Laksa', vendor_id=12))
+
+        self.assertEqual(index.match('char kuey teow')[0].entry.object_id, 1)
+        self.assertEqual(index.match('prata')[0].entry.object_id, 2)
+        self.assertEqual(index.match('lakhsa')[0].entry.object_id, 3)
+        self.assertEqual(index.match('zzz'), [])
+
+    def test_search_falls_back_to_fuzzy_matches(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor, MenuItem
+        from webapp.search import fuzzy
+
+        user = get_user_model().objects.create_user(
+            username='kwayteow@example.com',
+            email='kwayteow@example.com',
+            password='kwaypass123',
+            user_type='vendor'
+        )
+        # Index changes run on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            fuzzy.invalidate()
+            vendor = Vendor.objects.create(user=user, business_name='Hill Street Fried', vendor_type='stall')
+            MenuItem.objects.create(vendor=vendor, dish_name='Char Kway Teow')
+
+        response = self.client.get(reverse('webapp:search'), {'q': 'char kuey teow'})
+        self.assertTrue(response.context['fuzzy_results'])
+        self.assertEqual(response.context['did_you_mean'][0]['label'], 'Char Kway Teow')
+        self.assertEqual(response.context['results']['secondary'][0]['object_id'], vendor.id)
+
+    def test_saves_that_keep_the_name_do_not_bump_the_version(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from vendors.models import Vendor
+        from webapp.search import fuzzy
+
+        user = get_user_model().objects.create_user(
+            username='laksa@example.com', email='laksa@example.com', password='laksapass123'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor = Vendor.objects.create(user=user, business_name='Sungei Road Laksa', vendor_type='stall')
+        index = fuzzy._index.get()
+        version = cache.get(fuzzy._index.cache_key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor.latitude, vendor.longitude = 1.3048, 103.8531
+            vendor.save()
+        self.assertEqual(cache.get(fuzzy._index.cache_key), version)
+        self.assertIs(fuzzy._index.get(), index)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vendor.business_name = 'Sungei Road Laksa 1956'
+            vendor.save()
+        self.assertNotEqual(cache.get(fuzzy._index.cache_key), version)
+        self.assertEqual(fuzzy.match('laksa 1956')[0].entry.label, 'Sungei Road Laksa 1956')
+
+
+class SearchMetricsTests(TestCase):
+    """Tests for per-phase search timings"""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from webapp.models import SearchRollup
+        from webapp.search import metrics
+
+        # Hits, search structures and timing samples left by earlier tests
+        cache.clear()
+        metrics.flush()
+        SearchRollup.objects.all().delete()
+
+    def test_search_phases_roll_up_and_report(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from webapp.models import SearchRollup
+        from webapp.search import metrics
+
+        self.client.get(reverse('webapp:search'), {'q': 'Nasi  Lemak'})
+        self.client.get(reverse('webapp:search'), {'q': 'nasi lemak'})
+        metrics.flush()
+
+        total = SearchRollup.objects.get(query='nasi lemak', phase='total')
+        self.assertEqual(total.count, 2)
+        self.assertEqual(total.zero_results, 2)
+        self.assertEqual(sum(total.histogram), 2)
+        phases = set(SearchRollup.objects.values_list('phase', flat=True))
+        self.assertTrue({'primary', 'fuzzy', 'hydration', 'render', 'total'} <= phases)
+
+        out = StringIO()
+        call_command('search_report', stdout=out)
+        self.assertIn('p95', out.getvalue())
+        self.assertIn('x2     nasi lemak', out.getvalue())
+
+
+class SearchFacetTests(TestCase):
+    """Tests for facet counts and facet filtering on search results"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor, CuisineType
+
+        User = get_user_model()
+        self.malay = CuisineType.objects.create(name='Malay')
+        self.chinese = CuisineType.objects.create(name='Chinese')
+        self.vendors = {}
+        for name, vendor_type, halal, cuisine in [
+            ('Selera Rasa Nasi Lemak', 'stall', True, self.malay),
+            ('Boon Lay Nasi Lemak', 'stall', False, self.chinese),
+            ('Nasi Lemak House', 'restaurant', True, self.malay),
+        ]:
+            user = User.objects.create_user(
+                username=f'{vendor_type}{len(self.vendors)}@example.com',
+                email=f'{vendor_type}{len(self.vendors)}@example.com',
+                password='vendorpass123',
+                user_type='vendor'
+            )
+            vendor = Vendor.objects.create(
+                user=user, business_name=name, vendor_type=vendor_type, halal=halal
+            )
+            vendor.cuisine_types.add(cuisine)
+            self.vendors[name] = vendor
+
+    def test_counts_and_narrowing(self):
+        from django.http import QueryDict
+        from webapp.search import facets as search_facets
+        from webapp.search import index as search_index
+
+        hits = search_index.lookup('nasi lemak')
+        with self.assertNumQueries(1):
+            facets, narrowed = search_facets.apply(hits, QueryDict())
+        self.assertEqual([(o['value'], o['count']) for o in facets['vendor_type']], [('restaurant', 1), ('stall', 2)])
+        self.assertEqual([(o['label'], o['count']) for o in facets['cuisine']], [('Malay', 2), ('Chinese', 1)])
+        self.assertEqual([(o['value'], o['count']) for o in facets['dietary']], [('halal', 2)])
+        self.assertIs(narrowed, hits)
+
+        params = QueryDict(f'dietary=halal&vendor_type=stall&cuisine={self.malay.id}')
+        facets, narrowed = search_facets.apply(hits, params)
+        self.assertEqual(narrowed.primary['vendor'], {self.vendors['Selera Rasa Nasi Lemak'].id})
+        self.assertTrue(facets['dietary'][0]['selected'])
+
+    def test_search_view_filters_by_facet(self):
+        response = self.client.get(reverse('webapp:search'), {'q': 'nasi lemak', 'dietary': 'halal'})
+        self.assertEqual(response.context['total_results'], 2)
+        self.assertContains(response, 'id="dietary-halal"')
+        names = {card['title'] for card in response.context['results']['primary']}
+        self.assertEqual(names, {'Selera Rasa Nasi Lemak', 'Nasi Lemak House'})
+
+    def test_counts_skip_vendors_without_cards(self):
+        from vendors.models import VendorCard
+
+        VendorCard.objects.filter(vendor=self.vendors['Nasi Lemak House']).delete()
+        response = self.client.get(reverse('webapp:search'), {'q': 'nasi lemak'})
+        self.assertEqual(response.context['total_results'], 2)
+        self.assertEqual(len(response.context['results']['primary']), 2)
+        dining = response.context['facets']['category'][0]
+        self.assertEqual((dining['value'], dining['count']), ('dining', 2))
+        self.assertEqual([o['value'] for o in response.context['facets']['vendor_type']], ['stall'])
+
+    def test_open_at_facet(self):
+        stall = self.vendors['Boon Lay Nasi Lemak']
+        stall.opening_hours = 'Daily 6am - 2pm'
+        stall.save()
+
+        response = self.client.get(reverse('webapp:search'), {'q': 'nasi lemak', 'open_at': 'mon 07:30'})
+        self.assertEqual(response.context['facets']['open'][0]['label'], 'Open at Mon 07:30')
+        names = {card['title'] for card in response.context['results']['primary']}
+        self.assertEqual(names, {'Boon Lay Nasi Lemak'})
+
+
+class ListingPaginationTests(TestCase):
+    """Keyset pagination on the listing pages"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor
+
+        User = get_user_model()
+        self.names = ['ah hock', 'Bak Chor Mee', 'char kway teow', 'Duck Rice', 'Economic Rice']
+        for i, name in enumerate(reversed(self.names)):
+            user = User.objects.create_user(
+                username=f'stall{i}@example.com',
+                email=f'stall{i}@example.com',
+                password='stallpass123',
+                user_type='vendor'
+            )
+            Vendor.objects.create(user=user, business_name=name, vendor_type='stall')
+
+    def test_pages_follow_sort_order_without_repeats(self):
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response = self.client.get(reverse('webapp:food_stalls'), params)
+            page = response.context['food_stalls']
+            self.assertEqual(page.total, 5)
+            self.assertLessEqual(len(page), 2)
+            seen.extend(stall.business_name for stall in page)
+            if not page.next_cursor:
+                break
+            params['cursor'] = page.next_cursor
+        self.assertEqual(seen, self.names)
+
+    def test_json_variant_for_infinite_scroll(self):
+        response = self.client.get(reverse('webapp:food_stalls'), {'limit': 3, 'format': 'json'})
+        data = response.json()
+        self.assertEqual([card['title'] for card in data['results']], self.names[:3])
+        self.assertIn('format=json', data['next_url'])
+
+        response = self.client.get(reverse('webapp:food_stalls') + data['next_url'])
+        data = response.json()
+        self.assertEqual([card['title'] for card in data['results']], self.names[3:])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_total_is_capped_and_skipped_when_one_page_holds_everything(self):
+        with self.settings(LISTING_COUNT_LIMIT=3):
+            response = self.client.get(reverse('webapp:food_stalls'), {'limit': 2})
+        page = response.context['food_stalls']
+        self.assertEqual((page.total, page.total_capped), (3, True))
+        self.assertContains(response, 'Found 3+ stalls')
+
+        # Every row on the first page: counted from the page itself
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('webapp:food_stalls'), {'limit': 10})
+        self.assertEqual(response.context['food_stalls'].total, 5)
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql']])
+
+
+class VendorRatingAggregateTests(TestCase):
+    """Rating count, sum and histogram stored on Vendor"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import Vendor
+
+        User = get_user_model()
+        owner = User.objects.create_user(
+            username='laksa@example.com',
+            email='laksa@example.com',
+            password='laksapass123',
+            user_type='vendor'
+        )
+        self.stall = Vendor.objects.create(user=owner, business_name='Sungei Road Laksa', vendor_type='stall')
+        self.diners = [
+            User.objects.create_user(
+                username=f'diner{i}@example.com',
+                email=f'diner{i}@example.com',
+                password='dinerpass123'
+            )
+            for i in range(3)
+        ]
+
+    def test_submit_rating_upserts_and_updates_aggregates(self):
+        url = reverse('webapp:submit_rating', args=[self.stall.id])
+        for diner, rating in zip(self.diners, [5, 4, 4]):
+            self.client.force_login(diner)
+            self.client.post(url, {'rating': rating})
+        # Changing a rating replaces it rather than adding another
+        self.client.post(url, {'rating': 1})
+
+        self.stall.refresh_from_db()
+        self.assertEqual(self.stall.ratings.count(), 3)
+        self.assertEqual((self.stall.rating_count, self.stall.rating_sum), (3, 10))
+        self.assertEqual(self.stall.average_rating, 3.3)
+        self.assertEqual(self.stall.rating_distribution, [{'rating': 1, 'count': 1}, {'rating': 4, 'count': 1}, {'rating': 5, 'count': 1}])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.stall.total_reviews, 3)
+
+    def test_submit_does_not_read_before_writing(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from webapp import ratings
+        from webapp.models import VendorRating
+
+        with CaptureQueriesContext(connection) as queries:
+            ratings.submit(self.stall, self.diners[0], 4)
+        table = VendorRating._meta.db_table
+        self.assertFalse([q['sql'] for q in queries if q['sql'].startswith('SELECT') and table in q['sql']])
+        self.stall.refresh_from_db()
+        self.assertEqual(self.stall.rating_count, 1)
+
+    def test_submit_rejects_ratings_outside_zero_to_five(self):
+        from django.contrib.messages import get_messages
+
+        url = reverse('webapp:submit_rating', args=[self.stall.id])
+        self.client.force_login(self.diners[0])
+        for rating in ({'rating': 9}, {'rating': -1}, {'rating': 'five'}, {}):
+            with self.subTest(rating=rating):
+                response = self.client.post(url, rating)
+                self.assertRedirects(response, reverse('webapp:food_stall_detail', args=[self.stall.id]))
+                messages = [str(message) for message in get_messages(response.wsgi_request)]
+                self.assertEqual(messages[-1], 'Please choose a rating from 0 to 5 stars.')
+        self.stall.refresh_from_db()
+        self.assertEqual(self.stall.rating_count, 0)
+        self.assertFalse(self.stall.ratings.exists())
+
+    def test_orm_writes_and_deletes_keep_aggregates_current(self):
+        from webapp.models import VendorRating
+
+        rating = VendorRating.objects.create(vendor=self.stall, user=self.diners[0], rating=2)
+        VendorRating.objects.create(vendor=self.stall, user=self.diners[1], rating=5)
+        self.assertEqual(self.stall.total_reviews, 2)
+        self.assertEqual(self.stall.average_rating, 3.5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rating.delete()
+        self.stall.refresh_from_db()
+        self.assertEqual((self.stall.rating_count, self.stall.rating_2, self.stall.rating_5), (1, 0, 1))
+
+
+class ListingFilterSidebarTests(TestCase):
+    """Cached cuisine, location and dietary options for the listing sidebars"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from vendors.models import CuisineType, Vendor
+
+        User = get_user_model()
+        self.chinese = CuisineType.objects.create(name='Chinese')
+        self.malay = CuisineType.objects.create(name='Malay')
+        for i, (name, cuisines, halal) in enumerate([
+            ('Hainanese Chicken Rice', [self.chinese], False),
+            ('Nasi Lemak Corner', [self.malay], True),
+            ('Hokkien Mee', [self.chinese], False),
+        ]):
+            user = User.objects.create_user(
+                username=f'sidebar{i}@example.com',
+                email=f'sidebar{i}@example.com',
+                password='stallpass123',
+                user_type='vendor'
+            )
+            # Committed (on_commit hooks run), as the sidebar generation expects
+            with self.captureOnCommitCallbacks(execute=True):
+                vendor = Vendor.objects.create(
+                    user=user, business_name=name, vendor_type='stall', halal=halal,
+                    address='1 Kadayanallur Street, #01-10 Singapore 069184'
+                )
+                vendor.cuisine_types.set(cuisines)
+        self.vendor = vendor
+
+    def test_sidebar_snapshot_is_cached_and_rebuilt_on_changes(self):
+        from django.core.cache import cache
+        from webapp import listing_filters
+
+        response = self.client.get(reverse('webapp:food_stalls'))
+        self.assertEqual(response.context['available_cuisines'], [
+            {'name': 'Chinese', 'count': 2},
+            {'name': 'Malay', 'count': 1},
+        ])
+        self.assertTrue(response.context['show_halal_filter'])
+        self.assertFalse(response.context['show_kosher_filter'])
+        self.assertEqual([area['value'] for area in response.context['available_locations']], ['01'])
+
+        with self.assertNumQueries(0):
+            listing_filters.snapshot('food_stalls')
+
+        generation = cache.get(listing_filters.GENERATION_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vendor.cuisine_types.add(self.malay)
+            self.vendor.kosher = True
+            self.vendor.save()
+            # Nothing is invalidated before the commit
+            self.assertEqual(cache.get(listing_filters.GENERATION_KEY), generation)
+        snapshot = listing_filters.snapshot('food_stalls')
+        self.assertEqual(snapshot.cuisines[1], {'name': 'Malay', 'count': 2})
+        self.assertTrue(snapshot.dietary['kosher'])
+
+    def test_snapshot_follows_the_shared_generation(self):
+        from django.core.cache import cache
+        from vendors.models import Vendor
+        from webapp import listing_filters
+
+        listing_filters.snapshot('food_stalls')
+        # A command in another process writes without signals and bumps only
+        # the shared counter; this worker's cached snapshot is still in place
+        Vendor.objects.filter(pk=self.vendor.pk).update(area='10')
+        with self.assertNumQueries(0):
+            self.assertEqual([area['value'] for area in listing_filters.snapshot('food_stalls').areas], ['01'])
+        cache.incr(listing_filters.GENERATION_KEY)
+        snapshot = listing_filters.snapshot('food_stalls')
+        self.assertEqual([area['value'] for area in snapshot.areas], ['01', '10'])
+
+
+class NearbySearchTests(TestCase):
+    """Radius and bounding-box search over vendor and event coordinates"""
+
+    def setUp(self):
+        import datetime
+        from django.contrib.auth import get_user_model
+        from django.utils import timezone
+        from vendors.models import Event, Vendor
+
+        User = get_user_model()
+        self.vendors = {}
+        # Maxwell Food Centre, Amoy Street (~0.25 km away) and Orchard Road (~3 km away)
+        for i, (name, vendor_type, lat, lng) in enumerate([
+            ('Maxwell Chicken Rice', 'stall', '1.28030', '103.84480'),
+            ('Amoy Street Laksa', 'stall', '1.27930', '103.84670'),
+            ('Orchard Dim Sum', 'restaurant', '1.30480', '103.83180'),
+        ]):
+            user = User.objects.create_user(
+                username=f'nearby{i}@example.com',
+                email=f'nearby{i}@example.com',
+                password='nearbypass123',
+                user_type='vendor'
+            )
+            self.vendors[name] = Vendor.objects.create(
+                user=user, business_name=name, vendor_type=vendor_type, latitude=lat, longitude=lng
+            )
+        today = timezone.localdate()
+        Event.objects.create(
+            vendor=self.vendors['Orchard Dim Sum'],
+            event_name='Chinatown Night Market',
+            event_start_date=today,
+            event_end_date=today + datetime.timedelta(days=1),
+            event_address='Smith Street',
+            event_latitude='1.28200',
+            event_longitude='103.84400',
+        )
+
+    def test_geohash_encoding(self):
+        from vendors import geo
+
+        self.assertEqual(geo.encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(self.vendors['Maxwell Chicken Rice'].geohash, geo.encode(1.2803, 103.8448))
+
+    def test_radius_search_sorts_by_distance(self):
+        response = self.client.get(reverse('webapp:nearby'), {'lat': '1.2803', 'lng': '103.8448', 'radius': '1'})
+        results = response.json()['results']
+        self.assertEqual([r['title'] for r in results], [
+            'Maxwell Chicken Rice', 'Chinatown Night Market', 'Amoy Street Laksa',
+        ])
+        self.assertEqual(results[0]['distance_km'], 0)
+        self.assertAlmostEqual(results[2]['distance_km'], 0.24, places=2)
+
+        response = self.client.get(reverse('webapp:nearby'), {
+            'lat': '1.2803', 'lng': '103.8448', 'radius': '5', 'type': 'restaurant',
+        })
+        self.assertEqual([r['title'] for r in response.json()['results']], ['Orchard Dim Sum'])
+
+    def test_bounding_box_search(self):
+        response = self.client.get(reverse('webapp:nearby'), {'bbox': '1.275,103.840,1.285,103.850', 'type': 'stall'})
+        data = response.json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual({r['title'] for r in data['results']}, {'Maxwell Chicken Rice', 'Amoy Street Laksa'})
+
+        response = self.client.get(reverse('webapp:nearby'), {'lat': 'north'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_rejects_non_finite_and_out_of_range_areas(self):
+        for params in [
+            {'bbox': '1,2,inf,4'},
+            {'bbox': '1,2,nan,4'},
+            {'bbox': '1,2,91,4'},
+            {'bbox': '1,-181,2,4'},
+            {'bbox': '1.275,103.840,1.285,103.850', 'lat': 'nan', 'lng': '103.8'},
+            {'lat': 'inf', 'lng': '103.8448'},
+            {'lat': '1.2803', 'lng': '103.8448', 'radius': 'nan'},
+        ]:
+            with self.subTest(params=params):
+                response = self.client.get(reverse('webapp:nearby'), params)
+                self.assertEqual(response.status_code, 400)
+
+
+class EventFeedTests(TestCase):
+    """iCalendar and JSON event feeds with conditional GET"""
+
+    def setUp(self):
+        import datetime
+        from django.contrib.auth import get_user_model
+        from django.utils import timezone
+        from vendors.models import CuisineType, Event, Vendor
+
+        User = get_user_model()
+        self.vendors = []
+        for i in range(2):
+            user = User.objects.create_user(
+                username=f'feed{i}@example.com',
+                email=f'feed{i}@example.com',
+                password='feedpass123',
+                user_type='vendor'
+            )
+            self.vendors.append(Vendor.objects.create(user=user, business_name=f'Feed Vendor {i}', vendor_type='event'))
+        self.peranakan = CuisineType.objects.create(name='Peranakan')
+        tomorrow = timezone.localdate() + datetime.timedelta(days=1)
+        self.events = []
+        for vendor, name in zip(self.vendors, ['Kueh Workshop; Nyonya Style', 'Durian Fiesta']):
+            self.events.append(Event.objects.create(
+                vendor=vendor,
+                event_name=name,
+                event_description='Hands-on, family friendly\nAll welcome',
+                event_address='Joo Chiat Road',
+                event_start_date=tomorrow,
+                event_end_date=tomorrow,
+                event_start_time=datetime.time(10, 0),
+                event_end_time=datetime.time(12, 0),
+            ))
+        self.events[0].event_cuisine.add(self.peranakan)
+
+    def test_ics_feed(self):
+        response = self.client.get(reverse('webapp:culinary_events_ics'))
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        body = response.content.decode()
+        self.assertEqual(body.count('BEGIN:VEVENT'), 2)
+        self.assertIn('SUMMARY:Kueh Workshop\\; Nyonya Style\r\n', body)
+        self.assertIn('DESCRIPTION:Hands-on\\, family friendly\\nAll welcome\r\n', body)
+        self.assertIn('DTSTART:', body)
+
+    def test_json_feed_filters(self):
+        url = reverse('webapp:culinary_events_json')
+        titles = [event['title'] for event in self.client.get(url, {'cuisine': 'Peranakan'}).json()['events']]
+        self.assertEqual(titles, ['Kueh Workshop; Nyonya Style'])
+        titles = [event['title'] for event in self.client.get(url, {'vendor': self.vendors[1].id}).json()['events']]
+        self.assertEqual(titles, ['Durian Fiesta'])
+        self.assertEqual(self.client.get(url, {'vendor': 'abc'}).status_code, 400)
+
+    def test_conditional_get(self):
+        url = reverse('webapp:culinary_events_json')
+        response = self.client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # Unchanged feed: one aggregate query and no body
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        # A cached body is served without the feed query
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.events[1].event_name = 'Durian Fiesta 2'
+        self.events[1].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('Durian Fiesta 2', response.content.decode())
+
+    def test_last_modified_covers_the_window_roll(self):
+        import datetime
+        from django.utils import timezone
+        from django.utils.http import http_date
+        from vendors import event_times
+        from vendors.models import Event
+
+        # Events untouched since last week: yesterday's copy is still stale
+        Event.objects.update(updated_at=timezone.now() - datetime.timedelta(days=7))
+        url = reverse('webapp:culinary_events_json')
+        start_of_today = event_times.start_datetime(timezone.localdate())
+        response = self.client.get(url)
+        self.assertEqual(response['Last-Modified'], http_date(start_of_today.timestamp()))
+
+        yesterday = http_date((start_of_today - datetime.timedelta(hours=1)).timestamp())
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=yesterday).status_code, 200)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code, 304)
+
+
+class ArticleKeywordSetTests(TestCase):
+    """Foodie crawls and stories filter through the in-memory keyword sets"""
+
+    def setUp(self):
+        import datetime
+        from webapp.models import Article, ArticleKeyword, Keyword
+
+        # Committed (on_commit hooks run), as the keyword sets expect
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crawl, self.maxwell, self.michelin = [
+                Keyword.objects.create(name=name) for name in ('Food Crawl', 'Maxwell Food Centre', 'Michelin')
+            ]
+            self.articles = {}
+            for title, author, year, keywords in [
+                ('Maxwell Michelin Picks', 'Mei Ling', 2024, [self.crawl, self.maxwell, self.michelin]),
+                ('Maxwell Breakfast', 'Raj', 2025, [self.crawl, self.maxwell]),
+                ('Michelin Hawkers', 'Raj', 2025, [self.michelin]),
+            ]:
+                article = Article.objects.create(
+                    title=title,
+                    slug=title.lower().replace(' ', '-'),
+                    author_name=author,
+                    content='Makan time',
+                    date_written=datetime.date(year, 3, 1)
+                )
+                for keyword in keywords:
+                    ArticleKeyword.objects.create(article=article, keyword=keyword)
+                self.articles[title] = article
+
+    def crawl_titles(self, *filters):
+        response = self.client.get(reverse('webapp:foodie_crawls'), {'filter': list(filters)})
+        return [article.title for article in response.context['articles']]
+
+    def story_titles(self, **params):
+        response = self.client.get(reverse('webapp:foodie_stories'), params)
+        return [article.title for article in response.context['articles']]
+
+    def test_crawl_filters_intersect(self):
+        self.assertEqual(self.crawl_titles(), ['Maxwell Breakfast', 'Maxwell Michelin Picks'])
+        self.assertEqual(self.crawl_titles('maxwell food centre'), ['Maxwell Breakfast', 'Maxwell Michelin Picks'])
+        self.assertEqual(self.crawl_titles('Maxwell Food Centre', 'Michelin'), ['Maxwell Michelin Picks'])
+        self.assertEqual(self.crawl_titles('Lau Pa Sat'), [])
+
+        response = self.client.get(reverse('webapp:foodie_crawls'), {'filter': 'Michelin'})
+        self.assertEqual(response.context['articles'][0].keyword_names, ['Maxwell Food Centre', 'Michelin'])
+
+    def test_query_count_independent_of_filters(self):
+        from webapp import article_keywords
+
+        article_keywords.get()  # built once per process
+        url = reverse('webapp:foodie_crawls')
+        with self.assertNumQueries(1):
+            self.client.get(url, {'filter': 'Michelin'})
+        with self.assertNumQueries(1):
+            self.client.get(url, {'filter': ['Michelin', 'Maxwell Food Centre', 'Lau Pa Sat']})
+
+    def test_story_filters(self):
+        self.assertEqual(
+            self.story_titles(keyword=[self.maxwell.id, self.michelin.id]),
+            ['Maxwell Breakfast', 'Maxwell Michelin Picks', 'Michelin Hawkers']
+        )
+        self.assertEqual(self.story_titles(keyword=self.michelin.id, author='Raj'), ['Michelin Hawkers'])
+        self.assertEqual(self.story_titles(year=2024), ['Maxwell Michelin Picks'])
+
+        response = self.client.get(reverse('webapp:foodie_stories'))
+        self.assertEqual(response.context['available_authors'], ['Mei Ling', 'Raj'])
+        self.assertEqual(response.context['available_years'], [2025, 2024])
+
+    def test_sets_follow_tag_changes(self):
+        article = self.articles['Michelin Hawkers']
+        self.assertEqual(self.crawl_titles('Michelin'), ['Maxwell Michelin Picks'])
+        with self.captureOnCommitCallbacks(execute=True):
+            article.keywords.add(self.crawl)
+        self.assertEqual(self.crawl_titles('Michelin'), ['Maxwell Michelin Picks', 'Michelin Hawkers'])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.michelin.delete()
+        self.assertEqual(self.crawl_titles('Michelin'), [])
+
+
+class ArticleListingFieldTests(TestCase):
+    """Excerpt, reading time and lead image stored on Article"""
+
+    def setUp(self):
+        import datetime
+        from webapp.models import Article
+
+        self.article = Article.objects.create(
+            title='Chendol Chronicles',
+            slug='chendol-chronicles',
+            author_name='Siti',
+            content=' '.join(['gula melaka'] * 300),
+            date_written=datetime.date(2025, 6, 1)
+        )
+
+    def test_text_fields_follow_content(self):
+        from webapp.models import Article
+
+        self.assertEqual((self.article.word_count, self.article.reading_minutes), (600, 3))
+        self.assertEqual(len(self.article.excerpt), 100)
+        self.assertEqual(len(self.article.summary.split()), 51)  # 50 words and the ellipsis
+
+        self.article.content = 'Short and sweet'
+        self.article.save(update_fields=['content'])
+        article = Article.objects.get(pk=self.article.pk)
+        self.assertEqual((article.excerpt, article.summary, article.word_count, article.reading_minutes),
+                         ('Short and sweet', 'Short and sweet', 3, 1))
+
+    def test_lead_image_follows_images(self):
+        from webapp.models import Article, ArticleImage
+
+        def lead_image_id():
+            return Article.objects.get(pk=self.article.pk).lead_image_id
+
+        second = ArticleImage.objects.create(article=self.article, image='article_images/b.png', order=2)
+        self.assertEqual(lead_image_id(), second.id)
+        first = ArticleImage.objects.create(article=self.article, image='article_images/a.png', order=1)
+        self.assertEqual(lead_image_id(), first.id)
+        first.delete()
+        self.assertEqual(lead_image_id(), second.id)
+        second.delete()
+        self.assertIsNone(lead_image_id())
+
+    def test_listing_skips_body(self):
+        from webapp.models import ArticleImage
+
+        from webapp import article_keywords
+
+        ArticleImage.objects.create(article=self.article, image='article_images/a.png', order=0)
+        article_keywords.get()  # sidebar options, built once per process
+        with self.assertNumQueries(1):  # the page (one page needs no count), nothing per card
+            response = self.client.get(reverse('webapp:foodie_stories'))
+        article = response.context['articles'].items[0]
+        self.assertEqual(article.get_deferred_fields(), {'content', 'body_html', 'body_hash'})
+        self.assertContains(response, 'article_images/a.png')
+        self.assertContains(response, '<strong>Reading time:</strong> 3 min', html=False)
+
+
+class ArticleBodyCacheTests(TestCase):
+    """Article bodies rendered on save and served with a strong ETag"""
+
+    def setUp(self):
+        import datetime
+        from webapp.models import Article
+
+        # Committed (on_commit hooks run), as the keyword sets expect
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article = Article.objects.create(
+                title='Satay by the Bay',
+                slug='satay-by-the-bay',
+                author_name='Ahmad',
+                content='Lau Pa Sat at dusk.\n\nSatay Street <closes> at 1am.',
+                date_written=datetime.date(2025, 8, 1)
+            )
+        self.url = reverse('webapp:article_detail', args=[self.article.slug])
+
+    def test_body_rendered_on_save(self):
+        from unittest import mock
+        from webapp import article_meta
+
+        self.assertEqual(
+            self.article.body_html,
+            '<p>Lau Pa Sat at dusk.</p>\n\n<p>Satay Street &lt;closes&gt; at 1am.</p>'
+        )
+        self.assertEqual(self.article.body_hash, article_meta.content_hash(self.article.content))
+
+        # Saving other fields does not render the body again
+        with mock.patch.object(article_meta, 'render_body') as render_body:
+            self.article.title = 'Satay by the Bay, Revisited'
+            self.article.save()
+        render_body.assert_not_called()
+
+        self.article.content = 'Closed for renovation.'
+        self.article.save(update_fields=['content'])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.body_html, '<p>Closed for renovation.</p>')
+
+    def test_conditional_get(self):
+        from webapp import article_keywords
+        from webapp.models import Keyword
+
+        self.client.get(self.url)  # the first visit sets the CSRF cookie
+        response = self.client.get(self.url)
+        self.assertContains(response, '<p>Satay Street &lt;closes&gt; at 1am.</p>', html=False)
+        etag = response['ETag']
+
+        article_keywords.get()
+        # The article and its images; no rendering
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.keywords.add(Keyword.objects.create(name='Satay'))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_signed_in_readers_get_no_etag(self):
+        from django.contrib.auth import get_user_model
+
+        user = get_user_model().objects.create_user(
+            username='reader@example.com', email='reader@example.com', password='readerpass123'
+        )
+        self.client.force_login(user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class VendorDetailTests(TestCase):
+    """Detail pages load in fixed queries and reuse cached fragments"""
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+        from django.core.cache import cache
+        from vendors.models import CuisineType, MenuItem, Vendor
+
+        cache.clear()
+        User = get_user_model()
+        owner = User.objects.create_user(
+            username='wokhei@example.com', email='wokhei@example.com', password='vendorpass123', user_type='vendor'
+        )
+        self.stall = Vendor.objects.create(
+            user=owner, business_name='Wok Hei Corner', vendor_type='stall', catering_service=True
+        )
+        self.stall.cuisine_types.add(CuisineType.objects.create(name='Zi Char'))
+        for name in ('Sambal Kangkong', 'Hor Fun'):
+            MenuItem.objects.create(vendor=self.stall, dish_name=name, dish_price=6)
+        self.url = reverse('webapp:food_stall_detail', args=[self.stall.id])
+
+    def test_fixed_queries_and_cached_fragments(self):
+        # Vendor, menu and cuisines on the first view
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        content = response.content.decode()
+        self.assertLess(content.index('Hor Fun'), content.index('Sambal Kangkong'))
+        self.assertContains(response, 'Zi Char')
+        self.assertContains(response, 'Catering Available')
+
+        # Only the vendor afterwards
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+    def test_writes_expire_fragments(self):
+        from vendors.models import MenuItem
+
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            MenuItem.objects.create(vendor=self.stall, dish_name='Cereal Prawns', dish_price=18)
+            # Until the commit the page keeps the committed fragments
+            self.assertNotContains(self.client.get(self.url), 'Cereal Prawns')
+        self.assertContains(self.client.get(self.url), 'Cereal Prawns')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stall.description = 'Charcoal-fired since 1979'
+            self.stall.save()
+        self.assertContains(self.client.get(self.url), 'Charcoal-fired since 1979')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.stall.cuisine_types.clear()
+        self.assertContains(self.client.get(self.url), 'Not specified')
+
+    def test_own_rating_per_request(self):
+        from django.contrib.auth import get_user_model
+        from webapp.models import VendorRating
+
+        self.client.get(self.url)
+        diner = get_user_model().objects.create_user(
+            username='diner@example.com', email='diner@example.com', password='dinerpass123'
+        )
+        VendorRating.objects.create(vendor=self.stall, user=diner, rating=4)
+        self.client.force_login(diner)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['user_rating'].rating, 4)
+        self.assertContains(response, 'Change your Review')
+        self.assertContains(response, '(1 review)')
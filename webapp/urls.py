@@ -13,6 +13,8 @@ urlpatterns = [
     path('', views.homepage, name='homepage'),
     path('places-eat/', views.places_eat, name='places_eat'),
     path('search/', views.search, name='search'),
+    path('search/api/', views.search_api, name='search_api'),
+    path('search/autocomplete/', views.search_autocomplete, name='search_autocomplete'),
 
     # Foodie Articles pages
     path('foodie-stories/', views.foodie_stories, name='foodie_stories'),
@@ -26,6 +28,10 @@ urlpatterns = [
     path('places-eat/restaurants/', views.restaurants, name='restaurants'),
     path('places-eat/food-stalls/', views.food_stalls, name='food_stalls'),
     path('places-eat/culinary-events/', views.culinary_events, name='culinary_events'),
+    path('places-eat/culinary-events/calendar/', views.culinary_events_calendar, name='culinary_events_calendar'),
+    path('places-eat/culinary-events/feed.ics', views.culinary_events_feed, {'feed_format': 'ics'}, name='culinary_events_ics'),
+    path('places-eat/culinary-events/feed.json', views.culinary_events_feed, {'feed_format': 'json'}, name='culinary_events_json'),
+    path('places-eat/nearby/', views.nearby, name='nearby'),
 
     # Vendor details pages
     path('places-eat/restaurants/<int:vendor_id>/', views.restaurant_detail, name='restaurant_detail'),
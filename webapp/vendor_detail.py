@@ -0,0 +1,73 @@
+# webapp/vendor_detail.py
+"""
+Loader and fragment cache for the restaurant and food stall detail pages.
+
+A detail page is the vendor row (name, rating summary, map position),
+three pieces that look the same to every visitor, and the visitor's own
+rating. Those three pieces are the badges and description, the menu, and
+the sidebar with cuisines, address, hours and contact details. They are
+rendered from partials/vendor_detail_*.html and cached together per
+vendor, so a page view costs one query for the vendor (plus one for the
+signed-in user's rating). On a miss, load_related() fetches the menu
+(sorted by dish name) and the cuisines with one query each before
+rendering.
+
+The rating summary is stored on the vendor row (see webapp.ratings) and
+rendered outside the fragments, so rating writes need no invalidation.
+webapp.signals calls invalidate() when a vendor, its menu items or its
+cuisines change; the fragments are dropped once the writing transaction
+commits, so a page view in between cannot cache the old ones again.
+VENDOR_DETAIL_CACHE_TIMEOUT bounds how stale a missed
+invalidation (queryset.update() and the like) can leave a page.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from vendors.models import MenuItem, Vendor
+
+FRAGMENTS = {
+    'summary': 'webapp/partials/vendor_detail_summary.html',
+    'menu': 'webapp/partials/vendor_detail_menu.html',
+    'sidebar': 'webapp/partials/vendor_detail_sidebar.html',
+}
+
+
+def _cache_key(vendor_id):
+    return f'vendor:detail:{vendor_id}'
+
+
+def load(vendor_id, vendor_type):
+    """The active vendor of this type, or 404 (one query)"""
+    return get_object_or_404(Vendor, id=vendor_id, vendor_type=vendor_type, is_active=True)
+
+
+def load_related(vendor):
+    """Fetch everything the fragments read, one query per relation"""
+    prefetch_related_objects(
+        [vendor],
+        Prefetch('menu_items', queryset=MenuItem.objects.order_by('dish_name')),
+        'cuisine_types',
+    )
+
+
+def fragments(vendor):
+    """{name: safe HTML} of the vendor's shared fragments, from the cache when available"""
+    key = _cache_key(vendor.pk)
+    rendered = cache.get(key)
+    if rendered is None:
+        load_related(vendor)
+        rendered = {name: render_to_string(template, {'vendor': vendor}) for name, template in FRAGMENTS.items()}
+        cache.set(key, rendered, settings.VENDOR_DETAIL_CACHE_TIMEOUT)
+    return {name: mark_safe(html) for name, html in rendered.items()}
+
+
+def invalidate(vendor_ids):
+    """Drop these vendors' fragments on commit; each is rendered again on its next view"""
+    keys = [_cache_key(vendor_id) for vendor_id in vendor_ids]
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -1,16 +1,59 @@
 # webapp/views.py
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import models
-from django.db.models import Q
+from django.db.models import Prefetch, Q
 from django.db.models.functions import Lower
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
 from django.views.generic import ListView, DetailView
-from vendors.models import Vendor, CuisineType, MenuItem, Event  # Import from vendors app
+from vendors.models import Vendor, VendorCard, CuisineType, MenuItem, Event, EventOccurrence  # Import from vendors app
+from vendors import event_times, geo
+from vendors import hours as vendor_hours
 from tours.models import Tour, TourOperator, TourItinerary  # Import Tour models from tours app
-from .models import Article, VendorRating, Keyword
+from tours import routes as tour_routes
+from .models import Article, VendorRating
+from . import article_keywords
+from . import article_meta
+from . import event_feeds
+from . import listing_filters
+from . import pagination as listing_pagination
+from . import ratings as vendor_ratings
+from . import vendor_detail
+from .search import result_cache as search_result_cache
+from .search import hydration as search_hydration
+from .search import pagination as search_pagination
+from .search import autocomplete as search_suggest
+from .search import fuzzy as search_fuzzy
+from .search import facets as search_facets
+from .search import metrics as search_metrics
+
+# Keyset orderings for the listing pages (primary key is the final tie-breaker)
+CARD_KEYS = [listing_pagination.SortKey('sort_name')]
+EVENT_KEYS = [listing_pagination.SortKey('event_start_date'), listing_pagination.SortKey('event_start_time')]
+TOUR_KEYS = [listing_pagination.SortKey('is_featured', descending=True), listing_pagination.SortKey('name')]
+TITLE_KEYS = [listing_pagination.SortKey('title')]
+
+# Date windows offered on the culinary events listing (first is the default)
+EVENT_WINDOWS = [
+    ('upcoming', 'Now & upcoming'),
+    ('now', 'Happening now'),
+    ('today', 'Today'),
+    ('weekend', 'This weekend'),
+    ('week', 'Next 7 days'),
+    ('month', 'Next 30 days'),
+    ('past', 'Past 30 days'),
+]
+EVENT_WINDOW_VALUES = [value for value, _ in EVENT_WINDOWS]
+CALENDAR_MAX_DAYS = 62
 
 def homepage(request):
     """Homepage view"""
@@ -88,8 +131,9 @@ def restaurants(request):
     return render(request, 'webapp/restaurants.html', context)
 
 def restaurant_detail(request, vendor_id):
-    restaurant = get_object_or_404(Vendor, id=vendor_id, vendor_type='restaurant', is_active=True)
+    restaurant = vendor_detail.load(vendor_id, 'restaurant')
 
+    # Only the visitor's own rating is looked up per request
     user_rating = None
     if request.user.is_authenticated:
         user_rating = VendorRating.objects.filter(
@@ -100,6 +144,7 @@ def restaurant_detail(request, vendor_id):
     context = {
         'restaurant': restaurant,
         'user_rating': user_rating,   # <-- added
+        'fragments': vendor_detail.fragments(restaurant),
     }
     return render(request, 'webapp/restaurant_detail.html', context)
 
@@ -110,14 +155,15 @@ def restaurants(request):
     halal_filter = request.GET.get('halal') == 'on'
     kosher_filter = request.GET.get('kosher') == 'on'
     vegetarian_filter = request.GET.get('vegetarian') == 'on'
+    open_minute = vendor_hours.requested_minute(request.GET)
     
-    # Start with all restaurants
-    restaurants_qs = Vendor.objects.filter(vendor_type__in=['restaurant', 'cafe'])
+    # Start with all restaurants (flat cards, one row per active vendor)
+    restaurants_qs = VendorCard.objects.filter(vendor_type__in=['restaurant', 'cafe'])
     
     # Apply filters if they exist
     if selected_cuisines:
         # Filter by cuisine types (ManyToMany relationship)
-        restaurants_qs = restaurants_qs.filter(cuisine_types__name__in=selected_cuisines).distinct()
+        restaurants_qs = restaurants_qs.filter(vendor__cuisine_types__name__in=selected_cuisines).distinct()
     
     if halal_filter:
         restaurants_qs = restaurants_qs.filter(halal=True)
@@ -129,63 +175,35 @@ def restaurants(request):
         restaurants_qs = restaurants_qs.filter(vegetarian=True)
     
     if selected_locations:
-        # For location filtering
-        location_q = Q()
-        for location in selected_locations:
-            location_q |= Q(address__icontains=location)
-        restaurants_qs = restaurants_qs.filter(location_q)
+        # Postal districts (Vendor.area, indexed)
+        restaurants_qs = restaurants_qs.filter(area__in=selected_locations)
     
-    # Sort restaurants alphabetically
-    restaurants_qs = restaurants_qs.order_by(Lower('business_name'))
+    if open_minute is not None:
+        # Open now / at ?open_at= (one indexed range query on opening intervals)
+        restaurants_qs = restaurants_qs.filter(vendor__in=vendor_hours.open_at(open_minute))
     
-    # Get all available cuisines for the filter sidebar
-    # Use the correct reverse relationship name 'vendors' (plural)
-    available_cuisines = CuisineType.objects.filter(
-        vendors__vendor_type__in=['restaurant', 'cafe']  # Changed 'vendor' to 'vendors'
-    ).distinct().order_by('name')
-    
-    # For locations, extract from address field
-    available_locations = []
-    addresses = Vendor.objects.filter(vendor_type__in=['restaurant', 'cafe']).values_list('address', flat=True)
-    for addr in addresses:
-        if addr:
-            # Try to extract the area/neighborhood from address
-            # Common Singapore addresses: "333 Orchard Road, #05-03 Singapore 238867"
-            # or "78 Airport Boulevard, #B2-228 Singapore 819666"
-            if ',' in addr:
-                # Take the part before the first comma
-                location = addr.split(',')[0].strip()
-                # Remove unit numbers like "#05-03" if present
-                if '#' in location:
-                    location = location.split('#')[0].strip()
-                if location and location not in available_locations:
-                    available_locations.append(location)
-            else:
-                # If no comma, take the first few words
-                parts = addr.split()
-                if len(parts) > 1:
-                    location = ' '.join(parts[:2])  # Take first 2 words
-                    if location not in available_locations:
-                        available_locations.append(location)
+    # Sort restaurants alphabetically, one keyset page at a time
+    restaurants_page = listing_pagination.paginate(request, restaurants_qs, CARD_KEYS)
+    if listing_pagination.wants_json(request):
+        return JsonResponse(restaurants_page.json(search_hydration.vendor_results(restaurants_page)))
     
-    # Determine which dietary filters to show
-    restaurant_vendors = Vendor.objects.filter(vendor_type__in=['restaurant', 'cafe'])
-    show_halal_filter = restaurant_vendors.filter(halal=True).exists()
-    show_kosher_filter = restaurant_vendors.filter(kosher=True).exists()
-    show_vegetarian_filter = restaurant_vendors.filter(vegetarian=True).exists()
+    # Cuisines, locations and dietary filters for the sidebar (one cache read)
+    sidebar = listing_filters.snapshot('restaurants')
     
     context = {
-        'restaurants': restaurants_qs,
-        'available_cuisines': available_cuisines,
-        'available_locations': sorted(available_locations),
-        'show_halal_filter': show_halal_filter,
-        'show_kosher_filter': show_kosher_filter,
-        'show_vegetarian_filter': show_vegetarian_filter,
+        'restaurants': restaurants_page,
+        'available_cuisines': sidebar.cuisines,
+        'available_locations': sidebar.areas,
+        'show_halal_filter': sidebar.dietary['halal'],
+        'show_kosher_filter': sidebar.dietary['kosher'],
+        'show_vegetarian_filter': sidebar.dietary['vegetarian'],
         'selected_cuisines': selected_cuisines,
         'selected_locations': selected_locations,
         'halal_filter': halal_filter,
         'kosher_filter': kosher_filter,
         'vegetarian_filter': vegetarian_filter,
+        'open_filter': open_minute is not None,
+        'open_at': request.GET.get('open_at', ''),
     }
     
     return render(request, 'webapp/restaurants.html', context)
@@ -193,9 +211,9 @@ def restaurants(request):
 def food_stall_detail(request, vendor_id):
     """View for individual food stall detail page"""
     # Get vendor with type 'stall' and the specified ID
-    stall = get_object_or_404(Vendor, id=vendor_id, vendor_type='stall', is_active=True)
+    stall = vendor_detail.load(vendor_id, 'stall')
     
-    # Get user's existing rating if authenticated
+    # Get user's existing rating if authenticated (the only per-request part)
     user_rating = None
     if request.user.is_authenticated:
         user_rating = VendorRating.objects.filter(
@@ -203,20 +221,13 @@ def food_stall_detail(request, vendor_id):
             vendor=stall
         ).first()
     
-    # Calculate total reviews
-    total_reviews = VendorRating.objects.filter(vendor=stall).count()
-    
-    # Calculate average rating
-    ratings = VendorRating.objects.filter(vendor=stall)
-    average_rating = 0.0
-    if ratings.exists():
-        average_rating = sum(r.rating for r in ratings) / ratings.count()
-    
     context = {
         'stall': stall,
         'user_rating': user_rating,
-        'total_reviews': total_reviews,
-        'average_rating': average_rating,
+        'fragments': vendor_detail.fragments(stall),
+        # Stored on the vendor (see webapp.ratings)
+        'total_reviews': stall.total_reviews,
+        'average_rating': stall.average_rating,
     }
     
     return render(request, 'webapp/food_stall_detail.html', context)
@@ -229,14 +240,15 @@ def food_stalls(request):
     kosher_filter = request.GET.get('kosher') == 'on'
     vegetarian_filter = request.GET.get('vegetarian') == 'on'
     selected_locations = request.GET.getlist('location')
+    open_minute = vendor_hours.requested_minute(request.GET)
     
-    # Start with all food stalls (vendors with vendor_type='stall')
-    stalls_qs = Vendor.objects.filter(vendor_type='stall', is_active=True)
+    # Start with all food stalls (flat cards, one row per active vendor)
+    stalls_qs = VendorCard.objects.filter(vendor_type='stall')
     
     # Apply filters if they exist
     if selected_cuisines:
         # Filter by cuisine type names
-        stalls_qs = stalls_qs.filter(cuisine_types__name__in=selected_cuisines).distinct()
+        stalls_qs = stalls_qs.filter(vendor__cuisine_types__name__in=selected_cuisines).distinct()
     
     if halal_filter:
         stalls_qs = stalls_qs.filter(halal=True)
@@ -248,62 +260,165 @@ def food_stalls(request):
         stalls_qs = stalls_qs.filter(vegetarian=True)
     
     if selected_locations:
-        # Filter by location (address contains location name)
-        location_q = Q()
-        for location in selected_locations:
-            location_q |= Q(address__icontains=location)
-        stalls_qs = stalls_qs.filter(location_q)
+        # Postal districts (Vendor.area, indexed)
+        stalls_qs = stalls_qs.filter(area__in=selected_locations)
     
-    # Sort stalls alphabetically
-    stalls_qs = stalls_qs.order_by(Lower('business_name'))
+    if open_minute is not None:
+        # Open now / at ?open_at= (one indexed range query on opening intervals)
+        stalls_qs = stalls_qs.filter(vendor__in=vendor_hours.open_at(open_minute))
     
-    # Get all available cuisines for the filter sidebar
-    # Use the correct field name 'vendors' (plural) instead of 'vendor'
-    available_cuisines = CuisineType.objects.filter(
-        vendors__vendor_type='stall',
-        vendors__is_active=True
-    ).distinct().order_by('name')
+    # Sort stalls alphabetically, one keyset page at a time
+    stalls_page = listing_pagination.paginate(request, stalls_qs, CARD_KEYS)
+    if listing_pagination.wants_json(request):
+        return JsonResponse(stalls_page.json(search_hydration.vendor_results(stalls_page)))
     
-    # Determine which dietary filters to show
-    stall_vendors = Vendor.objects.filter(vendor_type='stall', is_active=True)
-    show_halal_filter = stall_vendors.filter(halal=True).exists()
-    show_kosher_filter = stall_vendors.filter(kosher=True).exists()
-    show_vegetarian_filter = stall_vendors.filter(vegetarian=True).exists()
+    # Cuisines, locations and dietary filters for the sidebar (one cache read)
+    sidebar = listing_filters.snapshot('food_stalls')
     
     context = {
-        'food_stalls': stalls_qs,  # Changed from 'stalls' to 'food_stalls'
-        'available_cuisines': available_cuisines,
-        'show_halal_filter': show_halal_filter,
-        'show_kosher_filter': show_kosher_filter,
-        'show_vegetarian_filter': show_vegetarian_filter,
+        'food_stalls': stalls_page,  # Changed from 'stalls' to 'food_stalls'
+        'available_cuisines': sidebar.cuisines,
+        'available_locations': sidebar.areas,
+        'show_halal_filter': sidebar.dietary['halal'],
+        'show_kosher_filter': sidebar.dietary['kosher'],
+        'show_vegetarian_filter': sidebar.dietary['vegetarian'],
         'selected_cuisines': selected_cuisines,
         'selected_locations': selected_locations,
         'halal_filter': halal_filter,
         'kosher_filter': kosher_filter,
         'vegetarian_filter': vegetarian_filter,
+        'open_filter': open_minute is not None,
+        'open_at': request.GET.get('open_at', ''),
         'page_title': 'Food Stalls - TasteLocal Singapore'
     }
     
     return render(request, 'webapp/food_stalls.html', context)
 
+def _event_window(when):
+    """Occurrences in a date window (index range scans, recurring runs included)"""
+    occurrences = EventOccurrence.objects.all()
+    now = timezone.now()
+    today = timezone.localdate()
+    if when == 'now':
+        return occurrences.current(now)
+    if when == 'today':
+        return occurrences.overlapping(*event_times.day_window(today))
+    if when == 'weekend':
+        if today.weekday() == 6:
+            return occurrences.overlapping(*event_times.day_window(today))
+        saturday = today + timedelta(days=5 - today.weekday())
+        return occurrences.overlapping(*event_times.day_window(saturday, days=2))
+    if when == 'week':
+        return occurrences.overlapping(now, now + timedelta(days=7))
+    if when == 'month':
+        return occurrences.overlapping(now, now + timedelta(days=30))
+    if when == 'past':
+        return occurrences.past(days=30, now=now)
+    return occurrences.not_ended(now)
+
 def culinary_events(request):
-    """List all culinary events (pop-ups, tastings, fairs, etc.)"""
-    events_list = Event.objects.filter(is_active=True).select_related('vendor')
+    """List culinary events (pop-ups, tastings, fairs, etc.) in a date window (?when=)"""
+    when = request.GET.get('when')
+    if when not in EVENT_WINDOW_VALUES:
+        when = EVENT_WINDOW_VALUES[0]
+    events_list = Event.objects.filter(is_active=True).occurring(_event_window(when)).select_related('vendor')
 
     # optional cuisine filter
     selected_cuisines = request.GET.getlist('cuisine')
     if selected_cuisines:
         events_list = events_list.filter(event_cuisine__name__in=selected_cuisines).distinct()
 
+    events_page = listing_pagination.paginate(request, events_list, EVENT_KEYS)
+    if listing_pagination.wants_json(request):
+        return JsonResponse(events_page.json(
+            search_hydration.load_cards('event', [event.id for event in events_page])
+        ))
+
     available_cuisines = CuisineType.objects.values_list('name', flat=True).order_by('name')
 
     context = {
-        'events': events_list,          # <-- real Event queryset
+        'events': events_page,          # <-- one keyset page of Events
         'selected_cuisines': selected_cuisines,
         'available_cuisines': available_cuisines,
+        'event_windows': EVENT_WINDOWS,
+        'selected_window': when,
     }
     return render(request, 'webapp/culinary_events.html', context)
 
+def _calendar_bound(value, default):
+    """Aware datetime from an ISO date or datetime parameter"""
+    if not value:
+        return default
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        return event_times.start_datetime(day)
+    return moment if timezone.is_aware(moment) else timezone.make_aware(moment)
+
+def culinary_events_calendar(request):
+    """
+    JSON event runs (recurring events expanded) for a calendar view.
+    
+    GET params: start and end (ISO date or datetime; default the next
+    month); spans over CALENDAR_MAX_DAYS are cut to that length.
+    """
+    default_start = event_times.start_datetime(timezone.localdate())
+    try:
+        start = _calendar_bound(request.GET.get('start'), default_start)
+        end = _calendar_bound(request.GET.get('end'), start + timedelta(days=31))
+    except ValueError:
+        return JsonResponse({'error': "start and end must be ISO dates or datetimes"}, status=400)
+    end = min(end, start + timedelta(days=CALENDAR_MAX_DAYS))
+    
+    # One index range scan over occurrences, joined to their events
+    occurrences = (
+        EventOccurrence.objects.overlapping(start, end)
+        .filter(event__is_active=True)
+        .select_related('event')
+        .only('starts_at', 'ends_at', 'event__id', 'event__event_name')
+        .order_by('starts_at', 'event_id')
+    )
+    return JsonResponse({
+        'start': start,
+        'end': end,
+        'occurrences': [{
+            'id': occurrence.event.id,
+            'title': occurrence.event.event_name,
+            'start': occurrence.starts_at,
+            'end': occurrence.ends_at,
+            'url': reverse('webapp:culinary_event_detail', args=[occurrence.event.id]),
+        } for occurrence in occurrences],
+    })
+
+def culinary_events_feed(request, feed_format):
+    """
+    iCalendar or JSON feed of event runs for partner calendars.
+    
+    GET params: vendor (id) and cuisine (name, repeatable). Answers 304
+    when the client's ETag / Last-Modified still match (see webapp.event_feeds).
+    """
+    try:
+        filters = event_feeds.FeedFilters.from_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': "vendor must be a vendor id"}, status=400)
+    
+    # One aggregate query decides whether the client's copy is current
+    feed_version = event_feeds.version(filters)
+    last_modified = int(feed_version.last_modified.timestamp()) if feed_version.last_modified else None
+    response = get_conditional_response(request, etag=feed_version.etag, last_modified=last_modified)
+    if response is None:
+        base_url = request.build_absolute_uri('/').rstrip('/')
+        response = HttpResponse(
+            event_feeds.body(feed_format, filters, feed_version, base_url),
+            content_type=event_feeds.FORMATS[feed_format],
+        )
+    response['ETag'] = feed_version.etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
+
 def culinary_event_detail(request, event_id):
     """View for individual culinary event detail page"""
     # This looks for an EVENT object
@@ -320,7 +435,7 @@ def culinary_event_detail(request, event_id):
 def tours_experiences(request):
     """Tours & Experiences main page"""
     tours_count = Tour.objects.filter(is_active=True).count()
-    featured_tours = Tour.objects.filter(is_featured=True, is_active=True)[:3]
+    featured_tours = Tour.objects.filter(is_featured=True, is_active=True).select_related('summary')[:3]
     
     context = {
         'tours_count': tours_count,
@@ -332,7 +447,7 @@ def tours_experiences(request):
 def guided_tours(request):
     """Guided Food Tours listing page with filters"""
     # Get all active tours
-    guided_tours = Tour.objects.filter(is_active=True).select_related('tour_operator')
+    guided_tours = Tour.objects.filter(is_active=True).select_related('tour_operator', 'summary')
     
     # Get filter parameters
     selected_tour_types = request.GET.getlist('tour_type')
@@ -351,8 +466,14 @@ def guided_tours(request):
         id__in=guided_tours.values_list('tour_operator_id', flat=True).distinct()
     ).order_by('company_name')
     
+    tours_page = listing_pagination.paginate(request, guided_tours, TOUR_KEYS)
+    if listing_pagination.wants_json(request):
+        return JsonResponse(tours_page.json(
+            search_hydration.load_cards('tour', [tour.id for tour in tours_page])
+        ))
+    
     context = {
-        'guided_tours': guided_tours,  # Return Tour objects directly
+        'guided_tours': tours_page,  # One keyset page of Tour objects
         'selected_tour_types': selected_tour_types,
         'selected_operators': selected_operators,
         'available_tour_types': available_tour_types,
@@ -363,18 +484,23 @@ def guided_tours(request):
 def tour_detail(request, tour_id):
     """Tour detail page - SIMPLE VERSION WITHOUT RATINGS"""
     tour = get_object_or_404(
-        Tour.objects.select_related('tour_operator')
-                     .prefetch_related('itinerary__vendor'),
+        Tour.objects.select_related('tour_operator', 'summary')
+                     .prefetch_related(Prefetch(
+                         'itinerary',
+                         queryset=TourItinerary.objects.select_related('vendor').order_by('stop_order'),
+                     )),
         id=tour_id
     )
     
-    # Get itinerary items for this tour
-    itinerary_items = TourItinerary.objects.filter(
-        tour=tour
-    ).select_related('vendor').order_by('stop_order')
+    # Walking legs between stops, cached per itinerary version
+    stops = list(tour.itinerary.all())
+    route = tour_routes.route(tour.id, stops)
+    for stop in stops:
+        stop.leg = route.legs.get(stop.id)
     
     context = {
         'tour': tour,
+        'route': route,
     }
     return render(request, 'webapp/tour_detail.html', context)
 
@@ -382,42 +508,28 @@ def tour_detail(request, tour_id):
 
 def foodie_crawls(request):
     """Foodie Crawls page showing articles with Food Crawl keyword"""
-    import urllib.parse                      # <- NEW
-    print('=== NEW REQUEST ===')             # <- NEW
-    print('raw  GET:', request.GET)          # <- NEW
-    print('raw  filter list:', request.GET.getlist('filter'))  # <- NEW
+    import urllib.parse
+    keyword_sets = article_keywords.get()
 
     # 1. start with “Food Crawl” articles
-    food_crawl_keyword = Keyword.objects.filter(name__iexact="food crawl").first()
-    if food_crawl_keyword:
-        articles_list = Article.objects.filter(keywords=food_crawl_keyword).order_by('title')
-    else:
-        articles_list = Article.objects.none()
+    food_crawl_keyword = keyword_sets.keyword_id("food crawl")
 
-    # 2. normalise the incoming filter names
+    # 2. normalise the incoming filter names (handles + and %20)
     selected_filters = [
-        urllib.parse.unquote_plus(f).strip()          # <- NEW (handles + and %20)
+        urllib.parse.unquote_plus(f).strip()
         for f in request.GET.getlist('filter')
     ]
-    print('cleaned filters:', selected_filters)       # <- NEW
-
-    # 3. apply additional keyword filters
-    if selected_filters:
-        filter_keywords = []
-        for filt in selected_filters:
-            kw = Keyword.objects.filter(name__iexact=filt).first()
-            print(f'  looking for "{filt}" -> {kw}')  # <- NEW
-            if kw:
-                filter_keywords.append(kw)
-
-        if filter_keywords:
-            for kw in filter_keywords:
-                articles_list = articles_list.filter(keywords=kw).distinct()
-        else:
-            articles_list = Article.objects.none()
 
-    print('final qs count:', articles_list.count())   # <- NEW
-    print('===================')                       # <- NEW
+    # 3. every known filter keyword is required too; unknown names are ignored
+    filter_keywords = [kw for kw in map(keyword_sets.keyword_id, selected_filters) if kw is not None]
+    if food_crawl_keyword is None or (selected_filters and not filter_keywords):
+        article_ids = set()
+    else:
+        article_ids = keyword_sets.all_of([food_crawl_keyword, *filter_keywords])
+
+    articles_list = list(article_meta.listing(Article.objects.filter(id__in=article_ids)).order_by('title'))
+    for article in articles_list:
+        article.keyword_names = keyword_sets.names_for(article.id, exclude={food_crawl_keyword})
 
     context = {
         'articles': articles_list,
@@ -437,38 +549,41 @@ def foodie_stories(request):
     selected_keyword_ids = request.GET.getlist('keyword')
     selected_authors = request.GET.getlist('author')
     selected_years = request.GET.getlist('year')
+    selected_keywords = [int(kw_id) for kw_id in selected_keyword_ids if kw_id.isdigit()]
+    selected_year_values = [int(year) for year in selected_years if year.isdigit()]
+    keyword_sets = article_keywords.get()
     
-    # Start with all articles - SORTED ALPHABETICALLY
-    articles = Article.objects.all().order_by('title')
-    
-    # Apply filters if they exist
+    # Each ticked group matches any of its values; the groups narrow each other
+    matches = []
     if selected_keyword_ids:
-        articles = articles.filter(keywords__id__in=selected_keyword_ids)
-    
+        matches.append(keyword_sets.any_of(selected_keywords))
     if selected_authors:
-        articles = articles.filter(author_name__in=selected_authors)
-    
+        matches.append(keyword_sets.written_by(selected_authors))
     if selected_years:
-        articles = articles.filter(date_written__year__in=selected_years)
-    
-    # Get all available keywords for the filter sidebar
-    available_keywords = Keyword.objects.all()
-    
-    # Get all unique authors from existing articles
-    available_authors = Article.objects.values_list('author_name', flat=True).distinct()
-    
-    # Get all unique years from existing articles
-    available_years = Article.objects.dates('date_written', 'year').order_by('-date_written')
-    available_years = [year.year for year in available_years]
-    
+        matches.append(keyword_sets.written_in(selected_year_values))
+    
+    # Start with all articles - SORTED ALPHABETICALLY (see TITLE_KEYS)
+    articles = article_meta.listing(Article.objects.all())
+    if matches:
+        articles = articles.filter(id__in=set.intersection(*matches))
+    
+    articles_page = listing_pagination.paginate(request, articles, TITLE_KEYS)
+    if listing_pagination.wants_json(request):
+        return JsonResponse(articles_page.json(
+            search_hydration.load_cards('article', [article.id for article in articles_page])
+        ))
+    for article in articles_page:
+        article.keyword_names = keyword_sets.names_for(article.id)
+    
+    # Sidebar options come from the keyword sets as well
     context = {
-        'articles': articles,
-        'available_keywords': available_keywords,
-        'available_authors': available_authors,
-        'available_years': available_years,
-        'selected_keywords': [int(kw_id) for kw_id in selected_keyword_ids if kw_id.isdigit()],
+        'articles': articles_page,
+        'available_keywords': keyword_sets.keywords(),
+        'available_authors': keyword_sets.authors(),
+        'available_years': keyword_sets.years(),
+        'selected_keywords': selected_keywords,
         'selected_authors': selected_authors,
-        'selected_years': [int(year) for year in selected_years if year.isdigit()],
+        'selected_years': selected_year_values,
     }
     
     return render(request, 'webapp/foodie_stories.html', context)
@@ -495,14 +610,31 @@ def terms_service(request):
     return render(request, 'webapp/terms_service.html')
 
 def article_detail(request, slug):
-    """Article detail page"""
-    article = get_object_or_404(Article, slug=slug)
+    """Article detail page, serving the body pre-rendered on save"""
+    article = get_object_or_404(
+        Article.objects.select_related('lead_image').prefetch_related('images'),
+        slug=slug
+    )
+    keyword_names = article_keywords.get().names_for(article.id)
+    
+    # Signed-in pages carry per-user data (name, badges), so only anonymous
+    # readers get a validator
+    etag = None
+    if not request.user.is_authenticated:
+        etag = article_meta.page_etag(article, keyword_names, request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''))
+        not_modified = get_conditional_response(request, etag=etag)
+        if not_modified is not None:
+            return not_modified
     
     context = {
         'article': article,
+        'keyword_names': keyword_names,
         'page_title': f'{article.title} - TasteLocal Singapore'
     }
-    return render(request, 'webapp/article_detail.html', context)
+    response = render(request, 'webapp/article_detail.html', context)
+    if etag:
+        response['ETag'] = etag
+    return response
 
 # Views for Vendor Ratings
 
@@ -513,25 +645,13 @@ def submit_rating(request, vendor_id):
         
         rating = request.POST.get('rating')
         
-        # Check if user already rated this vendor
-        existing_rating = VendorRating.objects.filter(
-            user=request.user, 
-            vendor=vendor
-        ).first()
-        
-        if existing_rating:
-            # Update existing rating
-            existing_rating.rating = rating
-            existing_rating.save()
-            messages.success(request, "Your rating has been updated!")
+        # Upsert the user's rating and refresh the vendor's stored aggregates
+        try:
+            vendor_ratings.submit(vendor, request.user, rating)
+        except ValueError:
+            messages.error(request, "Please choose a rating from 0 to 5 stars.")
         else:
-            # Create new rating
-            VendorRating.objects.create(
-                user=request.user,
-                vendor=vendor,
-                rating=rating
-            )
-            messages.success(request, "Thank you for your rating!")
+            messages.success(request, "Thank you, your rating has been saved!")
         
         # Redirect back to the appropriate detail page based on vendor type
         if vendor.vendor_type == 'restaurant':
@@ -551,6 +671,9 @@ def submit_rating(request, vendor_id):
 def search(request):
     """
     Search with primary (AND words in name/title) and secondary (exact phrase anywhere)
+    
+    Each category is paged separately: ?dining_cursor=..., ?events_cursor=...
+    Facet filters: ?category=, ?vendor_type=, ?cuisine=, ?dietary= (repeatable)
     """
     query = request.GET.get('q', '').strip()
     
@@ -562,208 +685,182 @@ def search(request):
             'search_performed': False
         })
     
-    # Split for primary AND search
-    search_terms = query.split()
-    
-    results = {'primary': [], 'secondary': []}
-    
-    # ===== PRIMARY RESULTS: AND word logic in NAME/TITLE only =====
-    if search_terms:
-        # Build AND conditions for name/title fields only
-        q_primary_vendor = Q()
-        q_primary_event = Q()
-        q_primary_article = Q()
-        q_primary_tour = Q()
+    with search_metrics.SearchTrace(search_result_cache.normalize(query)) as trace:
+        # Resolve both tiers with the configured backend (webapp/search/backends.py)
+        hits = search_result_cache.lookup(query)
+        trace.zero_results = not hits
         
-        for term in search_terms:
-            q_primary_vendor &= Q(business_name__icontains=term)
-            q_primary_event &= Q(event_name__icontains=term)
-            q_primary_article &= Q(title__icontains=term)
-            q_primary_tour &= Q(name__icontains=term)
+        # Nothing matched exactly: offer close spellings and fuzzy name matches
+        did_you_mean = []
+        fuzzy_results = False
+        if not hits:
+            with trace.phase('fuzzy'):
+                matches = search_fuzzy.match(query)
+                did_you_mean = search_fuzzy.did_you_mean(query, matches)
+                hits = search_fuzzy.fallback_hits(matches)
+            fuzzy_results = bool(hits)
         
-        # Primary vendors - MUST have ALL terms in business_name
-        primary_vendors = Vendor.objects.filter(q_primary_vendor).distinct().order_by('business_name')
-        for vendor in primary_vendors:
-            results['primary'].append({
-                'type': 'vendor',
-                'vendor_type': vendor.vendor_type,
-                'object_id': vendor.id,
-                'title': vendor.business_name,
-                'description': vendor.description[:100] + '...' if vendor.description else '',
-                'url': reverse('webapp:restaurant_detail', args=[vendor.id]) 
-                       if vendor.vendor_type == 'restaurant' 
-                       else reverse('webapp:food_stall_detail', args=[vendor.id]),
-                'image_url': vendor.business_pix.url if vendor.business_pix else None,
-                'category': 'Dining',
-                'subtitle': vendor.get_cuisine_types_display(),
-                'relevance': 'primary'
-            })
+        # Load one bounded page per category and build the result cards
+        with trace.phase('hydration'):
+            facets, hits = search_facets.apply(hits, request.GET)
+            cursors = {key: request.GET.get(f'{key}_cursor') for key in search_pagination.CATEGORY_KEYS}
+            limit = search_pagination.page_size(request.GET.get('limit'))
+            categories = search_pagination.category_pages(hits, cursors=cursors, limit=limit)
+            
+            cards = []
+            for category in categories:
+                cards.extend(category['results'])
+                category['next_url'] = None
+                if category['next_cursor']:
+                    params = request.GET.copy()
+                    params[f"{category['key']}_cursor"] = category['next_cursor']
+                    category['next_url'] = '?' + params.urlencode()
+            results = search_hydration.split_tiers(cards)
         
-        # Primary events - MUST have ALL terms in event_name
-        primary_events = Event.objects.filter(q_primary_event).distinct().order_by('event_name')
-        for event in primary_events:
-            results['primary'].append({
-                'type': 'event',
-                'object_id': event.id,
-                'title': event.event_name,
-                'description': event.event_description[:100] + '...' if event.event_description else '',
-                'url': reverse('webapp:culinary_event_detail', args=[event.id]),
-                'image_url': event.event_pix.url if event.event_pix else None,
-                'category': 'Events',
-                'subtitle': event.display_date_range if hasattr(event, 'display_date_range') else '',
-                'relevance': 'primary'
-            })
-        
-        # Primary articles - MUST have ALL terms in title
-        primary_articles = Article.objects.filter(q_primary_article).distinct().order_by('title')
-        for article in primary_articles:
-            results['primary'].append({
-                'type': 'article',
-                'slug': article.slug,
-                'title': article.title,
-                'description': article.content[:100] + '...' if article.content else '',
-                'url': reverse('webapp:article_detail', args=[article.slug]),
-                'image_url': article.images.first().image.url if article.images.first() else None,
-                'category': 'Articles',
-                'subtitle': f"By {article.author_name}",
-                'relevance': 'primary'
-            })
+        primary_count = sum(len(ids) for ids in hits.primary.values())
+        secondary_count = sum(len(ids) for ids in hits.secondary.values())
         
-        # Primary tours - MUST have ALL terms in name
-        primary_tours = Tour.objects.filter(q_primary_tour).distinct().order_by('name')
-        for tour in primary_tours:
-            results['primary'].append({
-                'type': 'tour',
-                'object_id': tour.id,
-                'title': tour.name,
-                'description': tour.description[:100] + '...' if tour.description else '',
-                'url': reverse('webapp:tour_detail', args=[tour.id]),
-                'image_url': tour.tour_pic.url if hasattr(tour, 'tour_pic') and tour.tour_pic else None,
-                'category': 'Tours',
-                'subtitle': f"{tour.type_display if hasattr(tour, 'type_display') else tour.tour_type}",
-                'relevance': 'primary'
+        with trace.phase('render'):
+            return render(request, 'webapp/search_results.html', {
+                'query': query,
+                'results': results,
+                'categories': categories,
+                'facets': facets,
+                'facet_sections': search_facets.sections(facets),
+                'total_results': primary_count + secondary_count,
+                'primary_count': primary_count,
+                'secondary_count': secondary_count,
+                'did_you_mean': did_you_mean,
+                'fuzzy_results': fuzzy_results,
+                'search_performed': True
             })
+
+def search_api(request):
+    """
+    JSON search results for lazy loading, one page per category.
     
-    # ===== SECONDARY RESULTS: Exact phrase match ANYWHERE =====
-    # Search for EXACT query phrase in all relevant fields
-    q_secondary_vendor = (
-        Q(business_name__icontains=query) |
-        Q(description__icontains=query) |
-        Q(address__icontains=query)
-    )
-    
-    q_secondary_event = (
-        Q(event_name__icontains=query) |
-        Q(event_description__icontains=query) |
-        Q(event_address__icontains=query)
-    )
-    
-    q_secondary_article = (
-        Q(title__icontains=query) |
-        Q(content__icontains=query)
-    )
-    
-    q_secondary_tour = (
-        Q(name__icontains=query) |
-        Q(description__icontains=query)
-    )
-    
-    # Get all secondary results
-    secondary_vendors = Vendor.objects.filter(q_secondary_vendor).exclude(
-        id__in=[v['object_id'] for v in results['primary'] if v['type'] == 'vendor']
-    ).distinct().order_by('business_name')
-    
-    secondary_events = Event.objects.filter(q_secondary_event).exclude(
-        id__in=[e['object_id'] for e in results['primary'] if e['type'] == 'event']
-    ).distinct().order_by('event_name')
-    
-    secondary_articles = Article.objects.filter(q_secondary_article).exclude(
-        slug__in=[a['slug'] for a in results['primary'] if a['type'] == 'article']
-    ).distinct().order_by('title')
-    
-    secondary_tours = Tour.objects.filter(q_secondary_tour).exclude(
-        id__in=[t['object_id'] for t in results['primary'] if t['type'] == 'tour']
-    ).distinct().order_by('name')
-    
-    # Add secondary vendors
-    for vendor in secondary_vendors:
-        # Check if exact phrase is in business_name (higher relevance)
-        in_name = query.lower() in vendor.business_name.lower()
-        
-        results['secondary'].append({
-            'type': 'vendor',
-            'vendor_type': vendor.vendor_type,
-            'object_id': vendor.id,
-            'title': vendor.business_name,
-            'description': vendor.description[:100] + '...' if vendor.description else '',
-            'url': reverse('webapp:restaurant_detail', args=[vendor.id]) 
-                   if vendor.vendor_type == 'restaurant' 
-                   else reverse('webapp:food_stall_detail', args=[vendor.id]),
-            'image_url': vendor.business_pix.url if vendor.business_pix else None,
-            'category': 'Dining',
-            'subtitle': vendor.get_cuisine_types_display(),
-            'relevance': 'exact_name' if in_name else 'exact_other'
-        })
-    
-    # Add secondary events
-    for event in secondary_events:
-        in_name = query.lower() in event.event_name.lower()
-        
-        results['secondary'].append({
-            'type': 'event',
-            'object_id': event.id,
-            'title': event.event_name,
-            'description': event.event_description[:100] + '...' if event.event_description else '',
-            'url': reverse('webapp:culinary_event_detail', args=[event.id]),
-            'image_url': event.event_pix.url if event.event_pix else None,
-            'category': 'Events',
-            'subtitle': event.display_date_range if hasattr(event, 'display_date_range') else '',
-            'relevance': 'exact_name' if in_name else 'exact_other'
-        })
-    
-    # Add secondary articles
-    for article in secondary_articles:
-        in_title = query.lower() in article.title.lower()
-        
-        results['secondary'].append({
-            'type': 'article',
-            'slug': article.slug,
-            'title': article.title,
-            'description': article.content[:100] + '...' if article.content else '',
-            'url': reverse('webapp:article_detail', args=[article.slug]),
-            'image_url': article.images.first().image.url if article.images.first() else None,
-            'category': 'Articles',
-            'subtitle': f"By {article.author_name}",
-            'relevance': 'exact_title' if in_title else 'exact_content'
-        })
+    GET params: q, category (repeatable; defaults to all), cursor (used when
+    a single category is requested), limit, and the facet filters
+    vendor_type / cuisine / dietary (repeatable).
+    """
+    query = request.GET.get('q', '').strip()
+    requested = [c for c in request.GET.getlist('category') if c in search_pagination.CATEGORY_KEYS]
+    limit = search_pagination.page_size(request.GET.get('limit'))
     
-    # Add secondary tours
-    for tour in secondary_tours:
-        in_name = query.lower() in tour.name.lower()
-        
-        results['secondary'].append({
-            'type': 'tour',
-            'object_id': tour.id,
-            'title': tour.name,
-            'description': tour.description[:100] + '...' if tour.description else '',
-            'url': reverse('webapp:tour_detail', args=[tour.id]),
-            'image_url': tour.tour_pic.url if hasattr(tour, 'tour_pic') and tour.tour_pic else None,
-            'category': 'Tours',
-            'subtitle': f"{tour.type_display if hasattr(tour, 'type_display') else tour.tour_type}",
-            'relevance': 'exact_name' if in_name else 'exact_other'
-        })
+    cursors = {}
+    if len(requested) == 1:
+        cursors[requested[0]] = request.GET.get('cursor')
     
-    # Sort secondary results: exact matches in name first, then others
-    results['secondary'].sort(key=lambda x: (
-        0 if x['relevance'] in ['exact_name', 'exact_title'] else 1,
-        x['title'].lower()
-    ))
+    if query:
+        hits = search_result_cache.lookup(query)
+        facets, hits = search_facets.apply(hits, request.GET)
+        categories = search_pagination.category_pages(
+            hits, cursors=cursors, limit=limit, categories=requested
+        )
+    else:
+        facets = {}
+        categories = []
     
-    return render(request, 'webapp/search_results.html', {
+    return JsonResponse({
         'query': query,
+        'limit': limit,
+        'facets': facets,
+        'categories': {
+            category['key']: {
+                'label': category['label'],
+                'total': category['total'],
+                'results': category['results'],
+                'next_cursor': category['next_cursor'],
+            }
+            for category in categories
+        },
+    })
+
+# "Near me" search: (type, candidates, lat field, lon field, card doc_type)
+NEARBY_SOURCES = [
+    ('restaurant', Vendor.objects.filter(vendor_type='restaurant', is_active=True), 'latitude', 'longitude', 'vendor'),
+    ('stall', Vendor.objects.filter(vendor_type='stall', is_active=True), 'latitude', 'longitude', 'vendor'),
+    ('event', Event.objects.filter(is_active=True), 'event_latitude', 'event_longitude', 'event'),
+]
+NEARBY_TYPES = [source[0] for source in NEARBY_SOURCES]
+
+def _nearby_area(params):
+    """(box, origin, radius_km) from ?lat=&lng=&radius= or ?bbox=, or None if invalid"""
+    try:
+        if params.get('bbox'):
+            box = geo.BoundingBox(*[float(value) for value in params['bbox'].split(',')])
+            if params.get('lat') and params.get('lng'):
+                origin = (float(params['lat']), float(params['lng']))
+            else:
+                origin = box.center
+            if not geo.is_valid_point(*origin):
+                return None
+            return box, origin, None
+        origin = (float(params['lat']), float(params['lng']))
+        radius_km = min(float(params.get('radius', 1)), geo.MAX_RADIUS_KM)
+    except (KeyError, TypeError, ValueError):
+        return None
+    # Written as `not >` so a NaN radius is rejected too
+    if not radius_km > 0 or not geo.is_valid_point(*origin):
+        return None
+    return geo.BoundingBox.around(origin[0], origin[1], radius_km), origin, radius_km
+
+def nearby(request):
+    """
+    JSON restaurants, food stalls and current events near a point, nearest first.
+    
+    GET params: lat, lng and radius (km, default 1), or bbox=min_lat,min_lng,
+    max_lat,max_lng (distances from lat/lng if given, else the box centre);
+    type (repeatable: restaurant, stall, event; defaults to all) and limit.
+    """
+    area = _nearby_area(request.GET)
+    if area is None:
+        return JsonResponse({'error': "Give lat and lng (and optionally radius in km), or bbox"}, status=400)
+    box, origin, radius_km = area
+    types = [t for t in request.GET.getlist('type') if t in NEARBY_TYPES] or NEARBY_TYPES
+    limit = listing_pagination.page_size(request.GET.get('limit'))
+    
+    # Geohash-prefiltered candidates with exact distances, nearest first
+    matches = []
+    for source_type, candidates, lat_field, lon_field, doc_type in NEARBY_SOURCES:
+        if source_type not in types:
+            continue
+        queryset = candidates.only('id', lat_field, lon_field, 'geohash')
+        if doc_type == 'event':
+            # Events with a current or upcoming run
+            queryset = queryset.occurring(EventOccurrence.objects.not_ended())
+        for obj, distance in geo.nearest(queryset, box, origin, lat_field, lon_field, 'geohash', radius_km):
+            matches.append((distance, doc_type, obj.id))
+    matches.sort()
+    
+    # Cards for the nearest `limit` only (one query per listing type)
+    page = matches[:limit]
+    cards = {}
+    for doc_type in {doc_type for _, doc_type, _ in page}:
+        ids = [object_id for _, t, object_id in page if t == doc_type]
+        for card in search_hydration.load_cards(doc_type, ids):
+            cards[doc_type, card['object_id']] = card
+    results = []
+    for distance, doc_type, object_id in page:
+        card = cards.get((doc_type, object_id))
+        if card:
+            results.append({**card, 'distance_km': round(distance, 3)})
+    
+    return JsonResponse({
+        'origin': {'lat': origin[0], 'lng': origin[1]},
+        'radius_km': radius_km,
+        'total': len(matches),
         'results': results,
-        'total_results': len(results['primary']) + len(results['secondary']),
-        'primary_count': len(results['primary']),
-        'secondary_count': len(results['secondary']),
-        'search_performed': True
-    })
\ No newline at end of file
+    })
+
+def search_autocomplete(request):
+    """Typeahead suggestions for the search bar, served from the in-process trie"""
+    prefix = request.GET.get('q', '').strip()
+    try:
+        limit = max(1, min(int(request.GET.get('limit', 8)), search_suggest.SUGGESTION_LIMIT))
+    except ValueError:
+        limit = 8
+    return JsonResponse({
+        'query': prefix,
+        'suggestions': search_suggest.suggest(prefix, limit) if prefix else [],
+    })